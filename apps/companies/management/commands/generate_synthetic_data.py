@@ -0,0 +1,324 @@
+"""
+Management command для генерации синтетических данных в масштабе продакшена.
+
+Создаёт сети (компании со slug synthetic-NNN и флагом is_synthetic)
+с точками, QR-кодами (со сканированиями), отзывами с тегами, ответами
+и метаданными фото.
+Объём отзывов распределён между компаниями неравномерно — первые сети
+самые крупные, как у реальных клиентов.
+
+Всё пишется через bulk_create, поэтому сигналы не срабатывают:
+совпадения с паттернами, поисковый индекс и счётчики алертов
+перестраиваются в конце (можно пропустить флагом --skip-derived).
+
+    python manage.py generate_synthetic_data --companies 50 --spots 500 --reviews 1000000
+"""
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.companies.models import Company, Spot
+from apps.dashboard.services.alert_engine import rebuild_alert_counters
+from apps.dashboard.services.matching import rebuild_review_matches
+from apps.qr.models import QR
+from apps.reviews.models import (
+    Review, ReviewHistory, ReviewMatch, ReviewPhoto, ReviewSearchDocument,
+)
+from apps.reviews.search import rebuild_search_index
+from apps.reviews.services import analyze_review_impressions, is_tags_complex
+
+SLUG_PREFIX = 'synthetic-'
+
+POSITIVE_PHRASES = [
+    'Очень вкусная еда',
+    'Официант был вежливый и внимательный',
+    'Заказ принесли быстро',
+    'Уютная атмосфера и приятная музыка',
+    'Отличный кофе и свежая выпечка',
+    'Большие порции',
+    'Чисто и красиво',
+    'Цены приятные',
+    'Вкусные десерты',
+    'Персонал отлично знает меню',
+    'Удобно забронировать стол',
+    'Доставка приехала вовремя',
+]
+
+NEGATIVE_PHRASES = [
+    'Долго ждали заказ',
+    'Официант грубил',
+    'Суп принесли холодный',
+    'Очень дорого для такого качества',
+    'Грязные столы',
+    'Перепутали заказ',
+    'Громкая музыка, очень шумно',
+    'Маленькие порции',
+    'Невкусный салат',
+    'Администратор не решил проблему',
+    'Не было свободных столов, хотя бронировали',
+    'Счёт принесли с ошибкой',
+]
+
+# Редкие, но важные для алертов фразы
+SAFETY_PHRASES = [
+    'После ужина отравились',
+    'В салате нашли волос',
+]
+
+RESPONSES = [
+    'Спасибо за отзыв! Будем рады видеть вас снова.',
+    'Благодарим за обратную связь, передали команде.',
+    'Извините за неудобства, мы уже разбираемся в ситуации.',
+]
+
+AUTHORS = [
+    'Анна К.', 'Иван П.', 'Мария С.', 'Дмитрий Л.', 'Елена В.', 'Сергей М.',
+    'Ольга Н.', 'Алексей Р.', 'Татьяна Б.', 'Никита Г.', 'Аноним',
+]
+
+CITIES = ['Москва', 'Санкт-Петербург', 'Казань', 'Екатеринбург', 'Новосибирск']
+STREETS = ['Тверская', 'Арбат', 'Невский', 'Баумана', 'Ленина', 'Мира', 'Садовая']
+
+# (оценка, вес) — типичное J-образное распределение оценок
+RATING_WEIGHTS = [(5, 45), (4, 20), (3, 10), (2, 10), (1, 15)]
+SOURCE_WEIGHTS = [
+    (Review.Source.YANDEX, 45), (Review.Source.TWOGIS, 25),
+    (Review.Source.GOOGLE, 15), (Review.Source.INTERNAL, 15),
+]
+
+# Вариантов текста на каждую оценку (теги считаются один раз на вариант)
+TEXTS_PER_RATING = 200
+
+
+class Command(BaseCommand):
+    help = 'Сгенерировать синтетические компании, точки, QR и отзывы для нагрузочных проверок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=50, help='Количество компаний (по умолчанию 50)')
+        parser.add_argument('--spots', type=int, default=500, help='Всего точек (по умолчанию 500)')
+        parser.add_argument('--reviews', type=int, default=1_000_000, help='Всего отзывов (по умолчанию 1 000 000)')
+        parser.add_argument('--qr-per-spot', type=int, default=2, help='QR-кодов на точку (по умолчанию 2)')
+        parser.add_argument('--days', type=int, default=365, help='Глубина истории в днях (по умолчанию 365)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пачки bulk_create (по умолчанию 5000)')
+        parser.add_argument('--seed', type=int, default=42, help='Seed генератора (по умолчанию 42)')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить ранее сгенерированные компании перед генерацией',
+        )
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help='Не перестраивать совпадения, поисковый индекс и счётчики алертов',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.days = options['days']
+
+        if options['clear']:
+            self._clear()
+
+        self.stdout.write('Подготовка текстов и тегов...')
+        self.texts = self._build_text_pool()
+
+        num_companies = options['companies']
+        spots_per_company = self._split_evenly(options['spots'], num_companies)
+        reviews_per_company = self._split_weighted(options['reviews'], num_companies)
+        offset = Company.objects.filter(slug__startswith=SLUG_PREFIX).count()
+
+        total = 0
+        for i in range(num_companies):
+            company = Company.objects.create(
+                name=f'Синтетическая сеть {offset + i + 1}',
+                slug=f'{SLUG_PREFIX}{offset + i + 1:03d}',
+                city=self.rng.choice(CITIES),
+                is_chain=spots_per_company[i] > 1,
+                is_synthetic=True,
+            )
+            spots = self._create_spots(company, spots_per_company[i])
+            self._create_qr_codes(company, spots, options['qr_per_spot'])
+            created = self._create_reviews(company, spots, reviews_per_company[i])
+            total += created
+
+            if not options['skip_derived']:
+                self._rebuild_derived(company)
+
+            self.stdout.write(f'  {company.name}: {len(spots)} точек, {created} отзывов')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: {num_companies} компаний, {total} отзывов'))
+
+    # === Данные ===
+
+    def _build_text_pool(self) -> dict[int, list[tuple]]:
+        """Варианты (текст, теги, score, complex) для каждой оценки."""
+        pool = {}
+        for rating, _ in RATING_WEIGHTS:
+            variants = []
+            for _ in range(TEXTS_PER_RATING):
+                text = self._compose_text(rating)
+                tags, score = analyze_review_impressions(text, rating)
+                variants.append((text, tags, score, is_tags_complex(rating, tags)))
+            pool[rating] = variants
+        return pool
+
+    def _compose_text(self, rating: int) -> str:
+        if rating >= 4:
+            phrases = self.rng.sample(POSITIVE_PHRASES, self.rng.randint(1, 3))
+            if rating == 4 and self.rng.random() < 0.3:
+                phrases.append(self.rng.choice(NEGATIVE_PHRASES).lower())
+        elif rating == 3:
+            phrases = [self.rng.choice(POSITIVE_PHRASES), self.rng.choice(NEGATIVE_PHRASES).lower()]
+        else:
+            phrases = self.rng.sample(NEGATIVE_PHRASES, self.rng.randint(1, 3))
+            if self.rng.random() < 0.03:
+                phrases.append(self.rng.choice(SAFETY_PHRASES).lower())
+        return '. '.join(phrases) + '.'
+
+    def _create_spots(self, company: Company, count: int) -> list[Spot]:
+        spots = [
+            Spot(
+                company=company,
+                name=f'{self.rng.choice(STREETS)}, {n + 1}',
+                zone=company.city,
+            )
+            for n in range(count)
+        ]
+        return Spot.objects.bulk_create(spots, batch_size=self.batch_size)
+
+    def _create_qr_codes(self, company: Company, spots: list[Spot], per_spot: int) -> None:
+        qr_codes = []
+        for spot in spots:
+            for _ in range(per_spot):
+                scans = int(self.rng.paretovariate(1.2) * 20)
+                qr_codes.append(QR(
+                    company=company,
+                    spot=spot,
+                    scans=scans,
+                    last_scan_at=self._random_datetime() if scans else None,
+                ))
+        QR.objects.bulk_create(qr_codes, batch_size=self.batch_size)
+
+    def _create_reviews(self, company: Company, spots: list[Spot], count: int) -> int:
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            reviews, photos = self._review_batch(company, spots, size)
+            dates = [review.created_at for review in reviews]
+            with transaction.atomic():
+                # bulk_create проставляет created_at = now (auto_now_add) — даты возвращаются update'ом
+                Review.objects.bulk_create(reviews)
+                for review, created_at in zip(reviews, dates):
+                    review.created_at = created_at
+                Review.objects.bulk_update(reviews, ['created_at'], batch_size=self.batch_size)
+                ReviewPhoto.objects.bulk_create(photos)
+            created += size
+        return created
+
+    def _review_batch(self, company: Company, spots: list[Spot], size: int) -> tuple[list, list]:
+        ratings = self.rng.choices(
+            [r for r, _ in RATING_WEIGHTS], weights=[w for _, w in RATING_WEIGHTS], k=size,
+        )
+        sources = self.rng.choices(
+            [s for s, _ in SOURCE_WEIGHTS], weights=[w for _, w in SOURCE_WEIGHTS], k=size,
+        )
+
+        reviews, photos = [], []
+        for rating, source in zip(ratings, sources):
+            text, tags, score, complex_ = self.rng.choice(self.texts[rating])
+            created_at = self._random_datetime()
+
+            review = Review(
+                company=company,
+                source=source,
+                spot=self.rng.choice(spots) if spots else None,
+                rating=rating,
+                text=text,
+                author_name=self.rng.choice(AUTHORS),
+                sentiment=self._sentiment(rating),
+                sentiment_score=score,
+                tags=tags,
+                tags_complex=complex_,
+                is_public=not (source == Review.Source.INTERNAL and rating <= 3),
+                created_at=created_at,
+                platform_date=(
+                    created_at - timedelta(hours=self.rng.randint(0, 48))
+                    if source != Review.Source.INTERNAL else None
+                ),
+                wants_contact=source == Review.Source.INTERNAL and rating <= 2 and self.rng.random() < 0.3,
+            )
+
+            # Чем ниже оценка, тем чаще на отзыв отвечают
+            if self.rng.random() < (0.7 if rating <= 3 else 0.4):
+                review.response = self.rng.choice(RESPONSES)
+                review.response_at = min(created_at + timedelta(hours=self.rng.randint(1, 72)), self.now)
+                review.status = Review.Status.RESOLVED
+            reviews.append(review)
+
+            if self.rng.random() < 0.05:
+                photos.extend(
+                    ReviewPhoto(review=review, image=f'reviews/synthetic/{review.id}_{n}.jpg')
+                    for n in range(self.rng.randint(1, 3))
+                )
+        return reviews, photos
+
+    def _sentiment(self, rating: int) -> str:
+        if rating >= 4:
+            return Review.Sentiment.POSITIVE
+        if rating <= 2:
+            return Review.Sentiment.NEGATIVE
+        return Review.Sentiment.NEUTRAL
+
+    def _random_datetime(self):
+        # Свежих отзывов больше: квадрат равномерной величины смещает к «сейчас»
+        age = self.rng.random() ** 2 * self.days
+        return self.now - timedelta(days=age)
+
+    # === Вспомогательное ===
+
+    def _rebuild_derived(self, company: Company) -> None:
+        reviews = Review.objects.filter(company=company)
+        rebuild_review_matches(reviews, batch_size=self.batch_size)
+        rebuild_search_index(reviews, batch_size=self.batch_size)
+        rebuild_alert_counters(company)
+
+    def _clear(self) -> None:
+        # Только созданные командой: пользовательская компания с тем же slug не трогается
+        companies = Company.objects.filter(is_synthetic=True)
+        reviews = Review.objects.filter(company__in=companies)
+
+        with transaction.atomic():
+            # Зависимые таблицы — массово; отзывы — одним DELETE без загрузки в память
+            # (у Review есть сигналы, поэтому обычный delete() читал бы каждый отзыв)
+            for model in (ReviewPhoto, ReviewHistory, ReviewMatch, ReviewSearchDocument):
+                model.objects.filter(review__in=reviews).delete()
+            subquery, params = companies.values('pk').query.sql_with_params()
+            quote = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {quote(Review._meta.db_table)} '
+                    f'WHERE {quote(Review._meta.get_field("company").column)} IN ({subquery})',
+                    params,
+                )
+                deleted = cursor.rowcount
+            companies.delete()
+        self.stdout.write(self.style.WARNING(f'Удалено {deleted} синтетических отзывов'))
+
+    @staticmethod
+    def _split_evenly(total: int, parts: int) -> list[int]:
+        base, extra = divmod(total, parts)
+        return [base + (1 if i < extra else 0) for i in range(parts)]
+
+    @staticmethod
+    def _split_weighted(total: int, parts: int) -> list[int]:
+        """Распределение по закону Ципфа: первая компания — самая крупная."""
+        weights = [1 / (i + 1) ** 0.8 for i in range(parts)]
+        scale = total / sum(weights)
+        counts = [int(w * scale) for w in weights]
+        counts[0] += total - sum(counts)
+        return counts
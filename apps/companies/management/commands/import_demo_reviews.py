@@ -10,7 +10,10 @@ from django.utils import timezone
 import pandas as pd
 
 from apps.companies.models import Company, Spot
-from apps.reviews.models import Review
+from apps.dashboard.services.alert_engine import rebuild_alert_counters
+from apps.dashboard.services.cache import bump_data_version
+from apps.dashboard.services.snapshots import build_all_time_snapshot
+from apps.reviews.models import Review, ReviewMatch
 from apps.reviews.services import analyze_review_impressions
 
 
@@ -206,6 +209,9 @@ class Command(BaseCommand):
                 if errors <= 5:
                     self.stdout.write(self.style.WARNING(f'Ошибка в строке: {e}'))
 
+        if imported and not dry_run:
+            self._rebuild_derived(demo_company)
+
         # Итоги
         prefix = '[DRY RUN] ' if dry_run else ''
         self.stdout.write(self.style.SUCCESS(
@@ -215,6 +221,17 @@ class Command(BaseCommand):
             f'  Ошибок: {errors}'
         ))
 
+    def _rebuild_derived(self, company: Company) -> None:
+        """
+        Пересчитать счётчики алертов и снимок «за всё время».
+
+        save() учёл импортированные отзывы сегодняшним днём, а created_at
+        переносится в прошлое уже после него.
+        """
+        rebuild_alert_counters(company)
+        build_all_time_snapshot(company)
+        bump_data_version(company.id)
+
     def process_row(self, row: dict, company: Company, spots: dict, dry_run: bool) -> str:
         """Обрабатывает одну строку из файла."""
         # Получаем данные с учётом разных названий колонок
@@ -287,5 +304,6 @@ class Command(BaseCommand):
         review.save()
         # Обновляем created_at напрямую (обход auto_now_add)
         Review.objects.filter(pk=review.pk).update(created_at=created_at)
+        ReviewMatch.objects.filter(review=review).update(review_created_at=created_at)
 
         return 'imported'
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_connection_platform_rating_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='connection',
+            name='last_full_sync',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последняя полная синхронизация'),
+        ),
+        migrations.AddField(
+            model_name='connection',
+            name='sync_watermark_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Новейший отзыв: дата'),
+        ),
+        migrations.AddField(
+            model_name='connection',
+            name='sync_watermark_id',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Новейший отзыв: ID'),
+        ),
+    ]
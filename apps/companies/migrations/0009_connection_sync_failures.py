@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0008_connection_sync_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='connection',
+            name='last_sync_attempt',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последняя попытка синхронизации'),
+        ),
+        migrations.AddField(
+            model_name='connection',
+            name='sync_failures',
+            field=models.PositiveIntegerField(default=0, verbose_name='Неудачных синхронизаций подряд'),
+        ),
+    ]
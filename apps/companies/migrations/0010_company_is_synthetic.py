@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0009_connection_sync_failures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='is_synthetic',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Синтетическая'),
+        ),
+    ]
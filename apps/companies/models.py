@@ -39,6 +39,9 @@ class Company(models.Model):
         help_text='Демо-компания с примерами отзывов, доступная всем новым пользователям только для просмотра'
     )
 
+    # Создана generate_synthetic_data: только такие компании удаляет его --clear
+    is_synthetic = models.BooleanField('Синтетическая', default=False, editable=False)
+
     analysis_mode = models.CharField(
         'Режим анализа',
         max_length=10,
@@ -268,6 +271,16 @@ class Connection(models.Model):
         default=SyncStatus.PENDING
     )
     last_sync_error = models.TextField('Ошибка синхронизации', blank=True)
+    # Неудачные попытки подряд: планировщик откладывает следующую экспоненциально
+    last_sync_attempt = models.DateTimeField('Последняя попытка синхронизации', blank=True, null=True)
+    sync_failures = models.PositiveIntegerField('Неудачных синхронизаций подряд', default=0)
+
+    # Водяной знак инкрементальной синхронизации: самый новый отзыв платформы.
+    # Синхронизация листает страницы только до него; полная — раз в
+    # PLATFORM_FULL_SYNC_INTERVAL (правки и удаления старых отзывов)
+    sync_watermark_at = models.DateTimeField('Новейший отзыв: дата', blank=True, null=True)
+    sync_watermark_id = models.CharField('Новейший отзыв: ID', max_length=100, blank=True)
+    last_full_sync = models.DateTimeField('Последняя полная синхронизация', blank=True, null=True)
 
     # Platform public rating (e.g. Yandex 4.9)
     platform_rating = models.DecimalField(
@@ -1,9 +1,10 @@
 """Сервисы для работы с компаниями"""
 import re
 import logging
-import requests
 from typing import Optional
 
+from apps.integrations.http import get_interactive_http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,7 +55,7 @@ def _extract_from_yandex(url: str) -> Optional[str]:
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_interactive_http_client().get(url, headers=headers, timeout=10)
         response.raise_for_status()
         response.encoding = 'utf-8'
         html = response.text
@@ -92,7 +93,7 @@ def _extract_from_2gis(url: str) -> Optional[str]:
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_interactive_http_client().get(url, headers=headers, timeout=10)
         response.raise_for_status()
         response.encoding = 'utf-8'
         html = response.text
@@ -132,7 +133,7 @@ def _extract_from_google(url: str) -> Optional[str]:
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
+        response = get_interactive_http_client().get(url, headers=headers, timeout=10, allow_redirects=True)
         response.raise_for_status()
         response.encoding = 'utf-8'
         html = response.text
@@ -189,7 +190,7 @@ def extract_company_info_from_yandex(url: str) -> dict:
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_interactive_http_client().get(url, headers=headers, timeout=10)
         response.raise_for_status()
         response.encoding = 'utf-8'
         html = response.text
@@ -0,0 +1,137 @@
+"""
+Management command для замера скорости дашборда на больших данных.
+
+Для каждого периода измеряет контекст главной страницы, вычисление каждого
+виджета и get_analytics_data, а также несколько типовых выборок
+filter_reviews. Выводит p50/p95 времени и число SQL-запросов.
+
+    python manage.py generate_synthetic_data --reviews 1000000
+    python manage.py benchmark_dashboard --iterations 10
+
+По умолчанию виджеты считаются в обход кэша (холодный расчёт);
+--warm измеряет обращения через кэш виджетов, как во view.
+"""
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.companies.models import Company
+from apps.dashboard.services import build_dashboard_context, filter_reviews, get_analytics_data
+from apps.dashboard.services.analytics import get_dashboard_filters
+from apps.dashboard.services.widgets import WIDGETS, get_widget_cache_key, get_widget_data
+
+PERIODS = ('week', 'month', 'quarter', 'half_year', 'all')
+
+# Типовые выборки списка отзывов
+REVIEW_FILTERS = {
+    'all': {},
+    'negative': {'filter': 'negative'},
+    'no_response': {'filter': 'no_response'},
+    'search': {'search': 'официант'},
+    'category': {'category': 'Сервис'},
+}
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Замерить p50/p95 и число запросов основных расчётов дашборда'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            help='Компания (UUID или slug); по умолчанию — с наибольшим числом отзывов',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=5,
+            help='Замеров на каждый сценарий (по умолчанию 5)',
+        )
+        parser.add_argument(
+            '--period',
+            action='append',
+            choices=PERIODS,
+            help='Период (можно несколько); по умолчанию — все',
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Считать виджеты через кэш (как во view)',
+        )
+
+    def handle(self, *args, **options):
+        company = self._get_company(options.get('company'))
+        self.iterations = options['iterations']
+        self.warm = options['warm']
+        periods = options['period'] or PERIODS
+
+        self.stdout.write(f'Компания: {company.name} ({company.reviews.count()} отзывов)')
+        self.stdout.write(f'Замеров на сценарий: {self.iterations}, кэш: {"тёплый" if self.warm else "холодный"}\n')
+        self.stdout.write(f'{"Сценарий":<32} {"Период":<10} {"p50, мс":>9} {"p95, мс":>9} {"Запросов":>9}')
+
+        factory = RequestFactory()
+        for period in periods:
+            request = factory.get('/dashboard/', {'period': period})
+            filters = get_dashboard_filters(company, request.GET)
+
+            self._measure(
+                'build_dashboard_context', period,
+                lambda: build_dashboard_context(company, [company], request),
+            )
+            for name in WIDGETS:
+                self._measure(f'widget:{name}', period, self._widget_runner(company, name, filters))
+            self._measure(
+                'get_analytics_data', period,
+                lambda: get_analytics_data(company, period),
+            )
+
+        for label, params in REVIEW_FILTERS.items():
+            self._measure(
+                f'filter_reviews:{label}', '-',
+                lambda: filter_reviews(company, params).items,
+            )
+
+    def _widget_runner(self, company, name, filters):
+        if self.warm:
+            cache_key = get_widget_cache_key(company, name, filters)
+            return lambda: get_widget_data(company, name, filters, cache_key)
+        return lambda: WIDGETS[name](company, filters)
+
+    def _measure(self, label: str, period: str, run) -> None:
+        timings = []
+        queries = 0
+        for _ in range(self.iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = len(ctx)
+
+        self.stdout.write(
+            f'{label:<32} {period:<10} {percentile(timings, 50):>9.1f} '
+            f'{percentile(timings, 95):>9.1f} {queries:>9}'
+        )
+
+    def _get_company(self, value: str | None) -> Company:
+        if value:
+            lookup = {'id': value} if len(value) == 36 else {'slug': value}
+            company = Company.objects.filter(**lookup).first()
+        else:
+            company = (
+                Company.objects.annotate(total=Count('reviews'))
+                .order_by('-total').first()
+            )
+        if company is None:
+            raise CommandError('Компания не найдена')
+        return company
@@ -0,0 +1,121 @@
+"""
+Dashboard middleware.
+
+CompanyContextMiddleware кладёт в request.company_context ленивый
+CompanyContext (services/company.py): текущая компания, членства и
+подключения вычисляются один раз за запрос.
+
+QueryBudgetMiddleware — opt-in (QUERY_BUDGET_ENABLED = True): считает SQL-запросы и время БД
+для каждого запроса, отдаёт их в заголовке Server-Timing (видно во вкладке
+Network браузера) и пишет структурированный лог. Запросы сверх бюджета
+логируются как warning вместе с самыми медленными выражениями.
+"""
+import heapq
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .services.company import CompanyContext
+
+logger = logging.getLogger(__name__)
+
+
+class CompanyContextMiddleware:
+    """Attach a lazy per-request CompanyContext (after AuthenticationMiddleware)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.company_context = CompanyContext(request)
+        return self.get_response(request)
+
+
+class QueryRecorder:
+    """execute_wrapper: число запросов, суммарное время и N самых медленных."""
+
+    def __init__(self, keep_slowest: int = 3):
+        self.count = 0
+        self.duration = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest = []  # min-heap из (duration, порядковый номер, sql)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            item = (duration, self.count, sql)
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, item)
+            else:
+                heapq.heappushpop(self._slowest, item)
+
+    @property
+    def slowest(self) -> list[dict]:
+        """Самые медленные выражения, от медленного к быстрому."""
+        return [
+            {'ms': round(duration * 1000, 2), 'sql': sql}
+            for duration, _, sql in sorted(self._slowest, reverse=True)
+        ]
+
+
+class QueryBudgetMiddleware:
+    """
+    Per-request SQL statistics.
+
+    Settings (in settings.py):
+        QUERY_BUDGET_ENABLED = False  # включить middleware
+        QUERY_BUDGET = 30             # больше запросов — warning в лог
+        QUERY_BUDGET_SLOWEST = 3      # сколько медленных выражений логировать
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.budget = getattr(settings, 'QUERY_BUDGET', 30)
+        self.keep_slowest = getattr(settings, 'QUERY_BUDGET_SLOWEST', 3)
+
+    def __call__(self, request):
+        recorder = QueryRecorder(self.keep_slowest)
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        # Для потоковых ответов учитываются только запросы самой view
+        total = time.perf_counter() - start
+        db_ms = recorder.duration * 1000
+        response.headers['Server-Timing'] = ', '.join(filter(None, [
+            response.headers.get('Server-Timing'),
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries"',
+            f'app;dur={(total - recorder.duration) * 1000:.1f}',
+        ]))
+
+        over_budget = recorder.count > self.budget
+        logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            '%s %s: %d queries, %.1f ms db, %.1f ms total',
+            request.method, request.path, recorder.count, db_ms, total * 1000,
+            extra={
+                'path': request.path,
+                'method': request.method,
+                'status': response.status_code,
+                'queries': recorder.count,
+                'db_ms': round(db_ms, 2),
+                'total_ms': round(total * 1000, 2),
+                'over_budget': over_budget,
+                'slowest': recorder.slowest,
+            },
+        )
+        return response
@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0007_connection_platform_rating_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyAlertSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('problems', models.JSONField(blank=True, default=list, verbose_name='Проблемы')),
+                ('computed_at', models.DateTimeField(verbose_name='Рассчитан')),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='alert_snapshot', to='companies.company', verbose_name='Компания')),
+            ],
+            options={
+                'verbose_name': 'Снимок алертов',
+                'verbose_name_plural': 'Снимки алертов',
+            },
+        ),
+        migrations.CreateModel(
+            name='AlertDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('problem_key', models.CharField(max_length=50, verbose_name='Проблема')),
+                ('day', models.DateField(verbose_name='День')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('last_at', models.DateTimeField(verbose_name='Последний отзыв')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_daily_counts', to='companies.company', verbose_name='Компания')),
+                ('spot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='companies.spot', verbose_name='Точка')),
+            ],
+            options={
+                'verbose_name': 'Дневной счётчик проблемы',
+                'verbose_name_plural': 'Дневные счётчики проблем',
+                'indexes': [models.Index(fields=['company', 'day'], name='dashboard_a_company_253e4b_idx'), models.Index(fields=['company', 'problem_key', 'spot', 'day'], name='dashboard_a_company_3d57f7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 21:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyalertsnapshot',
+            name='anomalies',
+            field=models.JSONField(blank=True, default=list, verbose_name='Аномалии'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 22:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_connection_platform_rating_and_more'),
+        ('dashboard', '0002_alert_snapshot_anomalies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyAllTimeSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(blank=True, default=dict, verbose_name='Итоги')),
+                ('built_through', models.DateTimeField(verbose_name='Учтены отзывы до')),
+                ('is_stale', models.BooleanField(default=False, verbose_name='Устарел')),
+                ('computed_at', models.DateTimeField(verbose_name='Рассчитан')),
+                ('build_ms', models.PositiveIntegerField(default=0, verbose_name='Время расчёта, мс')),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='all_time_snapshot', to='companies.company', verbose_name='Компания')),
+            ],
+            options={
+                'verbose_name': 'Снимок за всё время',
+                'verbose_name_plural': 'Снимки за всё время',
+            },
+        ),
+    ]
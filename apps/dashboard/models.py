@@ -0,0 +1,101 @@
+from django.db import models
+
+
+class AlertDailyCount(models.Model):
+    """
+    Дневной счётчик проблемы по точке.
+
+    Поддерживается инкрементально при записи отзывов и перестраивается
+    ночной задачей из ReviewMatch (см. services/alert_engine.py).
+    """
+
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='alert_daily_counts',
+        verbose_name='Компания'
+    )
+    problem_key = models.CharField('Проблема', max_length=50)
+    spot = models.ForeignKey(
+        'companies.Spot',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Точка',
+        blank=True,
+        null=True
+    )
+    day = models.DateField('День')
+    count = models.PositiveIntegerField('Количество', default=0)
+    last_at = models.DateTimeField('Последний отзыв')
+
+    class Meta:
+        verbose_name = 'Дневной счётчик проблемы'
+        verbose_name_plural = 'Дневные счётчики проблем'
+        indexes = [
+            models.Index(fields=['company', 'day']),
+            models.Index(fields=['company', 'problem_key', 'spot', 'day']),
+        ]
+
+    def __str__(self):
+        return f'{self.problem_key} {self.day}: {self.count}'
+
+
+class CompanyAlertSnapshot(models.Model):
+    """
+    Готовые итоги окон алертов компании.
+
+    problems: [{'key': 'poisoning', 'count': 2, 'prev_count': 1,
+                'spots': [{'name': 'Терраса', 'count': 2, 'last_date': '...'}]}, ...]
+    anomalies: [{'spot_id': '...', 'spot_name': 'Терраса', 'metric': 'negative',
+                 'day': '2026-10-18', 'value': 6, 'baseline': 0.4, 'z': 5.1}, ...]
+                (services/anomalies.py)
+    """
+
+    company = models.OneToOneField(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='alert_snapshot',
+        verbose_name='Компания'
+    )
+    problems = models.JSONField('Проблемы', default=list, blank=True)
+    anomalies = models.JSONField('Аномалии', default=list, blank=True)
+    computed_at = models.DateTimeField('Рассчитан')
+
+    class Meta:
+        verbose_name = 'Снимок алертов'
+        verbose_name_plural = 'Снимки алертов'
+
+    def __str__(self):
+        return f'Алерты {self.company_id} @ {self.computed_at}'
+
+
+class CompanyAllTimeSnapshot(models.Model):
+    """
+    Итоги компании «за всё время» по отзывам до built_through.
+
+    Строится ночной задачей; отзывы после built_through досчитываются при
+    чтении (services/snapshots.py). data — складываемые суммы:
+    {'mode', 'total', 'rating_sum', 'negative', 'positive', 'tagged', 'complex',
+     'spots': {spot_id: [total, rating_sum, negative]},
+     'heatmap': {'counts', 'negative', 'rating_sum'},
+     'complaints': {label: count}, 'praises': {label: count}}
+    """
+
+    company = models.OneToOneField(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='all_time_snapshot',
+        verbose_name='Компания'
+    )
+    data = models.JSONField('Итоги', default=dict, blank=True)
+    built_through = models.DateTimeField('Учтены отзывы до')
+    is_stale = models.BooleanField('Устарел', default=False)
+    computed_at = models.DateTimeField('Рассчитан')
+    build_ms = models.PositiveIntegerField('Время расчёта, мс', default=0)
+
+    class Meta:
+        verbose_name = 'Снимок за всё время'
+        verbose_name_plural = 'Снимки за всё время'
+
+    def __str__(self):
+        return f'Всё время {self.company_id} до {self.built_through}'
@@ -6,6 +6,8 @@ from .company import (
     get_user_companies,
     get_current_company,
     get_user_membership,
+    get_company_context,
+    get_company_connections,
     get_platforms_with_connections,
     update_company_info,
     update_platform_connections,
@@ -17,12 +19,13 @@ from .reviews import (
     get_dashboard_stats,
     get_attention_reviews,
     get_recent_reviews,
-    get_review_counts,
     filter_reviews,
     update_feedback_settings,
     build_form_settings_platform_data,
 )
 
+from .counters import get_review_counts
+
 from .qr import generate_qr_image
 
 from .periods import (
@@ -58,11 +61,15 @@ from .metrics import (
     get_simple_metrics,
 )
 
+from .chain import get_chain_overview
+
 __all__ = [
     # Company
     'get_user_companies',
     'get_current_company',
     'get_user_membership',
+    'get_company_context',
+    'get_company_connections',
     'get_platforms_with_connections',
     'update_company_info',
     'update_platform_connections',
@@ -95,4 +102,6 @@ __all__ = [
     'get_simple_metrics',
     'get_priority_alerts',
     'has_critical_alerts',
+    # Chain
+    'get_chain_overview',
 ]
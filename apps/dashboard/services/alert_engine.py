@@ -0,0 +1,250 @@
+"""
+Alerts engine: скользящие окна алертов на дневных счётчиках.
+
+Дневные счётчики (AlertDailyCount) по компании/проблеме/точке обновляются
+инкрементально при записи отзыва и перестраиваются из ReviewMatch ночной
+задачей. Итоги текущего и предыдущего окна каждой проблемы хранятся в
+CompanyAlertSnapshot, поэтому get_priority_alerts читает O(problems) данных.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from apps.companies.models import Company
+from apps.reviews.models import ReviewMatch
+
+from ..models import AlertDailyCount, CompanyAlertSnapshot
+from .alerts import LEVEL_WINDOWS, PROBLEM_PATTERNS
+
+# Сколько дней истории нужно для текущего + предыдущего окна
+HISTORY_DAYS = max(LEVEL_WINDOWS.values()) * 2 + 1
+
+
+# === Дневные счётчики ===
+
+def rebuild_daily_counts(company: Company) -> int:
+    """
+    Перестроить дневные счётчики компании из ReviewMatch.
+
+    Returns:
+        Количество созданных строк счётчиков.
+    """
+    since = timezone.now() - timedelta(days=HISTORY_DAYS + 1)
+    rows = (
+        ReviewMatch.objects
+        .filter(
+            company=company,
+            kind=ReviewMatch.Kind.PROBLEM,
+            review_created_at__gte=since,
+        )
+        .annotate(day=TruncDate('review_created_at'))
+        .values('key', 'spot_id', 'day')
+        .annotate(count=Count('id'), last_at=Max('review_created_at'))
+    )
+    counts = [
+        AlertDailyCount(
+            company=company,
+            problem_key=row['key'],
+            spot_id=row['spot_id'],
+            day=row['day'],
+            count=row['count'],
+            last_at=row['last_at'],
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        AlertDailyCount.objects.filter(company=company).delete()
+        AlertDailyCount.objects.bulk_create(counts)
+
+    return len(counts)
+
+
+def apply_problem_matches(
+    company_id,
+    old_matches: list[ReviewMatch],
+    new_matches: list[ReviewMatch],
+) -> bool:
+    """
+    Применить изменение совпадений одного отзыва к дневным счётчикам.
+
+    Сравнивает старые и новые совпадения-проблемы по (ключ, точка, день):
+    ушедшие декрементируются, новые инкрементируются.
+
+    Returns:
+        True если счётчики изменились.
+    """
+    old = {_count_key(m): m for m in old_matches if m.kind == ReviewMatch.Kind.PROBLEM}
+    new = {_count_key(m): m for m in new_matches if m.kind == ReviewMatch.Kind.PROBLEM}
+
+    removed = [old[k] for k in old.keys() - new.keys()]
+    added = [new[k] for k in new.keys() - old.keys()]
+    if not removed and not added:
+        return False
+
+    with transaction.atomic():
+        for match in removed:
+            _bump(company_id, match, -1)
+        for match in added:
+            _bump(company_id, match, 1)
+        AlertDailyCount.objects.filter(company_id=company_id, count__lte=0).delete()
+
+    return True
+
+
+def _count_key(match: ReviewMatch) -> tuple:
+    """Ключ строки счётчика для совпадения."""
+    return match.key, match.spot_id, timezone.localdate(match.review_created_at)
+
+
+def _bump(company_id, match: ReviewMatch, delta: int) -> None:
+    """Изменить счётчик строки (ключ, точка, день) на delta."""
+    day = timezone.localdate(match.review_created_at)
+    counts = AlertDailyCount.objects.filter(
+        company_id=company_id,
+        problem_key=match.key,
+        spot_id=match.spot_id,
+        day=day,
+    )
+
+    if delta < 0:
+        # Не ниже нуля: счётчик мог разойтись с отзывами (удаление неучтённого совпадения)
+        counts.update(count=Greatest(F('count') + delta, 0))
+        return
+
+    updated = counts.update(
+        count=F('count') + delta,
+        last_at=Greatest('last_at', match.review_created_at),
+    )
+    if not updated:
+        AlertDailyCount.objects.create(
+            company_id=company_id,
+            problem_key=match.key,
+            spot_id=match.spot_id,
+            day=day,
+            count=delta,
+            last_at=match.review_created_at,
+        )
+
+
+def prune_daily_counts() -> int:
+    """Удалить счётчики старше двойного максимального окна."""
+    cutoff = timezone.localdate() - timedelta(days=HISTORY_DAYS)
+    deleted, _ = AlertDailyCount.objects.filter(day__lt=cutoff).delete()
+    return deleted
+
+
+# === Снимок окон ===
+
+def refresh_alert_snapshot(company: Company) -> CompanyAlertSnapshot:
+    """
+    Пересчитать итоги окон из дневных счётчиков и сохранить снимок.
+
+    Текущее окно уровня — дни не старше window (сегодня − window .. сегодня),
+    предыдущее — window дней перед ним.
+    """
+    today = timezone.localdate()
+    current_q, previous_q = _day_window_filters(today)
+    counts = AlertDailyCount.objects.filter(company=company)
+
+    totals = counts.values('problem_key').annotate(
+        total=Sum('count', filter=current_q, default=0),
+        prev_total=Sum('count', filter=previous_q, default=0),
+    )
+
+    spots_by_key = {}
+    spot_rows = counts.filter(current_q).values('problem_key', 'spot__name').annotate(
+        total=Sum('count'),
+        last_date=Max('last_at'),
+    )
+    for row in spot_rows:
+        spots_by_key.setdefault(row['problem_key'], []).append({
+            'name': row['spot__name'] or 'Без точки',
+            'count': row['total'],
+            'last_date': row['last_date'].isoformat(),
+        })
+
+    problems = [
+        {
+            'key': row['problem_key'],
+            'count': row['total'],
+            'prev_count': row['prev_total'],
+            'spots': spots_by_key.get(row['problem_key'], []),
+        }
+        for row in totals
+        if row['total'] or row['prev_total']
+    ]
+
+    snapshot, _ = CompanyAlertSnapshot.objects.update_or_create(
+        company=company,
+        defaults={'problems': problems, 'computed_at': timezone.now()},
+    )
+    return snapshot
+
+
+def refresh_alert_snapshot_on_commit(company_id) -> None:
+    """
+    Обновить снимок после коммита транзакции.
+
+    Используется при удалении отзывов: удаление может быть частью каскада
+    удаления самой компании, тогда снимок обновлять уже не нужно.
+    """
+    def refresh():
+        company = Company.objects.filter(pk=company_id).first()
+        if company:
+            refresh_alert_snapshot(company)
+
+    transaction.on_commit(refresh)
+
+
+def _day_window_filters(today) -> tuple[Q, Q]:
+    """Условия текущего и предыдущего окна по дням для каждого уровня."""
+    current_q = Q()
+    previous_q = Q()
+    for level, window in LEVEL_WINDOWS.items():
+        keys = [p['key'] for p in PROBLEM_PATTERNS if p['level'] == level]
+        current_start = today - timedelta(days=window)
+        previous_start = current_start - timedelta(days=window)
+        current_q |= Q(problem_key__in=keys, day__gte=current_start)
+        previous_q |= Q(
+            problem_key__in=keys,
+            day__gte=previous_start,
+            day__lt=current_start,
+        )
+    return current_q, previous_q
+
+
+def get_alert_snapshot(company: Company) -> CompanyAlertSnapshot:
+    """
+    Получить снимок алертов компании.
+
+    Читается запросом, а не через company.alert_snapshot: кэш обратной связи
+    на объекте компании устаревает после refresh_alert_snapshot.
+    Если снимка ещё нет (первый деплой) — строит счётчики и снимок синхронно.
+    """
+    snapshot = CompanyAlertSnapshot.objects.filter(company=company).first()
+    if snapshot is None:
+        rebuild_daily_counts(company)
+        snapshot = refresh_alert_snapshot(company)
+    return snapshot
+
+
+def get_alert_snapshots(companies: list[Company]) -> dict:
+    """Снимки нескольких компаний одним запросом: {company_id: snapshot}."""
+    snapshots = {
+        snapshot.company_id: snapshot
+        for snapshot in CompanyAlertSnapshot.objects.filter(company__in=companies)
+    }
+    for company in companies:
+        if company.id not in snapshots:
+            snapshots[company.id] = get_alert_snapshot(company)
+    return snapshots
+
+
+def rebuild_alert_counters(company: Company) -> CompanyAlertSnapshot:
+    """Полностью перестроить счётчики и снимок компании."""
+    rebuild_daily_counts(company)
+    return refresh_alert_snapshot(company)
@@ -1,12 +1,9 @@
 """
 Dashboard alerts: приоритетные проблемы и требующие внимания.
 """
-from datetime import timedelta
-
-from django.utils import timezone
+from datetime import datetime
 
 from apps.companies.models import Company
-from apps.reviews.models import Review
 
 
 # === Иерархия проблем по уровням критичности ===
@@ -130,76 +127,39 @@ def get_priority_alerts(company: Company, limit: int = 3) -> list[dict]:
     - important: 30 дней (операционные)
 
     Тренд: сравнение текущего окна с предыдущим аналогичным периодом.
+    Итоги окон читаются из снимка CompanyAlertSnapshot (services/alert_engine.py),
+    который обновляется при записи отзыва и периодической задачей.
     """
-    now = timezone.now()
-    max_window = max(LEVEL_WINDOWS.values())
-
-    # Загружаем отзывы за двойное макс. окно (текущий + предыдущий период для тренда)
-    cutoff = now - timedelta(days=max_window * 2)
-    all_reviews = Review.objects.filter(
-        company=company,
-        created_at__gte=cutoff,
-    ).select_related('spot').order_by('-created_at')
-
-    # Собираем статистику: текущее окно + предыдущее (для тренда)
-    problem_stats = {}
-
-    for review in all_reviews:
-        text_lower = (review.text or '').lower()
-        review_age = (now - review.created_at).days
-
-        for problem in PROBLEM_PATTERNS:
-            key = problem['key']
-            level = problem['level']
-            window = LEVEL_WINDOWS[level]
-
-            # Отзыв за пределами двойного окна этого уровня — пропускаем
-            if review_age > window * 2:
-                continue
-
-            # Проверяем паттерны
-            if not any(p in text_lower for p in problem['patterns']):
-                continue
-
-            in_current = review_age <= window
-            in_previous = window < review_age <= window * 2
-
-            if key not in problem_stats:
-                problem_stats[key] = {
-                    'key': key,
-                    'label': problem['label'],
-                    'level': level,
-                    'window_days': window,
-                    'window_label': LEVEL_WINDOW_LABELS[level],
-                    'count': 0,
-                    'prev_count': 0,
-                    'spots_data': {},
-                }
-
-            if in_current:
-                problem_stats[key]['count'] += 1
-
-                # Точки — только для текущего периода
-                spot_name = review.spot.name if review.spot else 'Без точки'
-                if spot_name not in problem_stats[key]['spots_data']:
-                    problem_stats[key]['spots_data'][spot_name] = {
-                        'name': spot_name,
-                        'count': 0,
-                        'last_date': review.created_at,
-                    }
-                problem_stats[key]['spots_data'][spot_name]['count'] += 1
-
-            elif in_previous:
-                problem_stats[key]['prev_count'] += 1
+    from .alert_engine import get_alert_snapshot
+
+    return build_priority_alerts(get_alert_snapshot(company).problems, limit)
+
+
+def build_priority_alerts(snapshot_problems: list[dict], limit: int = 3) -> list[dict]:
+    """Алерты из итогов окон снимка (CompanyAlertSnapshot.problems)."""
+    problems = {p['key']: p for p in PROBLEM_PATTERNS}
+    snapshot_spots = {row['key']: row['spots'] for row in snapshot_problems}
 
     # Фильтруем по порогу, вычисляем тренд
     alerts = []
-    for stats in problem_stats.values():
-        if stats['count'] < LEVEL_THRESHOLDS[stats['level']]:
+    for row in snapshot_problems:
+        problem = problems.get(row['key'])
+        if not problem:
+            continue
+        level = problem['level']
+        if row['count'] < LEVEL_THRESHOLDS[level]:
             continue
 
-        stats['trend'] = _calc_trend(stats['count'], stats['prev_count'])
-        alerts.append(stats)
+        alerts.append({
+            'key': row['key'],
+            'label': problem['label'],
+            'level': level,
+            'window_days': LEVEL_WINDOWS[level],
+            'window_label': LEVEL_WINDOW_LABELS[level],
+            'count': row['count'],
+            'prev_count': row['prev_count'],
+            'trend': _calc_trend(row['count'], row['prev_count']),
+        })
 
     # Сортируем по приоритету уровня, затем по количеству
     alerts.sort(key=lambda x: (LEVEL_PRIORITY[x['level']], -x['count']))
@@ -220,11 +180,13 @@ def get_priority_alerts(company: Company, limit: int = 3) -> list[dict]:
         r, g, b = colors.get('bg_rgb', (200, 200, 200))
         alert['color_bg'] = f'rgba({r}, {g}, {b}, {intensity:.2f})'
 
-        # Преобразуем spots_data в отсортированный список (свежие сверху)
-        spots_list = list(alert['spots_data'].values())
+        # Список точек (свежие сверху)
+        spots_list = [
+            {**spot, 'last_date': datetime.fromisoformat(spot['last_date'])}
+            for spot in snapshot_spots.get(alert['key'], [])
+        ]
         spots_list.sort(key=lambda x: x['last_date'], reverse=True)
         alert['spots'] = spots_list
-        del alert['spots_data']
 
         result.append(alert)
 
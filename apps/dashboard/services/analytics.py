@@ -1,7 +1,6 @@
 """
 Analytics and KPI business logic.
 """
-import json
 from datetime import timedelta
 from typing import Any
 
@@ -14,20 +13,6 @@ from apps.reviews.models import Review
 
 from .periods import get_period_labels, get_period_dates, get_days_count
 from .charts import build_chart_data, get_daily_reviews
-from .alerts import (
-    get_priority_alerts,
-    has_critical_alerts,
-)
-from .insights import (
-    get_top_complaints,
-    get_top_praises,
-    get_top_complaints_ai,
-    get_top_praises_ai,
-)
-from .metrics import (
-    get_spots_comparison,
-    get_simple_metrics,
-)
 
 
 TREND_TOOLTIPS = {
@@ -228,24 +213,12 @@ def _calc_deltas(current: dict, prev: dict) -> dict:
 
 # === Dashboard Context Builder ===
 
-def build_dashboard_context(
-    company: Company,
-    companies: list[Company],
-    request: HttpRequest
-) -> dict:
-    """Build complete context for dashboard view."""
-    period = request.GET.get('period', 'all')
+def get_dashboard_filters(company: Company, params: dict) -> dict:
+    """Разобрать фильтры дашборда (период, даты, точки) из GET-параметров."""
+    period = params.get('period', 'all')
     if period not in ('all', 'week', 'month', 'quarter', 'half_year', 'custom'):
         period = 'all'
 
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-
-    # Получаем даты периода
-    start_date, prev_start, prev_end, end_date = get_period_dates(
-        period, date_from, date_to
-    )
-
     # Фильтр по точкам
     available_spots = list(
         Spot.objects.filter(company=company, is_active=True)
@@ -253,84 +226,35 @@ def build_dashboard_context(
         .order_by('name')
     )
     available_spot_ids = {s[0] for s in available_spots}
-    spots_param = request.GET.get('spots', '')
-    selected_spot_ids = _parse_spot_ids(spots_param, available_spot_ids)
-
-    # Фильтруем отзывы по периоду
-    reviews = _filter_reviews_by_period(company, start_date, end_date)
-    prev_reviews = _get_previous_reviews(company, prev_start, prev_end, start_date)
-
-    # Фильтруем по точкам если выбраны
-    if selected_spot_ids:
-        reviews = reviews.filter(spot_id__in=selected_spot_ids)
-        prev_reviews = prev_reviews.filter(spot_id__in=selected_spot_ids)
-
-    # === НОВЫЕ БЛОКИ ===
-
-    # 1. Приоритетные проблемы (всегда актуальное, не зависит от периода)
-    priority_alerts = get_priority_alerts(company, limit=3)
-
-    # 2. Простые метрики с трендами
-    metrics = get_simple_metrics(reviews, prev_reviews)
-
-    # 3. Топ жалоб и похвал (за период)
-    mode = company.analysis_mode
-    if mode == 'ai':
-        complaints = get_top_complaints_ai(reviews, limit=5)
-        praises = get_top_praises_ai(reviews, limit=5)
-    else:
-        complaints = get_top_complaints(reviews, limit=5)
-        praises = get_top_praises(reviews, limit=5)
+    spots_param = params.get('spots', '')
 
-    # Счётчики для сложных отзывов
-    total_with_tags = reviews.exclude(tags=[]).count()
-    complex_count = reviews.filter(tags_complex=True).count()
-    analyzed_count = total_with_tags - complex_count
-
-    # 4. Сравнение по точкам (за период)
-    spots = get_spots_comparison(company, start_date, end_date, mode=mode)
+    return {
+        'period': period,
+        'date_from': params.get('date_from', ''),
+        'date_to': params.get('date_to', ''),
+        'available_spots': available_spots,
+        'selected_spot_ids': _parse_spot_ids(spots_param, available_spot_ids),
+        'spots_param': spots_param,
+    }
 
-    # === СТАРЫЕ ДАННЫЕ (для графика) ===
-    days_count = get_days_count(period, date_from, date_to)
-    daily_data = get_daily_reviews(
-        company, days_count, period, date_from, date_to,
-        spot_ids=selected_spot_ids or None,
-    )
 
-    trend_tooltip = TREND_TOOLTIPS.get(period, '')
+def build_dashboard_context(
+    company: Company,
+    companies: list[Company],
+    request: HttpRequest
+) -> dict:
+    """
+    Build context for the dashboard shell.
 
-    # Platform rating (Yandex)
-    yandex_conn = company.connections.filter(platform_id='yandex').first()
-    yandex_rating = yandex_conn.platform_rating if yandex_conn else None
-    yandex_review_count = yandex_conn.platform_review_count if yandex_conn else None
+    Блоки (алерты, метрики, жалобы/похвалы, точки, график) загружаются
+    отдельными запросами к виджетам — см. services/widgets.py.
+    """
+    filters = get_dashboard_filters(company, request.GET)
 
     return {
         'company': company,
         'companies': companies,
-        'period': period,
-        'date_from': date_from,
-        'date_to': date_to,
+        **filters,
         'period_labels': get_period_labels(),
-        'trend_tooltip': trend_tooltip,
-        # Фильтр по точкам
-        'available_spots': available_spots,
-        'selected_spot_ids': selected_spot_ids,
-        'spots_param': spots_param,
-        # Новые блоки
-        'priority_alerts': priority_alerts,
-        'has_critical': has_critical_alerts(priority_alerts),
-        'metrics': metrics,
-        'complaints': complaints,
-        'praises': praises,
-        'spots': spots,
-        'analysis_mode': company.analysis_mode,
-        'analyzed_count': analyzed_count,
-        'complex_count': complex_count,
-        'total_with_tags': total_with_tags,
-        # Данные для графика
-        'daily_data': daily_data,
-        'daily_data_json': json.dumps(daily_data, ensure_ascii=False),
-        # Рейтинг платформы
-        'yandex_rating': yandex_rating,
-        'yandex_review_count': yandex_review_count,
+        'widgets_query': request.GET.urlencode(),
     }
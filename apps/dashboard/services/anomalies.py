@@ -0,0 +1,245 @@
+"""
+Аномалии в дневных рядах точек: всплески негатива, объёма и падение рейтинга.
+
+Для каждой точки строятся дневные ряды (число отзывов, негативных, средняя
+оценка) за ANOMALY_HISTORY_DAYS. Базовая линия — экспоненциально взвешенные
+среднее и дисперсия (EWMA) всех предыдущих дней, отклонение последних дней
+от неё — z-оценка. Ряды всех точек компании считаются одной матрицей
+NumPy (точки × дни), без цикла по строкам в Python.
+
+Находки сохраняются в CompanyAlertSnapshot.anomalies периодической задачей
+(apps/dashboard/tasks.py) и показываются в блоке «Требует внимания».
+"""
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.companies.models import Company
+from apps.reviews.models import Review
+
+from ..models import CompanyAlertSnapshot
+from .alert_engine import get_alert_snapshot
+from .cache import bump_data_version
+
+# Глубина рядов и вес EWMA (alpha=0.1 — эффективное окно ~19 дней)
+ANOMALY_HISTORY_DAYS = 56
+EWMA_ALPHA = 0.1
+
+# Проверяются последние дни: сегодня и вчера (вчерашний всплеск не пропадает в полночь)
+RECENT_DAYS = 2
+
+# Порог отклонения от базовой линии в стандартных отклонениях
+Z_THRESHOLD = 3.0
+
+# Минимальные значения дня, чтобы единичные отзывы не считались всплеском
+MIN_NEGATIVE = 3
+MIN_VOLUME = 5
+MIN_DAY_REVIEWS = 3
+
+# Точка должна иметь историю: первый отзыв не позже стольких дней до проверяемого
+MIN_HISTORY_DAYS = 14
+# Для рейтинга — минимум дней с отзывами в истории
+MIN_RATED_DAYS = 7
+
+# Нижняя граница стандартного отклонения оценки (в баллах)
+RATING_MIN_STD = 0.5
+
+METRIC_LABELS = {
+    'negative': 'Всплеск негатива',
+    'rating': 'Падение рейтинга',
+    'volume': 'Всплеск отзывов',
+}
+METRIC_ORDER = {'negative': 1, 'rating': 2, 'volume': 3}
+ANOMALY_COLOR = '#f97316'
+
+
+def ewma_baseline(history: np.ndarray, mask: np.ndarray | None = None) -> tuple:
+    """
+    EWMA-среднее и дисперсия по строкам матрицы (точки × дни).
+
+    Последний столбец — самый свежий день и получает наибольший вес.
+    mask исключает дни без данных (для средней оценки).
+
+    Returns:
+        (mean, var, weight) — массивы длины числа точек; weight — сумма весов
+        учтённых дней (0 — у точки нет истории).
+    """
+    days = history.shape[1]
+    weights = np.broadcast_to((1 - EWMA_ALPHA) ** np.arange(days)[::-1], history.shape)
+    if mask is not None:
+        weights = weights * mask
+
+    weight = weights.sum(axis=1)
+    safe = np.where(weight > 0, weight, 1.0)
+    mean = (weights * history).sum(axis=1) / safe
+    var = (weights * (history - mean[:, None]) ** 2).sum(axis=1) / safe
+    return mean, var, weight
+
+
+def count_zscores(values: np.ndarray, history: np.ndarray) -> tuple:
+    """
+    z-оценки дневных счётчиков относительно EWMA истории.
+
+    Дисперсия ограничена снизу средним (как у пуассоновского ряда) и 0.25,
+    чтобы у редких событий единичный отзыв не давал огромный z.
+    """
+    mean, var, _ = ewma_baseline(history)
+    std = np.sqrt(np.maximum(np.maximum(var, mean), 0.25))
+    return (values - mean) / std, mean
+
+
+def rating_zscores(ratings: np.ndarray, history: np.ndarray, mask: np.ndarray) -> tuple:
+    """z-оценки средней оценки дня по дням с отзывами."""
+    mean, var, _ = ewma_baseline(history, mask)
+    std = np.sqrt(np.maximum(var, RATING_MIN_STD ** 2))
+    return (ratings - mean) / std, mean
+
+
+def find_anomalies(
+    spots: list[tuple[str, str]],
+    start_day: date,
+    volume: np.ndarray,
+    negative: np.ndarray,
+    rating_sum: np.ndarray,
+) -> list[dict]:
+    """
+    Аномалии последних RECENT_DAYS дней по матрицам рядов.
+
+    Args:
+        spots: [(spot_id, name)] — строки матриц
+        start_day: дата первого столбца
+        volume, negative, rating_sum: матрицы точки × дни
+
+    Returns:
+        [{'spot_id', 'spot_name', 'metric', 'day', 'value', 'baseline', 'z'}]
+        — по одной находке на точку и метрику (самый свежий день).
+    """
+    days = volume.shape[1]
+    has_reviews = volume > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratings = np.where(has_reviews, rating_sum / np.where(has_reviews, volume, 1), 0.0)
+    first_day = np.where(has_reviews.any(axis=1), has_reviews.argmax(axis=1), days)
+
+    found = {}
+    # Старый день первым: находка за более свежий день перезаписывает его
+    for t in range(max(days - RECENT_DAYS, 1), days):
+        established = first_day <= t - MIN_HISTORY_DAYS
+
+        negative_z, negative_mean = count_zscores(negative[:, t], negative[:, :t])
+        volume_z, volume_mean = count_zscores(volume[:, t], volume[:, :t])
+        rating_z, rating_mean = rating_zscores(ratings[:, t], ratings[:, :t], has_reviews[:, :t])
+        rated_days = has_reviews[:, :t].sum(axis=1)
+
+        checks = {
+            'negative': (
+                established & (negative_z >= Z_THRESHOLD) & (negative[:, t] >= MIN_NEGATIVE),
+                negative[:, t], negative_mean, negative_z,
+            ),
+            'volume': (
+                established & (volume_z >= Z_THRESHOLD) & (volume[:, t] >= MIN_VOLUME),
+                volume[:, t], volume_mean, volume_z,
+            ),
+            'rating': (
+                established & (rating_z <= -Z_THRESHOLD)
+                & (volume[:, t] >= MIN_DAY_REVIEWS) & (rated_days >= MIN_RATED_DAYS),
+                ratings[:, t], rating_mean, rating_z,
+            ),
+        }
+        day = (start_day + timedelta(days=t)).isoformat()
+        for metric, (flags, values, baseline, z) in checks.items():
+            for row in np.flatnonzero(flags):
+                spot_id, spot_name = spots[row]
+                found[(spot_id, metric)] = {
+                    'spot_id': spot_id,
+                    'spot_name': spot_name,
+                    'metric': metric,
+                    'day': day,
+                    'value': round(float(values[row]), 1),
+                    'baseline': round(float(baseline[row]), 1),
+                    'z': round(float(z[row]), 1),
+                }
+
+    return sorted(found.values(), key=lambda a: (METRIC_ORDER[a['metric']], -abs(a['z'])))
+
+
+def build_spot_series(company: Company, today: date | None = None) -> tuple:
+    """
+    Дневные ряды точек компании одним сгруппированным запросом.
+
+    Returns:
+        (spots, start_day, volume, negative, rating_sum)
+    """
+    today = today or timezone.localdate()
+    start_day = today - timedelta(days=ANOMALY_HISTORY_DAYS - 1)
+    since = timezone.make_aware(datetime.combine(start_day, time.min))
+    rows = list(
+        Review.objects
+        .filter(company=company, spot__isnull=False, created_at__gte=since)
+        .annotate(day=TruncDate('created_at'))
+        .values('spot_id', 'spot__name', 'day')
+        .annotate(
+            total=Count('id'),
+            negative=Count('id', filter=Q(rating__lte=3)),
+            rating_sum=Sum('rating'),
+        )
+        .order_by()
+    )
+
+    spot_index = {}
+    for row in rows:
+        spot_index.setdefault(row['spot_id'], (str(row['spot_id']), row['spot__name']))
+    rows_of = {spot_id: i for i, spot_id in enumerate(spot_index)}
+
+    shape = (len(spot_index), ANOMALY_HISTORY_DAYS)
+    volume = np.zeros(shape)
+    negative = np.zeros(shape)
+    rating_sum = np.zeros(shape)
+    for row in rows:
+        column = (row['day'] - start_day).days
+        if not 0 <= column < ANOMALY_HISTORY_DAYS:
+            continue
+        i = rows_of[row['spot_id']]
+        volume[i, column] = row['total']
+        negative[i, column] = row['negative']
+        rating_sum[i, column] = row['rating_sum']
+
+    return list(spot_index.values()), start_day, volume, negative, rating_sum
+
+
+def detect_anomalies(company: Company) -> list[dict]:
+    """Найти аномалии в рядах точек компании."""
+    spots, start_day, volume, negative, rating_sum = build_spot_series(company)
+    if not spots:
+        return []
+    return find_anomalies(spots, start_day, volume, negative, rating_sum)
+
+
+def refresh_anomalies(company: Company) -> list[dict]:
+    """
+    Пересчитать аномалии и сохранить в снимок алертов компании.
+
+    Кэш дашборда инвалидируется только если список находок изменился.
+    """
+    anomalies = detect_anomalies(company)
+    snapshot = get_alert_snapshot(company)
+    if snapshot.anomalies != anomalies:
+        CompanyAlertSnapshot.objects.filter(pk=snapshot.pk).update(anomalies=anomalies)
+        bump_data_version(company.id)
+    return anomalies
+
+
+def build_anomaly_alerts(snapshot_anomalies: list[dict], limit: int = 3) -> list[dict]:
+    """Карточки аномалий для блока «Требует внимания» (только свежие)."""
+    since = (timezone.localdate() - timedelta(days=RECENT_DAYS - 1)).isoformat()
+    return [
+        {
+            **anomaly,
+            'label': METRIC_LABELS[anomaly['metric']],
+            'color_border': ANOMALY_COLOR,
+        }
+        for anomaly in snapshot_anomalies
+        if anomaly['day'] >= since
+    ][:limit]
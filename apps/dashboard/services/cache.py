@@ -0,0 +1,128 @@
+"""
+Кэш контекста дашборда с версионированием данных компании.
+
+У каждой компании есть версия данных в кэше. Она увеличивается при
+сохранении/удалении отзыва (apps/reviews/signals.py) и после синхронизации
+с платформами, изменившей отзывы или рейтинг платформы
+(apps/integrations/tasks.py). Версия входит в ключ кэша,
+поэтому запись данных инвалидирует все закэшированные варианты дашборда
+без перебора ключей.
+
+Эффективность видна по счётчикам попаданий/промахов (get_cache_stats)
+и по логам логгера apps.dashboard.services.cache.
+"""
+import hashlib
+import logging
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Время жизни блоков: ограничивает устаревание данных, зависящих от времени
+# (скользящие окна, «последние 7 дней»), даже если версия не менялась
+CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60 * 10)
+
+STATS_TIMEOUT = 60 * 60 * 24
+STATS_HITS_KEY = 'dashboard:cache:hits'
+STATS_MISSES_KEY = 'dashboard:cache:misses'
+
+
+def _version_key(company_id) -> str:
+    return f'dashboard:version:{company_id}'
+
+
+def get_data_version(company_id) -> int:
+    """Текущая версия данных компании."""
+    key = _version_key(company_id)
+    version = cache.get(key)
+    if version is None:
+        # Начальное значение от времени: после вытеснения ключа версия
+        # не совпадёт ни с одной из ранее закэшированных
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_data_versions(company_ids) -> dict:
+    """Версии данных нескольких компаний одним обращением к кэшу."""
+    keys = {_version_key(company_id): company_id for company_id in company_ids}
+    cached = cache.get_many(keys)
+    return {
+        company_id: cached[key] if key in cached else get_data_version(company_id)
+        for key, company_id in keys.items()
+    }
+
+
+def bump_data_version(company_id) -> None:
+    """Инвалидировать закэшированный дашборд компании."""
+    key = _version_key(company_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def make_context_key(company_id, parts: dict) -> str:
+    """Ключ кэша для набора параметров дашборда и текущей версии данных."""
+    raw = '|'.join(f'{name}={parts[name]}' for name in sorted(parts))
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()[:16]
+    return f'dashboard:ctx:{company_id}:{get_data_version(company_id)}:{digest}'
+
+
+def make_companies_key(company_ids, parts: dict) -> str:
+    """
+    Ключ кэша для набора компаний (сводка сети).
+
+    Зависит от состава набора и версий данных каждой компании: пользователи
+    с одинаковым набором членств делят запись, а изменение отзывов любой
+    из компаний инвалидирует её.
+    """
+    versions = get_data_versions(company_ids)
+    raw = '|'.join(
+        [f'{company_id}:{versions[company_id]}' for company_id in sorted(versions, key=str)]
+        + [f'{name}={parts[name]}' for name in sorted(parts)]
+    )
+    return f'dashboard:companies:{hashlib.md5(raw.encode("utf-8")).hexdigest()}'
+
+
+def get_or_compute(key: str, compute: Callable[[], Any]) -> Any:
+    """Вернуть значение из кэша или вычислить и сохранить его."""
+    cached = cache.get(key)
+    if cached is not None:
+        _incr_stat(STATS_HITS_KEY)
+        logger.debug('Dashboard cache hit: %s', key)
+        return cached
+
+    started = time.monotonic()
+    value = compute()
+    cache.set(key, value, CACHE_TIMEOUT)
+
+    _incr_stat(STATS_MISSES_KEY)
+    logger.info(
+        'Dashboard cache miss: %s (computed in %.0f ms)',
+        key, (time.monotonic() - started) * 1000,
+    )
+    return value
+
+
+def _incr_stat(key: str) -> None:
+    if not cache.add(key, 1, STATS_TIMEOUT):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, STATS_TIMEOUT)
+
+
+def get_cache_stats() -> dict:
+    """Счётчики попаданий/промахов кэша дашборда."""
+    hits = cache.get(STATS_HITS_KEY, 0)
+    misses = cache.get(STATS_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total * 100, 1) if total else 0,
+    }
@@ -0,0 +1,186 @@
+"""
+Сводка по сети: KPI, алерты и рейтинг точек по всем компаниям пользователя.
+
+Считается сгруппированными запросами по набору компаний (GROUP BY company,
+GROUP BY spot), а не перебором дашбордов компаний. Результат кэшируется
+по набору компаний и их версиям данных (make_companies_key).
+"""
+from typing import Any
+
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from apps.companies.models import Company
+from apps.reviews.models import Review
+from .alert_engine import get_alert_snapshots
+from .alerts import LEVEL_PRIORITY, build_priority_alerts
+from .cache import get_or_compute, make_companies_key
+from .periods import get_period_dates
+
+CHAIN_PERIODS = ('week', 'month', 'quarter', 'half_year', 'all')
+
+# Сколько алертов и точек показывать в сводке
+CHAIN_ALERTS_LIMIT = 10
+CHAIN_SPOTS_LIMIT = 5
+
+# Точки с меньшим числом отзывов за период в рейтинг не попадают
+MIN_SPOT_REVIEWS = 5
+
+
+def get_chain_overview(companies: list[Company], period: str = 'month') -> dict[str, Any]:
+    """
+    Сводка по набору компаний (из кэша или вычисленная).
+
+    Returns:
+        {'period', 'totals', 'company_stats', 'alerts', 'best_spots', 'worst_spots'}
+    """
+    if period not in CHAIN_PERIODS:
+        period = 'month'
+    key = make_companies_key(
+        [company.id for company in companies],
+        {'view': 'chain', 'period': period, 'today': timezone.localdate().isoformat()},
+    )
+    return get_or_compute(key, lambda: _build_chain_overview(companies, period))
+
+
+def _build_chain_overview(companies: list[Company], period: str) -> dict[str, Any]:
+    start, prev_start, prev_end, end = get_period_dates(period)
+    current = _range_q(start, end)
+    previous = _range_q(prev_start, prev_end) if prev_start and prev_end else None
+
+    # Отзывы старше обоих периодов не нужны — сужаем выборку по индексу
+    reviews = Review.objects.filter(company__in=companies)
+    if start:
+        reviews = reviews.filter(created_at__gte=min(filter(None, [start, prev_start])))
+
+    rows = _company_rows(reviews, current, previous)
+    names = {company.id: company.name for company in companies}
+    alerts_by_company = _company_alerts(companies)
+
+    company_stats = []
+    for company in companies:
+        row = rows.get(company.id, {})
+        stats = _kpi(row)
+        stats.update({
+            'id': str(company.id),
+            'name': company.name,
+            'alerts_count': len(alerts_by_company[company.id]),
+            'critical_count': sum(1 for a in alerts_by_company[company.id] if a['level'] == 'critical'),
+        })
+        company_stats.append(stats)
+    company_stats.sort(key=lambda c: (-c['total_count'], c['name']))
+
+    alerts = [alert for company_alerts in alerts_by_company.values() for alert in company_alerts]
+    alerts.sort(key=lambda a: (LEVEL_PRIORITY[a['level']], -a['count']))
+
+    spots = _spot_rows(reviews, current, names)
+    return {
+        'period': period,
+        'totals': _kpi(_sum_rows(rows.values())),
+        'company_stats': company_stats,
+        'alerts': alerts[:CHAIN_ALERTS_LIMIT],
+        'best_spots': sorted(spots, key=lambda s: (-s['rating'], -s['count']))[:CHAIN_SPOTS_LIMIT],
+        'worst_spots': sorted(spots, key=lambda s: (s['rating'], -s['count']))[:CHAIN_SPOTS_LIMIT],
+    }
+
+
+def _range_q(start, end) -> Q:
+    condition = Q()
+    if start:
+        condition &= Q(created_at__gte=start)
+    if end:
+        condition &= Q(created_at__lt=end)
+    return condition
+
+
+def _company_rows(reviews, current: Q, previous: Q | None) -> dict:
+    """Итоги текущего и предыдущего периода по каждой компании — одним запросом."""
+    aggregates = {
+        'total': Count('id', filter=current),
+        'rating_sum': _sum_rating(current),
+        'promoters': Count('id', filter=current & Q(rating=5)),
+        'negative': Count('id', filter=current & Q(rating__lte=3)),
+        'negative_unanswered': Count('id', filter=current & Q(rating__lte=3, response='')),
+    }
+    if previous is not None:
+        aggregates['prev_total'] = Count('id', filter=previous)
+        aggregates['prev_rating_sum'] = _sum_rating(previous)
+
+    return {
+        row['company_id']: row
+        for row in reviews.values('company_id').annotate(**aggregates).order_by()
+    }
+
+
+def _sum_rating(condition: Q):
+    # Сумма, а не среднее: итог сети — взвешенное среднее по всем отзывам
+    return Sum('rating', filter=condition, default=0)
+
+
+def _sum_rows(rows) -> dict:
+    totals: dict[str, int] = {}
+    for row in rows:
+        for name, value in row.items():
+            if name != 'company_id' and value is not None:
+                totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def _kpi(row: dict) -> dict:
+    """KPI из сумм (как calculate_kpi_metrics, но по сгруппированной строке)."""
+    total = row.get('total', 0)
+    avg_rating = row.get('rating_sum', 0) / total if total else 0
+    prev_total = row.get('prev_total', 0)
+    rating_delta = None
+    if total and prev_total:
+        rating_delta = round(avg_rating - row['prev_rating_sum'] / prev_total, 2)
+
+    negative = row.get('negative', 0)
+    return {
+        'total_count': total,
+        'avg_rating': round(avg_rating, 2),
+        'avg_rating_delta': rating_delta,
+        'nps': round((row.get('promoters', 0) - negative) / total * 100, 1) if total else 0,
+        'negative_count': negative,
+        'negative_share': round(negative / total * 100, 1) if total else 0,
+        'negative_unanswered_count': row.get('negative_unanswered', 0),
+    }
+
+
+def _company_alerts(companies: list[Company]) -> dict:
+    """Алерты каждой компании из снимков (один запрос на все компании)."""
+    snapshots = get_alert_snapshots(companies)
+    result = {}
+    for company in companies:
+        alerts = build_priority_alerts(snapshots[company.id].problems, limit=CHAIN_ALERTS_LIMIT)
+        for alert in alerts:
+            alert['company_id'] = str(company.id)
+            alert['company_name'] = company.name
+        result[company.id] = alerts
+    return result
+
+
+def _spot_rows(reviews, current: Q, company_names: dict) -> list[dict]:
+    """Статистика всех точек сети за период — одним запросом."""
+    rows = (
+        reviews.filter(current, spot__isnull=False)
+        .values('spot_id', 'spot__name', 'company_id')
+        .annotate(
+            count=Count('id'),
+            avg_rating=Avg('rating'),
+            negative=Count('id', filter=Q(rating__lte=3)),
+        )
+        .filter(count__gte=MIN_SPOT_REVIEWS)
+        .order_by()
+    )
+    return [
+        {
+            'id': str(row['spot_id']),
+            'name': row['spot__name'],
+            'company_name': company_names[row['company_id']],
+            'rating': round(row['avg_rating'], 2),
+            'negative_pct': round(row['negative'] / row['count'] * 100),
+            'count': row['count'],
+        }
+        for row in rows
+    ]
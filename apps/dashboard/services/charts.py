@@ -6,7 +6,8 @@ from datetime import datetime, time, timedelta
 from typing import Any
 
 from dateutil.relativedelta import relativedelta
-from django.db.models import QuerySet
+from django.db.models import Count, Q, QuerySet, Sum
+from django.db.models.functions import Coalesce, ExtractHour, ExtractWeekDay
 from django.utils import timezone
 
 from apps.companies.models import Company
@@ -193,3 +194,85 @@ def _get_monthly_grouped(company: Company, start_date, end_date, spot_ids=None)
         current += relativedelta(months=1)
 
     return {'labels': labels, 'values': values}
+
+
+HEATMAP_DAYS = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+
+
+def get_review_heatmap(reviews: QuerySet, start_date=None, end_date=None) -> dict:
+    """
+    Матрица день недели × час (7×24) одним сгруппированным запросом.
+
+    Время отзыва — дата на платформе (или загрузки), в локальном часовом
+    поясе; по нему же отбирается период [start_date, end_date). Запрос
+    возвращает не больше 168 строк при любой длине периода.
+
+    Returns:
+        {'days', 'hours', 'counts', 'negative_share', 'avg_rating', 'total',
+         'negative_peak'} — матрицы 7×24, строки с понедельника; avg_rating
+        пустой ячейки — None; negative_peak — ячейка с наибольшим числом
+        негативных отзывов (None, если негатива нет).
+    """
+    return build_heatmap(count_heatmap(reviews, start_date, end_date))
+
+
+def count_heatmap(reviews: QuerySet, start_date=None, end_date=None) -> dict:
+    """
+    Суммы по ячейкам 7×24: {'counts', 'negative', 'rating_sum'}.
+
+    Суммы разных наборов отзывов складываются поячеечно (services/snapshots.py).
+    """
+    reviews = reviews.annotate(written_at=Coalesce('platform_date', 'created_at'))
+    if start_date:
+        reviews = reviews.filter(written_at__gte=start_date)
+    if end_date:
+        reviews = reviews.filter(written_at__lt=end_date)
+    rows = (
+        reviews
+        .annotate(weekday=ExtractWeekDay('written_at'), hour=ExtractHour('written_at'))
+        .values('weekday', 'hour')
+        .annotate(
+            total=Count('id'),
+            negative=Count('id', filter=Q(rating__lte=3)),
+            rating_sum=Sum('rating'),
+        )
+        .order_by()
+    )
+
+    sums = {name: [[0] * 24 for _ in HEATMAP_DAYS] for name in ('counts', 'negative', 'rating_sum')}
+    for row in rows:
+        # ExtractWeekDay: 1 — воскресенье … 7 — суббота
+        day = (row['weekday'] + 5) % 7
+        hour = row['hour']
+        sums['counts'][day][hour] = row['total']
+        sums['negative'][day][hour] = row['negative']
+        sums['rating_sum'][day][hour] = row['rating_sum']
+    return sums
+
+
+def build_heatmap(sums: dict) -> dict:
+    """Тепловая карта (см. get_review_heatmap) из поячеечных сумм count_heatmap."""
+    counts = sums['counts']
+    negative_share = [[0] * 24 for _ in HEATMAP_DAYS]
+    avg_rating = [[None] * 24 for _ in HEATMAP_DAYS]
+    negative_peak = None
+    for day, day_name in enumerate(HEATMAP_DAYS):
+        for hour in range(24):
+            total = counts[day][hour]
+            if not total:
+                continue
+            negative = sums['negative'][day][hour]
+            negative_share[day][hour] = round(negative / total * 100)
+            avg_rating[day][hour] = round(sums['rating_sum'][day][hour] / total, 2)
+            if negative and (negative_peak is None or negative > negative_peak['count']):
+                negative_peak = {'day': day_name, 'hour': hour, 'count': negative}
+
+    return {
+        'days': HEATMAP_DAYS,
+        'hours': list(range(24)),
+        'counts': counts,
+        'negative_share': negative_share,
+        'avg_rating': avg_rating,
+        'total': sum(map(sum, counts)),
+        'negative_peak': negative_peak,
+    }
@@ -1,43 +1,161 @@
 """
 Company-related business logic.
+
+Членства пользователя и подключения компании кэшируются на короткое время
+(COMPANY_CONTEXT_TTL) и сбрасываются сигналами (apps/dashboard/signals.py).
+В пределах запроса они вычисляются один раз: CompanyContext, который
+CompanyContextMiddleware кладёт в request.company_context.
 """
+from functools import cached_property
 from typing import Any
 
+from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpRequest
 
 from apps.accounts.models import Member
 from apps.companies.models import Company, Platform, Connection
 
+from .cache import get_data_version
+
+# Сколько секунд членства и подключения живут в кэше без инвалидации
+COMPANY_CONTEXT_TTL = getattr(settings, 'COMPANY_CONTEXT_TTL', 60)
+
+
+def _memberships_key(user_id) -> str:
+    return f'dashboard:memberships:{user_id}'
+
+
+def _connections_key(company_id) -> str:
+    return f'dashboard:connections:{company_id}'
+
+
+def get_user_memberships(user: Any) -> list[Member]:
+    """Active memberships of user with companies (short-TTL cached)."""
+    key = _memberships_key(user.pk)
+    memberships = cache.get(key)
+    if memberships is None:
+        memberships = list(
+            Member.objects.filter(user=user, is_active=True).select_related('company')
+        )
+        cache.set(key, memberships, COMPANY_CONTEXT_TTL)
+    return memberships
+
+
+def get_company_connections(company: Company) -> dict[str, Connection]:
+    """
+    Подключения компании по платформе (short-TTL cached).
+
+    OAuth-токены в кэш не попадают: при обращении они дочитываются из БД.
+    """
+    key = _connections_key(company.id)
+    connections = cache.get(key)
+    if connections is None:
+        connections = {
+            c.platform_id: c
+            for c in Connection.objects.filter(company=company).defer('access_token', 'refresh_token')
+        }
+        cache.set(key, connections, COMPANY_CONTEXT_TTL)
+    return connections
+
+
+def invalidate_user_memberships(user_ids) -> None:
+    """Сбросить кэш членств пользователей."""
+    cache.delete_many([_memberships_key(user_id) for user_id in user_ids])
+
+
+def invalidate_company_connections(company_id) -> None:
+    """Сбросить кэш подключений компании."""
+    cache.delete(_connections_key(company_id))
+
+
+class CompanyContext:
+    """
+    Компания, членства и подключения текущего запроса.
+
+    Каждое свойство вычисляется при первом обращении и один раз за запрос;
+    запросы без обращения к нему (публичные формы, API) ничего не платят.
+    """
+
+    def __init__(self, request: HttpRequest):
+        self._request = request
+
+    @cached_property
+    def memberships(self) -> list[Member]:
+        user = self._request.user
+        if not user.is_authenticated:
+            return []
+        return get_user_memberships(user)
+
+    @cached_property
+    def companies(self) -> list[Company]:
+        return [m.company for m in self.memberships]
+
+    @cached_property
+    def chain_companies(self) -> list[Company]:
+        """
+        Компании сводки по сети: все, кроме демо.
+
+        Демо-компания подключается каждому пользователю зрителем и в сеть
+        не входит. Членства зрителя в настоящих компаниях учитываются —
+        сводка только для чтения.
+        """
+        return [c for c in self.companies if not c.is_demo]
+
+    @cached_property
+    def company(self) -> Company | None:
+        return _resolve_current_company(self._request, self.companies)
+
+    @cached_property
+    def membership(self) -> Member | None:
+        """Членство пользователя в текущей компании."""
+        if self.company is None:
+            return None
+        return _find_membership(self.memberships, self.company)
+
+    @cached_property
+    def connections(self) -> dict[str, Connection]:
+        """Подключения текущей компании по платформе."""
+        if self.company is None:
+            return {}
+        return get_company_connections(self.company)
+
+
+def get_company_context(request: HttpRequest) -> CompanyContext:
+    """Контекст запроса (из CompanyContextMiddleware или созданный на месте)."""
+    context = getattr(request, 'company_context', None)
+    if context is None:
+        context = request.company_context = CompanyContext(request)
+    return context
+
 
 def get_user_companies(user: Any) -> list[Company]:
     """Get all companies for user."""
-    memberships = Member.objects.filter(
-        user=user, is_active=True
-    ).select_related('company')
-    return [m.company for m in memberships]
+    return [m.company for m in get_user_memberships(user)]
 
 
 def get_current_company(request: HttpRequest) -> tuple[Company | None, list[Company]]:
+    """Get current company and all user companies from the request context."""
+    context = get_company_context(request)
+    return context.company, context.companies
+
+
+def _resolve_current_company(request: HttpRequest, companies: list[Company]) -> Company | None:
     """Get current company from session or first available.
 
     If user hasn't explicitly selected a company and their own company
     has no reviews yet, default to the demo company so new users see
     a populated dashboard on first visit.
     """
-    from apps.reviews.models import Review
-
-    user = request.user
-    companies = get_user_companies(user)
-
     if not companies:
-        return None, []
+        return None
 
     # User explicitly selected a company — respect their choice
     selected_id = request.session.get('selected_company_id')
     if selected_id:
         for company in companies:
             if str(company.id) == selected_id:
-                return company, companies
+                return company
 
     # No explicit selection — check if we should show demo first
     demo = None
@@ -49,18 +167,29 @@ def get_current_company(request: HttpRequest) -> tuple[Company | None, list[Comp
             own = company
 
     # If there's a demo company and user's own company has no reviews yet
-    if demo and own and not Review.objects.filter(company=own).exists():
-        return demo, companies
+    if demo and own and not _has_reviews(own):
+        return demo
+
+    return companies[0]
 
-    return companies[0], companies
+
+def _has_reviews(company: Company) -> bool:
+    """Есть ли у компании отзывы (кэш до следующей записи отзывов)."""
+    from apps.reviews.models import Review
+
+    key = f'dashboard:has-reviews:{company.id}:{get_data_version(company.id)}'
+    return cache.get_or_set(
+        key, lambda: Review.objects.filter(company=company).exists(), COMPANY_CONTEXT_TTL
+    )
+
+
+def _find_membership(memberships: list[Member], company: Company) -> Member | None:
+    return next((m for m in memberships if m.company_id == company.id), None)
 
 
 def get_user_membership(user: Any, company: Company) -> Member | None:
     """Get user's membership for a company."""
-    try:
-        return Member.objects.get(user=user, company=company, is_active=True)
-    except Member.DoesNotExist:
-        return None
+    return _find_membership(get_user_memberships(user), company)
 
 
 def get_platforms_with_connections(company: Company) -> tuple[list[Platform], dict]:
@@ -0,0 +1,77 @@
+"""
+Счётчики вкладок списка отзывов.
+
+Все счётчики компании считаются одним агрегатом и кэшируются — каждый под
+своим ключом, чтобы их можно было атомарно менять через cache.incr/decr.
+При сохранении/удалении отзыва (apps/reviews/signals.py) счётчики
+обновляются инкрементально по изменившимся полям, без запросов к БД.
+"""
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db.models import Count, Q, QuerySet
+
+from apps.companies.models import Company
+from apps.reviews.models import Review
+
+# Время жизни: страховка от расхождения при гонках инкрементов
+CACHE_TIMEOUT = 60 * 60
+
+# Счётчик → (условие для агрегата, проверка значений полей отзыва)
+COUNTERS: dict[str, tuple[Q, Callable[[dict], bool]]] = {
+    'all': (Q(), lambda v: True),
+    'new': (Q(status=Review.Status.NEW), lambda v: v['status'] == Review.Status.NEW),
+    'negative': (Q(rating__lte=3), lambda v: v['rating'] <= 3),
+    'no_response': (Q(response=''), lambda v: v['response'] == ''),
+    'complex': (Q(tags_complex=True), lambda v: bool(v['tags_complex'])),
+}
+
+
+def _cache_key(company_id, name: str) -> str:
+    return f'review_counts:{company_id}:{name}'
+
+
+def get_review_counts(company: Company) -> dict:
+    """Get review counts for filter tabs."""
+    keys = {name: _cache_key(company.id, name) for name in COUNTERS}
+    cached = cache.get_many(keys.values())
+    if len(cached) == len(keys):
+        return {name: cached[key] for name, key in keys.items()}
+
+    counts = Review.objects.filter(company=company).aggregate(**{
+        name: Count('id', filter=condition) for name, (condition, _) in COUNTERS.items()
+    })
+    cache.set_many({keys[name]: value for name, value in counts.items()}, CACHE_TIMEOUT)
+    return counts
+
+
+def apply_review_change(company_id, old: dict[str, Any] | None, new: dict[str, Any] | None) -> None:
+    """
+    Обновить закэшированные счётчики по изменению одного отзыва.
+
+    Args:
+        old: значения полей до изменения (None — отзыв создан)
+        new: значения после (None — отзыв удалён)
+    """
+    for name, (_, matches) in COUNTERS.items():
+        delta = int(bool(new) and matches(new)) - int(bool(old) and matches(old))
+        if not delta:
+            continue
+        try:
+            cache.incr(_cache_key(company_id, name), delta)
+        except ValueError:
+            # Счётчиков нет в кэше — посчитаются при следующем чтении
+            pass
+
+
+def invalidate_review_counts(company_id) -> None:
+    """Сбросить счётчики (когда изменение нельзя применить инкрементально)."""
+    cache.delete_many([_cache_key(company_id, name) for name in COUNTERS])
+
+
+def count_tagged_reviews(reviews_qs: QuerySet) -> dict:
+    """Счётчики тегов для набора отзывов — одним запросом."""
+    return reviews_qs.aggregate(
+        total_with_tags=Count('id', filter=~Q(tags=[])),
+        complex_count=Count('id', filter=Q(tags_complex=True)),
+    )
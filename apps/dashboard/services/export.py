@@ -0,0 +1,249 @@
+"""
+Экспорт отзывов в CSV/XLSX.
+
+Фильтры те же, что у списка отзывов (filter_review_rows). Отзывы читаются
+серверным курсором пачками и сразу превращаются в строки, поэтому память
+не растёт с объёмом выгрузки. Теги разворачиваются в колонки: одна на
+категорию (тональность) и общая колонка подкатегорий.
+
+Небольшие CSV отдаются потоком прямо из view, большие выгрузки и XLSX
+пишутся в файл Celery-задачей (apps.dashboard.tasks.export_reviews).
+Если задача упала, рядом с файлом остаётся отметка об ошибке — страница
+скачивания показывает ошибку, а не ждёт файл бесконечно.
+"""
+import csv
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from apps.companies.models import Company
+from apps.reviews.impression_categories import IMPRESSION_CATEGORIES
+from apps.reviews.models import Review
+from .reviews import _review_tags, filter_review_rows
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+# Размер пачки серверного курсора
+EXPORT_CHUNK_SIZE = 2000
+
+# Больше строк — CSV тоже готовится в фоне, а не потоком из запроса
+EXPORT_SYNC_LIMIT = getattr(settings, 'REVIEW_EXPORT_SYNC_LIMIT', 50_000)
+
+# Готовые файлы фоновых выгрузок и время их хранения
+EXPORT_ROOT = Path(getattr(settings, 'REVIEW_EXPORT_ROOT', Path(settings.MEDIA_ROOT) / 'exports'))
+EXPORT_TTL = 24 * 60 * 60
+
+# Параметры запроса, которые не относятся к фильтрам
+NON_FILTER_PARAMS = ('cursor', 'format')
+
+BASE_COLUMNS = [
+    'id', 'date', 'source', 'rating', 'author', 'spot', 'text',
+    'sentiment', 'status', 'response', 'response_at', 'wants_contact',
+    'tags_complex', 'subcategories',
+]
+TAG_COLUMNS = [f'tag:{category}' for category in IMPRESSION_CATEGORIES]
+EXPORT_COLUMNS = BASE_COLUMNS + TAG_COLUMNS
+
+# Символы, с которых Excel начинает формулу
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def get_export_params(params) -> dict:
+    """Фильтры выгрузки из GET-параметров (без курсора страницы)."""
+    return {
+        key: value for key, value in params.items()
+        if key not in NON_FILTER_PARAMS and value
+    }
+
+
+def iter_export_reviews(company: Company, params: dict) -> Iterator[Review]:
+    """Отзывы под фильтры — потоком, без кэширования QuerySet."""
+    rows = filter_review_rows(company, get_export_params(params))
+    if isinstance(rows, QuerySet):
+        return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return rows
+
+
+def estimate_export_size(company: Company, params: dict) -> int:
+    """
+    Оценка числа строк: точная для фильтров в БД, для фильтров в Python —
+    сверху (все отзывы компании).
+    """
+    rows = filter_review_rows(company, get_export_params(params))
+    if isinstance(rows, QuerySet):
+        return rows.count()
+    return Review.objects.filter(company=company).count()
+
+
+def _format_datetime(value) -> str:
+    if not value:
+        return ''
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _safe_text(value: str) -> str:
+    """Экранировать ячейку, которую Excel принял бы за формулу."""
+    if value and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _tag_columns(review: Review) -> tuple[str, list[str]]:
+    """Подкатегории через '; ' и тональность по каждой категории."""
+    sentiments: dict[str, set] = {}
+    subcategories = []
+    for tag in _review_tags(review):
+        category = tag.get('category')
+        if not category:
+            continue
+        sentiments.setdefault(category, set()).add(tag.get('sentiment') or 'neutral')
+        subcategory = tag.get('subcategory')
+        if subcategory and subcategory not in subcategories:
+            subcategories.append(subcategory)
+
+    by_category = []
+    for category in IMPRESSION_CATEGORIES:
+        values = sentiments.get(category)
+        if not values:
+            by_category.append('')
+        elif len(values) == 1:
+            by_category.append(next(iter(values)))
+        else:
+            by_category.append('mixed')
+    return '; '.join(subcategories), by_category
+
+
+def review_to_row(review: Review) -> list:
+    """Строка выгрузки в порядке EXPORT_COLUMNS."""
+    subcategories, by_category = _tag_columns(review)
+    return [
+        str(review.id),
+        _format_datetime(review.platform_date or review.created_at),
+        review.source,
+        review.rating,
+        _safe_text(review.author_name),
+        _safe_text(review.spot.name) if review.spot else '',
+        _safe_text(review.text),
+        review.sentiment,
+        review.status,
+        _safe_text(review.response),
+        _format_datetime(review.response_at),
+        int(review.wants_contact),
+        int(review.tags_complex),
+        subcategories,
+        *by_category,
+    ]
+
+
+def export_rows(company: Company, params: dict) -> Iterator[list]:
+    """Заголовок и строки выгрузки."""
+    yield EXPORT_COLUMNS
+    for review in iter_export_reviews(company, params):
+        yield review_to_row(review)
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: write() возвращает строку, а не пишет её."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_csv(rows: Iterable[list]) -> Iterator[str]:
+    """CSV построчно (для StreamingHttpResponse). BOM — чтобы Excel понял UTF-8."""
+    writer = csv.writer(Echo())
+    yield '\ufeff'
+    for row in rows:
+        yield writer.writerow(row)
+
+
+# === Файловые выгрузки (Celery) ===
+
+def get_export_path(company_id, export_id: str, fmt: str) -> Path:
+    return EXPORT_ROOT / str(company_id) / f'{export_id}.{fmt}'
+
+
+def new_export_id() -> str:
+    return uuid.uuid4().hex
+
+
+def write_export_file(company: Company, params: dict, fmt: str, path: Path) -> int:
+    """
+    Записать выгрузку в файл.
+
+    Файл пишется во временный и переименовывается в конце — недописанная
+    выгрузка никогда не отдаётся на скачивание.
+
+    Returns:
+        Количество строк (без заголовка).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.part')
+
+    rows = export_rows(company, params)
+    try:
+        if fmt == 'xlsx':
+            count = _write_xlsx(rows, tmp_path)
+        else:
+            count = _write_csv(rows, tmp_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp_path, path)
+    return count
+
+
+def _error_path(path: Path) -> Path:
+    return path.with_name(f'{path.name}.error')
+
+
+def mark_export_failed(path: Path, error: str) -> None:
+    """Отметить, что фоновая выгрузка не удалась (удаляется вместе с файлами)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _error_path(path).write_text(error, encoding='utf-8')
+
+
+def export_failed(path: Path) -> bool:
+    return _error_path(path).exists()
+
+
+def _write_csv(rows: Iterable[list], path: Path) -> int:
+    count = -1
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        for count, row in enumerate(rows):
+            writer.writerow(row)
+    return count
+
+
+def _write_xlsx(rows: Iterable[list], path: Path) -> int:
+    # write_only: строки сбрасываются на диск, а не копятся в памяти
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Отзывы')
+    count = -1
+    for count, row in enumerate(rows):
+        sheet.append(row)
+    workbook.save(path)
+    return count
+
+
+def prune_exports(max_age: int = EXPORT_TTL) -> int:
+    """Удалить файлы выгрузок старше max_age секунд."""
+    if not EXPORT_ROOT.exists():
+        return 0
+    threshold = time.time() - max_age
+    removed = 0
+    for path in EXPORT_ROOT.glob('*/*'):
+        if path.is_file() and path.stat().st_mtime < threshold:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
@@ -3,7 +3,9 @@ Dashboard insights: топ жалоб и похвал (basic + AI режимы).
 """
 from collections import Counter
 
-from django.db.models import QuerySet
+from django.db.models import Count, QuerySet
+
+from apps.reviews.models import ReviewMatch
 
 
 # === Топ жалоб и похвал ===
@@ -165,19 +167,9 @@ def get_top_complaints(reviews_qs: QuerySet, limit: int = 5) -> list[dict]:
     Returns:
         [{'label': 'Долгое ожидание', 'count': 47}, ...]
     """
-    counter = Counter()
-
     # Анализируем только негативные отзывы
     negative_reviews = reviews_qs.filter(rating__lte=3)
-
-    for review in negative_reviews.values('text'):
-        issues = _extract_issues(review['text'], COMPLAINT_PATTERNS)
-        counter.update(issues)
-
-    return [
-        {'label': label, 'count': count}
-        for label, count in counter.most_common(limit)
-    ]
+    return _top_matches(negative_reviews, ReviewMatch.Kind.COMPLAINT, limit)
 
 
 def get_top_praises(reviews_qs: QuerySet, limit: int = 5) -> list[dict]:
@@ -187,19 +179,21 @@ def get_top_praises(reviews_qs: QuerySet, limit: int = 5) -> list[dict]:
     Returns:
         [{'label': 'Вкусная еда', 'count': 156}, ...]
     """
-    counter = Counter()
-
     # Анализируем только позитивные отзывы
     positive_reviews = reviews_qs.filter(rating__gte=4)
+    return _top_matches(positive_reviews, ReviewMatch.Kind.PRAISE, limit)
 
-    for review in positive_reviews.values('text'):
-        praises = _extract_issues(review['text'], PRAISE_PATTERNS)
-        counter.update(praises)
 
-    return [
-        {'label': label, 'count': count}
-        for label, count in counter.most_common(limit)
-    ]
+def _top_matches(reviews_qs: QuerySet, kind: str, limit: int) -> list[dict]:
+    """Посчитать предрасчитанные совпадения (ReviewMatch) по лейблам."""
+    rows = (
+        ReviewMatch.objects
+        .filter(kind=kind, review__in=reviews_qs.values('id'))
+        .values('key')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'key')[:limit]
+    )
+    return [{'label': row['key'], 'count': row['count']} for row in rows]
 
 
 def get_top_complaints_ai(reviews_qs: QuerySet, limit: int = 5) -> list[dict]:
@@ -208,22 +202,7 @@ def get_top_complaints_ai(reviews_qs: QuerySet, limit: int = 5) -> list[dict]:
 
     Группирует по SUBCATEGORY_MAP, считает только negative sentiment + rating <= 3.
     """
-    counter = Counter()
-
-    for review in reviews_qs.filter(rating__lte=3, tags_complex=False).only('tags'):
-        tags = review.tags
-        if not tags or not isinstance(tags, list):
-            continue
-        for tag in tags:
-            if not isinstance(tag, dict):
-                continue
-            if tag.get('sentiment') != 'negative':
-                continue
-            subcategory = tag.get('subcategory', '')
-            label = SUBCATEGORY_MAP.get(subcategory)
-            if label:
-                counter[label] += 1
-
+    counter = _count_ai_tags(reviews_qs.filter(rating__lte=3), 'negative')
     return [
         {'label': label, 'count': count}
         for label, count in counter.most_common(limit)
@@ -236,23 +215,59 @@ def get_top_praises_ai(reviews_qs: QuerySet, limit: int = 5) -> list[dict]:
 
     Группирует по SUBCATEGORY_MAP, считает только positive sentiment + rating >= 4.
     """
+    counter = _count_ai_tags(reviews_qs.filter(rating__gte=4), 'positive')
+    return [
+        {'label': label, 'count': count}
+        for label, count in counter.most_common(limit)
+    ]
+
+
+def _count_ai_tags(reviews_qs: QuerySet, sentiment: str) -> Counter:
+    """Посчитать AI-теги нужной тональности по лейблам SUBCATEGORY_MAP."""
     counter = Counter()
 
-    for review in reviews_qs.filter(rating__gte=4, tags_complex=False).only('tags'):
+    for review in reviews_qs.filter(tags_complex=False).only('tags'):
         tags = review.tags
         if not tags or not isinstance(tags, list):
             continue
         for tag in tags:
             if not isinstance(tag, dict):
                 continue
-            if tag.get('sentiment') != 'positive':
+            if tag.get('sentiment') != sentiment:
                 continue
             subcategory = tag.get('subcategory', '')
             label = SUBCATEGORY_MAP.get(subcategory)
             if label:
                 counter[label] += 1
 
-    return [
-        {'label': label, 'count': count}
-        for label, count in counter.most_common(limit)
-    ]
+    return counter
+
+
+# === Полные счётчики (для предрасчитанных снимков) ===
+
+def count_insights(reviews_qs: QuerySet, kind: str, mode: str = 'basic') -> dict[str, int]:
+    """
+    Все жалобы (kind='complaint') или похвалы (kind='praise') с количеством.
+
+    В отличие от get_top_* не обрезает список: счётчики разных наборов
+    отзывов можно складывать (services/snapshots.py).
+    """
+    complaint = kind == ReviewMatch.Kind.COMPLAINT
+    reviews_qs = reviews_qs.filter(rating__lte=3) if complaint else reviews_qs.filter(rating__gte=4)
+    if mode == 'ai':
+        return dict(_count_ai_tags(reviews_qs, 'negative' if complaint else 'positive'))
+
+    rows = (
+        ReviewMatch.objects
+        .filter(kind=kind, review__in=reviews_qs.values('id'))
+        .values('key')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    return {row['key']: row['count'] for row in rows}
+
+
+def top_insights(counts: dict[str, int], limit: int = 5) -> list[dict]:
+    """Топ из полных счётчиков — в порядке get_top_complaints (-count, label)."""
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [{'label': label, 'count': count} for label, count in ordered[:limit]]
@@ -0,0 +1,109 @@
+"""
+Предрасчёт совпадений отзывов с паттернами проблем, жалоб и похвал.
+
+Паттерны матчатся один раз при записи отзыва и сохраняются в ReviewMatch.
+Алерты, топы жалоб/похвал и фильтры списка отзывов читают уже готовые
+совпадения. При изменении PROBLEM_PATTERNS / COMPLAINT_PATTERNS /
+PRAISE_PATTERNS нужно перестроить таблицу: manage.py rebuild_review_matches.
+"""
+from django.db import transaction
+from django.db.models import QuerySet
+
+from apps.reviews.models import Review, ReviewMatch
+
+from .alerts import PROBLEM_PATTERNS
+from .insights import COMPLAINT_PATTERNS, PRAISE_PATTERNS, _extract_issues
+
+
+def match_text(text: str) -> list[tuple[str, str]]:
+    """
+    Найти все совпадения текста с паттернами.
+
+    Returns:
+        [(kind, key), ...] — для problem ключ из PROBLEM_PATTERNS,
+        для complaint/praise — лейбл причины.
+    """
+    if not text:
+        return []
+
+    text_lower = text.lower()
+    matches = [
+        (ReviewMatch.Kind.PROBLEM, problem['key'])
+        for problem in PROBLEM_PATTERNS
+        if any(p in text_lower for p in problem['patterns'])
+    ]
+    matches += [
+        (ReviewMatch.Kind.COMPLAINT, label)
+        for label in _extract_issues(text, COMPLAINT_PATTERNS)
+    ]
+    matches += [
+        (ReviewMatch.Kind.PRAISE, label)
+        for label in _extract_issues(text, PRAISE_PATTERNS)
+    ]
+    return matches
+
+
+def _build_matches(review: Review) -> list[ReviewMatch]:
+    """Собрать (несохранённые) совпадения для отзыва."""
+    return [
+        ReviewMatch(
+            review_id=review.pk,
+            company_id=review.company_id,
+            spot_id=review.spot_id,
+            kind=kind,
+            key=key,
+            review_created_at=review.created_at,
+        )
+        for kind, key in match_text(review.text)
+    ]
+
+
+def sync_review_matches(review: Review) -> tuple[list[ReviewMatch], list[ReviewMatch]]:
+    """
+    Пересчитать совпадения одного отзыва (вызывается при сохранении).
+
+    Returns:
+        (старые совпадения, новые совпадения) — для инкрементального
+        обновления счётчиков алертов.
+    """
+    with transaction.atomic():
+        old_matches = list(ReviewMatch.objects.filter(review_id=review.pk))
+        ReviewMatch.objects.filter(review_id=review.pk).delete()
+        new_matches = ReviewMatch.objects.bulk_create(_build_matches(review))
+    return old_matches, new_matches
+
+
+def rebuild_review_matches(reviews_qs: QuerySet, batch_size: int = 1000) -> int:
+    """
+    Перестроить совпадения для набора отзывов пачками.
+
+    Returns:
+        Количество обработанных отзывов.
+    """
+    reviews = reviews_qs.only('id', 'company_id', 'spot_id', 'text', 'created_at')
+    batch = []
+    processed = 0
+
+    for review in reviews.iterator(chunk_size=batch_size):
+        batch.append(review)
+        if len(batch) >= batch_size:
+            replace_review_matches(batch)
+            processed += len(batch)
+            batch = []
+
+    if batch:
+        replace_review_matches(batch)
+        processed += len(batch)
+
+    return processed
+
+
+def replace_review_matches(reviews: list[Review]) -> None:
+    """Заменить совпадения для пачки отзывов одной транзакцией."""
+    matches = []
+    for review in reviews:
+        matches.extend(_build_matches(review))
+
+    with transaction.atomic():
+        ReviewMatch.objects.filter(review_id__in=[r.pk for r in reviews]).delete()
+        ReviewMatch.objects.bulk_create(matches)
@@ -1,7 +1,6 @@
 """
 Dashboard metrics: сравнение по точкам и простые метрики.
 """
-from collections import Counter
 from datetime import timedelta
 from typing import Any
 
@@ -11,7 +10,7 @@ from django.utils import timezone
 from apps.companies.models import Company, Spot
 from apps.reviews.models import Review
 
-from .insights import COMPLAINT_PATTERNS, _extract_issues, get_top_complaints_ai
+from .insights import get_top_complaints, get_top_complaints_ai
 
 
 def get_spots_comparison(
@@ -19,45 +18,65 @@ def get_spots_comparison(
     start_date: Any = None,
     end_date: Any = None,
     mode: str = 'basic',
+    spot_totals: dict | None = None,
 ) -> list[dict]:
     """
     Сравнение статистики по точкам/филиалам.
 
+    spot_totals — готовые итоги точек за период {spot_id: {'total',
+    'avg_rating', 'negative'}} (снимок «за всё время»); тогда из БД читается
+    только последняя неделя для тренда.
+
     Returns:
         [{'name': 'Тверская', 'rating': 4.5, 'negative_pct': 8, 'trend': 'up', 'count': 234}, ...]
     """
-    spots = Spot.objects.filter(company=company, is_active=True)
-    if not spots.exists():
+    spots = list(Spot.objects.filter(company=company, is_active=True))
+    if not spots:
         return []
 
     results = []
     week_ago = timezone.now() - timedelta(days=7)
 
+    reviews_in_period = Review.objects.filter(company=company)
+    if start_date:
+        reviews_in_period = reviews_in_period.filter(created_at__gte=start_date)
+    if end_date:
+        reviews_in_period = reviews_in_period.filter(created_at__lt=end_date)
+
+    if spot_totals is None:
+        # Статистика всех точек одним запросом (GROUP BY spot)
+        stats_by_spot = {
+            row['spot_id']: row
+            for row in reviews_in_period.filter(spot__in=spots).values('spot_id').annotate(
+                total=Count('id'),
+                avg_rating=Avg('rating'),
+                negative=Count('id', filter=Q(rating__lte=3)),
+                recent_rating=Avg('rating', filter=Q(created_at__gte=week_ago)),
+            ).order_by()
+        }
+    else:
+        recent_by_spot = {
+            row['spot_id']: row['recent_rating']
+            for row in reviews_in_period.filter(spot__in=spots, created_at__gte=week_ago)
+            .values('spot_id').annotate(recent_rating=Avg('rating')).order_by()
+        }
+        stats_by_spot = {
+            spot_id: {**totals, 'recent_rating': recent_by_spot.get(spot_id)}
+            for spot_id, totals in spot_totals.items()
+        }
+
     for spot in spots:
-        # Основная статистика за период
-        reviews = Review.objects.filter(company=company, spot=spot)
-        if start_date:
-            reviews = reviews.filter(created_at__gte=start_date)
-        if end_date:
-            reviews = reviews.filter(created_at__lt=end_date)
-
-        total = reviews.count()
-        if total == 0:
+        stats = stats_by_spot.get(spot.id)
+        if not stats:
             continue
 
-        stats = reviews.aggregate(
-            avg_rating=Avg('rating'),
-            negative=Count('id', filter=Q(rating__lte=3))
-        )
-
+        total = stats['total']
         avg_rating = stats['avg_rating'] or 0
         negative_count = stats['negative'] or 0
         negative_pct = round(negative_count / total * 100) if total > 0 else 0
 
         # Тренд: сравниваем с предыдущей неделей
-        recent = reviews.filter(created_at__gte=week_ago)
-        recent_stats = recent.aggregate(avg_rating=Avg('rating'))
-        recent_rating = recent_stats['avg_rating']
+        recent_rating = stats['recent_rating']
 
         rating_delta = 0
         trend = 'stable'
@@ -73,17 +92,11 @@ def get_spots_comparison(
         # Для негативного тренда — собираем топ жалоб с количеством
         top_issues = []
         if trend == 'down':
+            recent = reviews_in_period.filter(spot=spot, created_at__gte=week_ago)
             if mode == 'ai':
                 top_issues = get_top_complaints_ai(recent, limit=3)
             else:
-                issue_counter = Counter()
-                for review in recent.filter(rating__lte=3).values('text'):
-                    issues = _extract_issues(review['text'], COMPLAINT_PATTERNS)
-                    issue_counter.update(issues)
-                top_issues = [
-                    {'label': label, 'count': count}
-                    for label, count in issue_counter.most_common(3)
-                ]
+                top_issues = get_top_complaints(recent, limit=3)
 
         results.append({
             'id': str(spot.id),
@@ -119,7 +132,22 @@ def get_simple_metrics(
             'total': 1897
         }
     """
-    total = reviews_qs.count()
+    stats = reviews_qs.aggregate(
+        total=Count('id'),
+        avg_rating=Avg('rating'),
+        negative=Count('id', filter=Q(rating__lte=3)),
+        positive=Count('id', filter=Q(rating__gte=4))
+    )
+    return simple_metrics_from_stats(stats, prev_reviews_qs)
+
+
+def simple_metrics_from_stats(stats: dict, prev_reviews_qs: QuerySet = None) -> dict:
+    """
+    Простые метрики по готовым итогам {'total', 'avg_rating', 'negative', 'positive'}.
+
+    Итоги берутся из запроса (get_simple_metrics) или из снимка «за всё время».
+    """
+    total = stats['total']
     if total == 0:
         return {
             'rating': 0, 'rating_trend': 'stable', 'rating_delta': 0,
@@ -127,12 +155,6 @@ def get_simple_metrics(
             'positive_count': 0, 'negative_count': 0
         }
 
-    stats = reviews_qs.aggregate(
-        avg_rating=Avg('rating'),
-        negative=Count('id', filter=Q(rating__lte=3)),
-        positive=Count('id', filter=Q(rating__gte=4))
-    )
-
     rating = round(stats['avg_rating'] or 0, 1)
     negative_count = stats['negative'] or 0
     positive_count = stats['positive'] or 0
@@ -1,13 +1,22 @@
 """
 Reviews-related business logic.
 """
-from datetime import timedelta
-
-from django.db.models import Avg, Count, Q, QuerySet
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.db.models import (
+    Avg, Case, Count, IntegerField, Q, QuerySet, Value, When, prefetch_related_objects,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from apps.companies.models import Company, Platform, Connection
-from apps.reviews.models import Review
+from apps.reviews.models import Review, ReviewMatch
+from apps.reviews.search import SEARCH_LIMIT, matching_reviews, search_reviews
 from apps.qr.models import QR
 from .alerts import PROBLEM_PATTERNS
 from .insights import COMPLAINT_PATTERNS, PRAISE_PATTERNS, SUBCATEGORY_MAP_REVERSE
@@ -50,63 +59,181 @@ def get_recent_reviews(company: Company, limit: int = 5) -> QuerySet:
     ).prefetch_related('photos').order_by('-created_at')[:limit]
 
 
-def get_review_counts(company: Company) -> dict:
-    """Get review counts for filter tabs."""
-    base = Review.objects.filter(company=company)
-    return {
-        'all': base.count(),
-        'new': base.filter(status='new').count(),
-        'negative': base.filter(rating__lte=3).count(),
-        'no_response': base.filter(response='').count(),
-        'complex': base.filter(tags_complex=True).count(),
-    }
+# === Список отзывов (keyset-пагинация) ===
+
+PAGE_SIZE = 50
 
+# Размер пачки при потоковой фильтрации в Python (категории, AI-причины)
+STREAM_CHUNK_SIZE = 200
 
-def filter_reviews_by_category(reviews_queryset, category: str) -> list:
+
+class ReviewPage:
     """
-    Filter reviews by category in Python.
+    Ленивая страница отзывов.
 
-    Note: This is a performance optimization. Instead of loading ALL reviews
-    and then filtering, we only load the reviews after DB-level filtering.
-    For PostgreSQL, this could be moved to JSON query.
+    Запрос выполняется при первом обращении к items/has_next/next_cursor
+    и выбирает не больше page_size + 1 подходящих отзывов (лишний — признак
+    следующей страницы). photos и history подгружаются только для страницы.
+    """
 
-    Args:
-        reviews_queryset: Django QuerySet (not yet evaluated)
-        category: Category to filter by
+    def __init__(self, rows: QuerySet | Iterable[Review], page_size: int = PAGE_SIZE):
+        self._rows = rows
+        self.page_size = page_size
+        self._items = None
+        self._has_next = False
+
+    def _fetch(self) -> list[Review]:
+        if self._items is None:
+            limit = self.page_size + 1
+            if isinstance(self._rows, QuerySet):
+                fetched = list(self._rows[:limit])
+            else:
+                fetched = list(islice(self._rows, limit))
+
+            self._has_next = len(fetched) > self.page_size
+            self._items = fetched[:self.page_size]
+            prefetch_related_objects(self._items, 'photos', 'history')
+        return self._items
+
+    @property
+    def items(self) -> list[Review]:
+        return self._fetch()
+
+    @property
+    def has_next(self) -> bool:
+        self._fetch()
+        return self._has_next
+
+    @property
+    def next_cursor(self) -> str | None:
+        """Курсор после последнего отзыва страницы (None — страница последняя)."""
+        if not self.has_next:
+            return None
+        return encode_review_cursor(self._items[-1])
+
+    def __iter__(self) -> Iterator[Review]:
+        return iter(self._fetch())
+
+    def __len__(self) -> int:
+        return len(self._fetch())
+
+    def __bool__(self) -> bool:
+        return bool(self._fetch())
+
+
+def encode_review_cursor(review: Review) -> str:
+    """Курсор: (место в поиске,) дата сортировки + id последнего отзыва страницы."""
+    payload = {'d': review.sort_date.isoformat(), 'id': str(review.id)}
+    if hasattr(review, 'search_rank'):
+        payload['r'] = review.search_rank
+    payload = json.dumps(payload)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str | None) -> tuple[datetime, uuid.UUID, int | None] | None:
+    """(дата сортировки, id, место в поиске) из курсора; None — курсора нет или он битый."""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return (
+            datetime.fromisoformat(payload['d']),
+            uuid.UUID(payload['id']),
+            int(payload['r']) if 'r' in payload else None,
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
 
-    Returns:
-        List of filtered reviews
+
+def _apply_cursor(reviews: QuerySet, cursor: str | None) -> QuerySet:
+    """Отзывы строго после курсора. Битый курсор — с начала списка."""
+    decoded = _decode_cursor(cursor)
+    if decoded is None:
+        return reviews
+    sort_date, review_id, rank = decoded
+
+    after = Q(sort_date__lt=sort_date) | Q(sort_date=sort_date, id__lt=review_id)
+    if rank is None or 'search_rank' not in reviews.query.annotations:
+        return reviews.filter(after)
+    return reviews.filter(Q(search_rank__gt=rank) | (Q(search_rank=rank) & after))
+
+
+def _search_windows(company: Company, reviews: QuerySet, search: str, offset: int) -> Iterator[QuerySet]:
+    """
+    Поиск по лемматизированному индексу (apps.reviews.search) + по названию точки.
+
+    Выдача поиска читается окнами по SEARCH_LIMIT, начиная с места offset;
+    каждое окно — QuerySet отзывов, помеченных search_rank (место в выдаче).
+    Совпавшие только по точке идут в последнем окне, после всей выдачи.
+    """
+    spot_ids = company.spots.filter(name__icontains=search).values('id')
+    while True:
+        ranked_ids = search_reviews(company.id, search, SEARCH_LIMIT, offset)
+        window = Q(id__in=ranked_ids)
+        exhausted = len(ranked_ids) < SEARCH_LIMIT
+        if exhausted:
+            spot_only = Q(spot_id__in=spot_ids)
+            matched = matching_reviews(company.id, search)
+            if matched is not None:
+                # Найденные по тексту уже были в выдаче со своим местом
+                spot_only &= ~Q(id__in=matched)
+            window |= spot_only
+
+        yield reviews.filter(window).annotate(search_rank=Case(
+            *[When(id=review_id, then=Value(offset + position)) for position, review_id in enumerate(ranked_ids)],
+            default=Value(offset + len(ranked_ids)),
+            output_field=IntegerField(),
+        ))
+        if exhausted:
+            return
+        offset += SEARCH_LIMIT
+
+
+def _review_tags(review: Review) -> list[dict]:
+    """Теги отзыва (только корректные словари)."""
+    if not review.tags or not isinstance(review.tags, list):
+        return []
+    return [tag for tag in review.tags if isinstance(tag, dict)]
+
+
+def filter_reviews_by_category(reviews_queryset: QuerySet, category: str) -> Iterator[Review]:
     """
-    # Load only necessary fields to reduce memory usage
-    reviews = reviews_queryset.only('id', 'tags', 'text', 'rating', 'created_at', 'author_name')
-
-    filtered = []
-    for review in reviews:
-        if review.tags and isinstance(review.tags, list):
-            for tag in review.tags:
-                if isinstance(tag, dict) and tag.get('category') == category:
-                    # Re-fetch full object only for matched reviews
-                    filtered.append(review)
-                    break
-
-    # Fetch full objects for matched IDs (single query)
-    if filtered:
-        review_ids = [r.id for r in filtered]
-        return list(reviews_queryset.filter(id__in=review_ids))
-    return []
-
-
-def filter_reviews(company: Company, params: dict) -> list:
+    Filter reviews by category in Python.
+
+    Теги — JSON-список, на SQLite по нему не отфильтровать, поэтому отзывы
+    читаются потоком пачками: итерация останавливается, как только
+    страница заполнена.
+    """
+    for review in reviews_queryset.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        if any(tag.get('category') == category for tag in _review_tags(review)):
+            yield review
+
+
+def filter_reviews(
+    company: Company,
+    params: dict,
+    page_size: int = PAGE_SIZE,
+) -> ReviewPage:
     """
     Filter reviews based on request parameters.
 
-    Optimized to minimize database queries by:
-    1. Using prefetch_related for related objects
-    2. Applying all DB-level filters before evaluation
-    3. Only converting to list at the very end
+    Returns a lazy ReviewPage ordered by Coalesce(platform_date, created_at), id
+    (newest first; with params['search'] — by relevance first).
+    params['cursor'] — курсор предыдущей страницы (next_cursor).
+    """
+    return ReviewPage(filter_review_rows(company, params), page_size)
+
+
+def filter_review_rows(company: Company, params: dict) -> QuerySet | Iterator[Review]:
     """
-    # Start with base queryset - NOT evaluated yet
-    reviews = Review.objects.filter(company=company).prefetch_related('photos', 'history')
+    Все отзывы, подходящие под фильтры списка, в порядке списка — без пагинации.
+
+    Returns:
+        QuerySet, если все фильтры выражаются в БД, иначе поток отзывов
+        (категории и AI-причины фильтруются в Python пачками, выдача
+        поиска читается окнами).
+    """
+    reviews = Review.objects.filter(company=company).select_related('spot')
 
     # Apply all DB-level filters (still not evaluated)
     source = params.get('source')
@@ -141,19 +268,43 @@ def filter_reviews(company: Company, params: dict) -> list:
     if sentiment:
         reviews = reviews.filter(sentiment=sentiment)
 
-    search = params.get('search')
+    # Точка (ссылки из аномалий в блоке «Требует внимания»); битый id игнорируется
+    spot_id = params.get('spot')
+    if spot_id:
+        try:
+            reviews = reviews.filter(spot_id=uuid.UUID(spot_id))
+        except ValueError:
+            pass
+
+    # Стабильный порядок для keyset-курсора: дата + id как тай-брейк
+    reviews = reviews.annotate(sort_date=Coalesce('platform_date', 'created_at'))
+
+    cursor = params.get('cursor')
+    search = params.get('search', '').strip()
     if search:
-        reviews = reviews.filter(
-            Q(text__icontains=search) |
-            Q(author_name__icontains=search) |
-            Q(spot__name__icontains=search)
-        )
+        # При поиске сначала — релевантность; курсор продолжает с его места в выдаче
+        decoded = _decode_cursor(cursor)
+        offset = max(decoded[2] or 0, 0) if decoded else 0
+        return _search_rows(company, reviews, search, offset, params)
+
+    reviews = _apply_cursor(reviews.order_by('-sort_date', '-id'), cursor)
+    return _filter_list_rows(company, reviews, params)
 
-    from django.db.models.functions import Coalesce
-    reviews = reviews.order_by(Coalesce('platform_date', 'created_at').desc())
 
+def _search_rows(company: Company, reviews: QuerySet, search: str, offset: int, params: dict) -> Iterator[Review]:
+    """Поток найденных отзывов под фильтры списка — окно выдачи за окном."""
+    for window in _search_windows(company, reviews, search, offset):
+        window = _apply_cursor(window.order_by('search_rank', '-sort_date', '-id'), params.get('cursor'))
+        rows = _filter_list_rows(company, window, params)
+        if isinstance(rows, QuerySet):
+            rows = rows.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        yield from rows
+
+
+def _filter_list_rows(company: Company, reviews: QuerySet, params: dict) -> QuerySet | Iterator[Review]:
+    """Фильтры списка поверх упорядоченных отзывов: категории, проблемы, причины."""
+    filter_type = params.get('filter')
     # Category filter requires Python iteration (SQLite limitation)
-    # But we optimize by only loading matched reviews
     category = params.get('category')
 
     # Если фильтр safety — это категория "Безопасность" для негативных отзывов
@@ -162,7 +313,7 @@ def filter_reviews(company: Company, params: dict) -> list:
         category = 'Безопасность'
 
     if category == 'complex':
-        return list(reviews.filter(tags_complex=True))
+        return reviews.filter(tags_complex=True)
     if category:
         return filter_reviews_by_category(reviews, category)
 
@@ -178,33 +329,23 @@ def filter_reviews(company: Company, params: dict) -> list:
         mode = company.analysis_mode
         return filter_reviews_by_insight(reviews, insight, insight_type, mode=mode)
 
-    # Only now evaluate the queryset to list
-    return list(reviews)
+    return reviews
 
 
-def filter_reviews_by_problem(reviews_queryset: QuerySet, problem_key: str) -> list:
+def filter_reviews_by_problem(reviews_queryset: QuerySet, problem_key: str) -> QuerySet:
     """
     Фильтрует отзывы по типу проблемы (паттернам из PROBLEM_PATTERNS).
-    """
-    # Находим паттерны для данного ключа
-    patterns = None
-    for problem in PROBLEM_PATTERNS:
-        if problem['key'] == problem_key:
-            patterns = problem['patterns']
-            break
-
-    if not patterns:
-        return list(reviews_queryset)
 
-    # Фильтруем по паттернам в тексте (все рейтинги — проблемы безопасности важны
-    # даже если гость поставил высокую оценку)
-    matched = []
-    for review in reviews_queryset:
-        text_lower = (review.text or '').lower()
-        if any(p in text_lower for p in patterns):
-            matched.append(review)
+    Использует предрасчитанные совпадения (ReviewMatch). Все рейтинги —
+    проблемы безопасности важны, даже если гость поставил высокую оценку.
+    """
+    if not any(problem['key'] == problem_key for problem in PROBLEM_PATTERNS):
+        return reviews_queryset
 
-    return matched
+    return reviews_queryset.filter(
+        matches__kind=ReviewMatch.Kind.PROBLEM,
+        matches__key=problem_key,
+    )
 
 
 def filter_reviews_by_insight(
@@ -212,7 +353,7 @@ def filter_reviews_by_insight(
     label: str,
     insight_type: str = 'complaint',
     mode: str = 'basic',
-) -> list:
+) -> QuerySet | Iterator[Review]:
     """
     Фильтрует отзывы по причине (жалобе или похвале).
 
@@ -223,7 +364,7 @@ def filter_reviews_by_insight(
         mode: 'basic' (паттерны) или 'ai' (по tags subcategory)
 
     Returns:
-        Список отфильтрованных отзывов
+        QuerySet (basic) или поток отзывов (ai — фильтр по тегам в Python)
     """
     # Фильтруем по рейтингу
     if insight_type == 'complaint':
@@ -235,37 +376,26 @@ def filter_reviews_by_insight(
         # AI-режим: ищем по subcategory в tags
         target_subcategories = SUBCATEGORY_MAP_REVERSE.get(label, [])
         if not target_subcategories:
-            return list(reviews_queryset)
+            return reviews_queryset
 
         target_sentiment = 'negative' if insight_type == 'complaint' else 'positive'
-        matched = []
-        for review in reviews_queryset:
-            tags = review.tags
-            if not tags or not isinstance(tags, list):
-                continue
-            for tag in tags:
-                if (
-                    isinstance(tag, dict)
-                    and tag.get('subcategory') in target_subcategories
-                    and tag.get('sentiment') == target_sentiment
-                ):
-                    matched.append(review)
-                    break
-        return matched
-
-    # basic-режим: паттерны в тексте
-    patterns_dict = COMPLAINT_PATTERNS if insight_type == 'complaint' else PRAISE_PATTERNS
-    matching_patterns = [p for p, l in patterns_dict.items() if l == label]
-    if not matching_patterns:
-        return list(reviews_queryset)
+        return (
+            review
+            for review in reviews_queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+            if any(
+                tag.get('subcategory') in target_subcategories
+                and tag.get('sentiment') == target_sentiment
+                for tag in _review_tags(review)
+            )
+        )
 
-    matched = []
-    for review in reviews_queryset:
-        text_lower = (review.text or '').lower()
-        if any(p in text_lower for p in matching_patterns):
-            matched.append(review)
+    # basic-режим: предрасчитанные совпадения с паттернами
+    patterns_dict = COMPLAINT_PATTERNS if insight_type == 'complaint' else PRAISE_PATTERNS
+    if label not in patterns_dict.values():
+        return reviews_queryset
 
-    return matched
+    kind = ReviewMatch.Kind.COMPLAINT if insight_type == 'complaint' else ReviewMatch.Kind.PRAISE
+    return reviews_queryset.filter(matches__kind=kind, matches__key=label)
 
 
 def update_feedback_settings(
@@ -0,0 +1,167 @@
+"""
+Снимок «за всё время»: предрасчитанные итоги истории компании.
+
+Период 'all' — значение по умолчанию, и без снимка каждый его виджет
+сканирует всю историю. Ночная задача сохраняет складываемые суммы по
+отзывам до начала дня (CompanyAllTimeSnapshot); при чтении к ним
+прибавляются суммы отзывов после built_through — это выборка по индексу
+за часы, а не годы. Результат кэшируется по версии данных компании и
+общий для всех виджетов периода.
+
+Изменение или удаление отзыва, уже учтённого в снимке, помечает снимок
+устаревшим (apps/reviews/signals.py): до пересборки виджеты считают
+период по БД, как без снимка.
+"""
+import logging
+import time
+from datetime import datetime, time as dt_time
+
+from django.core.cache import cache
+from django.db.models import Count, Q, QuerySet, Sum
+from django.utils import timezone
+
+from apps.companies.models import Company
+from apps.reviews.models import Review, ReviewMatch
+
+from ..models import CompanyAllTimeSnapshot
+from .cache import CACHE_TIMEOUT, make_context_key
+from .charts import count_heatmap
+from .insights import count_insights
+
+logger = logging.getLogger(__name__)
+
+# Поля отзыва, от которых зависят итоги снимка
+SNAPSHOT_FIELDS = {'rating', 'tags', 'tags_complex', 'spot', 'text', 'platform_date', 'created_at'}
+
+TOTAL_FIELDS = ('total', 'rating_sum', 'negative', 'positive', 'tagged', 'complex')
+
+
+def compute_partials(reviews: QuerySet, mode: str) -> dict:
+    """Складываемые суммы по набору отзывов (формат CompanyAllTimeSnapshot.data)."""
+    totals = reviews.aggregate(
+        total=Count('id'),
+        rating_sum=Sum('rating', default=0),
+        negative=Count('id', filter=Q(rating__lte=3)),
+        positive=Count('id', filter=Q(rating__gte=4)),
+        tagged=Count('id', filter=~Q(tags=[])),
+        complex=Count('id', filter=Q(tags_complex=True)),
+    )
+    if not totals['total']:
+        return {'mode': mode, **totals}
+
+    spots = {
+        str(row['spot_id']): [row['total'], row['rating_sum'], row['negative']]
+        for row in reviews.filter(spot__isnull=False).values('spot_id').annotate(
+            total=Count('id'),
+            rating_sum=Sum('rating'),
+            negative=Count('id', filter=Q(rating__lte=3)),
+        ).order_by()
+    }
+    return {
+        'mode': mode,
+        **totals,
+        'spots': spots,
+        'heatmap': count_heatmap(reviews),
+        'complaints': count_insights(reviews, ReviewMatch.Kind.COMPLAINT, mode),
+        'praises': count_insights(reviews, ReviewMatch.Kind.PRAISE, mode),
+    }
+
+
+def merge_partials(base: dict, extra: dict) -> dict:
+    """Сумма двух наборов сумм (снимок + отзывы после него)."""
+    merged = {'mode': base['mode']}
+    for name in TOTAL_FIELDS:
+        merged[name] = base.get(name, 0) + extra.get(name, 0)
+
+    spots = {spot_id: list(values) for spot_id, values in base.get('spots', {}).items()}
+    for spot_id, values in extra.get('spots', {}).items():
+        current = spots.setdefault(spot_id, [0, 0, 0])
+        spots[spot_id] = [a + b for a, b in zip(current, values)]
+    merged['spots'] = spots
+
+    empty = {name: [[0] * 24 for _ in range(7)] for name in ('counts', 'negative', 'rating_sum')}
+    base_heatmap = base.get('heatmap', empty)
+    extra_heatmap = extra.get('heatmap', empty)
+    merged['heatmap'] = {
+        name: [
+            [a + b for a, b in zip(base_row, extra_row)]
+            for base_row, extra_row in zip(base_heatmap[name], extra_heatmap[name])
+        ]
+        for name in empty
+    }
+
+    for name in ('complaints', 'praises'):
+        counts = dict(base.get(name, {}))
+        for label, count in extra.get(name, {}).items():
+            counts[label] = counts.get(label, 0) + count
+        merged[name] = counts
+    return merged
+
+
+def build_all_time_snapshot(company: Company) -> CompanyAllTimeSnapshot:
+    """Пересчитать снимок по отзывам до начала сегодняшнего дня."""
+    started = time.monotonic()
+    built_through = timezone.make_aware(datetime.combine(timezone.localdate(), dt_time.min))
+    reviews = Review.objects.filter(company=company, created_at__lt=built_through)
+    data = compute_partials(reviews, company.analysis_mode)
+    build_ms = round((time.monotonic() - started) * 1000)
+
+    snapshot, _ = CompanyAllTimeSnapshot.objects.update_or_create(
+        company=company,
+        defaults={
+            'data': data,
+            'built_through': built_through,
+            'is_stale': False,
+            'computed_at': timezone.now(),
+            'build_ms': build_ms,
+        },
+    )
+    logger.info(
+        'All-time snapshot for %s: %d reviews in %d ms',
+        company.id, data['total'], build_ms,
+    )
+    return snapshot
+
+
+def get_all_time_partials(company: Company) -> dict | None:
+    """
+    Суммы «за всё время» на текущий момент: снимок + отзывы после него.
+
+    Returns:
+        None, если снимка нет, он устарел или посчитан в другом режиме
+        анализа — тогда период считается по БД.
+    """
+    key = make_context_key(company.id, {
+        'view': 'all_time',
+        'mode': company.analysis_mode,
+        'today': timezone.localdate().isoformat(),
+    })
+    partials = cache.get(key)
+    if partials is None:
+        partials = _compute_all_time_partials(company)
+        if partials is not None:
+            cache.set(key, partials, CACHE_TIMEOUT)
+    return partials
+
+
+def _compute_all_time_partials(company: Company) -> dict | None:
+    snapshot = (
+        CompanyAllTimeSnapshot.objects
+        .filter(company=company, is_stale=False)
+        .only('data', 'built_through')
+        .first()
+    )
+    if snapshot is None or snapshot.data.get('mode') != company.analysis_mode:
+        return None
+
+    recent = Review.objects.filter(company=company, created_at__gte=snapshot.built_through)
+    return merge_partials(snapshot.data, compute_partials(recent, company.analysis_mode))
+
+
+def mark_all_time_snapshot_stale(review: Review) -> None:
+    """Пометить снимок устаревшим, если отзыв уже в нём учтён."""
+    CompanyAllTimeSnapshot.objects.filter(
+        company_id=review.company_id,
+        built_through__gt=review.created_at,
+        is_stale=False,
+    ).update(is_stale=True)
@@ -0,0 +1,246 @@
+"""
+Виджеты дашборда: независимые блоки главной страницы.
+
+Каждый виджет считается и кэшируется отдельно (ключ — виджет, фильтры и
+версия данных компании), поэтому медленный блок не задерживает остальные.
+Страница-оболочка загружает виджеты параллельно через JSON-эндпоинты.
+"""
+import hashlib
+import uuid
+from typing import Any, Callable
+
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from apps.companies.models import Company
+from apps.reviews.models import Review
+
+from .alert_engine import get_alert_snapshot
+from .alerts import build_priority_alerts, has_critical_alerts
+from .anomalies import build_anomaly_alerts
+from .analytics import (
+    TREND_TOOLTIPS,
+    _filter_reviews_by_period,
+    _get_previous_reviews,
+)
+from .cache import get_or_compute, make_context_key
+from .charts import build_heatmap, get_daily_reviews, get_review_heatmap
+from .company import get_company_connections
+from .counters import count_tagged_reviews
+from .insights import (
+    get_top_complaints,
+    get_top_praises,
+    get_top_complaints_ai,
+    get_top_praises_ai,
+    top_insights,
+)
+from .metrics import get_spots_comparison, get_simple_metrics, simple_metrics_from_stats
+from .periods import get_period_dates, get_days_count
+from .snapshots import get_all_time_partials
+
+
+def _period_reviews(company: Company, filters: dict) -> tuple:
+    """Отзывы текущего и предыдущего периода с учётом выбранных точек."""
+    start_date, prev_start, prev_end, end_date = get_period_dates(
+        filters['period'], filters['date_from'], filters['date_to']
+    )
+    reviews = _filter_reviews_by_period(company, start_date, end_date)
+    prev_reviews = _get_previous_reviews(company, prev_start, prev_end, start_date)
+
+    selected_spot_ids = filters['selected_spot_ids']
+    if selected_spot_ids:
+        reviews = reviews.filter(spot_id__in=selected_spot_ids)
+        prev_reviews = prev_reviews.filter(spot_id__in=selected_spot_ids)
+
+    return reviews, prev_reviews
+
+
+def _all_time_partials(company: Company, filters: dict) -> dict | None:
+    """Итоги «за всё время» из снимка (None — считать по БД)."""
+    if filters['period'] != 'all' or filters['selected_spot_ids']:
+        return None
+    return get_all_time_partials(company)
+
+
+def _alerts_widget(company: Company, filters: dict) -> dict:
+    """Приоритетные проблемы и аномалии точек (не зависят от периода)."""
+    snapshot = get_alert_snapshot(company)
+    priority_alerts = build_priority_alerts(snapshot.problems, limit=3)
+    return {
+        'priority_alerts': priority_alerts,
+        'anomaly_alerts': build_anomaly_alerts(snapshot.anomalies),
+        'has_critical': has_critical_alerts(priority_alerts),
+    }
+
+
+def _metrics_widget(company: Company, filters: dict) -> dict:
+    """Простые метрики с трендами и рейтинг платформы."""
+    reviews, prev_reviews = _period_reviews(company, filters)
+    partials = _all_time_partials(company, filters)
+    if partials is not None:
+        total = partials['total']
+        metrics = simple_metrics_from_stats({
+            'total': total,
+            'avg_rating': partials['rating_sum'] / total if total else None,
+            'negative': partials['negative'],
+            'positive': partials['positive'],
+        }, prev_reviews)
+    else:
+        metrics = get_simple_metrics(reviews, prev_reviews)
+
+    yandex_conn = get_company_connections(company).get('yandex')
+    return {
+        'metrics': metrics,
+        'trend_tooltip': TREND_TOOLTIPS.get(filters['period'], ''),
+        'yandex_rating': yandex_conn.platform_rating if yandex_conn else None,
+        'yandex_review_count': yandex_conn.platform_review_count if yandex_conn else None,
+    }
+
+
+def _insights_widget(company: Company, filters: dict) -> dict:
+    """Топ жалоб и похвал за период."""
+    partials = _all_time_partials(company, filters)
+    if partials is not None:
+        return {
+            'complaints': top_insights(partials['complaints']),
+            'praises': top_insights(partials['praises']),
+            'analyzed_count': partials['tagged'] - partials['complex'],
+            'total_with_tags': partials['tagged'],
+            'complex_count': partials['complex'],
+        }
+
+    reviews, _ = _period_reviews(company, filters)
+    if company.analysis_mode == 'ai':
+        complaints = get_top_complaints_ai(reviews, limit=5)
+        praises = get_top_praises_ai(reviews, limit=5)
+    else:
+        complaints = get_top_complaints(reviews, limit=5)
+        praises = get_top_praises(reviews, limit=5)
+
+    # Счётчики для сложных отзывов (один запрос)
+    tag_counts = count_tagged_reviews(reviews)
+
+    return {
+        'complaints': complaints,
+        'praises': praises,
+        'analyzed_count': tag_counts['total_with_tags'] - tag_counts['complex_count'],
+        **tag_counts,
+    }
+
+
+def _spots_widget(company: Company, filters: dict) -> dict:
+    """Сравнение по точкам за период."""
+    start_date, _, _, end_date = get_period_dates(
+        filters['period'], filters['date_from'], filters['date_to']
+    )
+    spot_totals = None
+    partials = _all_time_partials(company, filters)
+    if partials is not None:
+        spot_totals = {
+            uuid.UUID(spot_id): {
+                'total': total,
+                'avg_rating': rating_sum / total,
+                'negative': negative,
+            }
+            for spot_id, (total, rating_sum, negative) in partials['spots'].items()
+        }
+    return {
+        'spots': get_spots_comparison(
+            company, start_date, end_date, mode=company.analysis_mode,
+            spot_totals=spot_totals,
+        ),
+    }
+
+
+def _chart_widget(company: Company, filters: dict) -> dict:
+    """Динамика отзывов по дням."""
+    period = filters['period']
+    date_from, date_to = filters['date_from'], filters['date_to']
+    days_count = get_days_count(period, date_from, date_to)
+    return {
+        'daily_data': get_daily_reviews(
+            company, days_count, period, date_from, date_to,
+            spot_ids=filters['selected_spot_ids'] or None,
+        ),
+    }
+
+
+def _heatmap_widget(company: Company, filters: dict) -> dict:
+    """Отзывы по дням недели и часам за период."""
+    partials = _all_time_partials(company, filters)
+    if partials is not None:
+        heatmap = build_heatmap(partials['heatmap'])
+    else:
+        # Период — по той же дате, по которой отзыв попадает в ячейку
+        start_date, _, _, end_date = get_period_dates(
+            filters['period'], filters['date_from'], filters['date_to']
+        )
+        reviews = Review.objects.filter(company=company)
+        if filters['selected_spot_ids']:
+            reviews = reviews.filter(spot_id__in=filters['selected_spot_ids'])
+        heatmap = get_review_heatmap(reviews, start_date, end_date)
+
+    # Насыщенность ячейки — доля от самой загруженной (0.15 … 1)
+    max_count = max(map(max, heatmap['counts'])) or 1
+    rows = [
+        {
+            'day': day,
+            'cells': [
+                {
+                    'hour': hour,
+                    'count': heatmap['counts'][i][hour],
+                    'negative_share': heatmap['negative_share'][i][hour],
+                    'avg_rating': heatmap['avg_rating'][i][hour],
+                    'intensity': round(0.15 + 0.85 * heatmap['counts'][i][hour] / max_count, 2),
+                }
+                for hour in heatmap['hours']
+            ],
+        }
+        for i, day in enumerate(heatmap['days'])
+    ]
+    return {'heatmap': heatmap, 'heatmap_rows': rows}
+
+
+WIDGETS: dict[str, Callable[[Company, dict], dict]] = {
+    'alerts': _alerts_widget,
+    'metrics': _metrics_widget,
+    'insights': _insights_widget,
+    'spots': _spots_widget,
+    'chart': _chart_widget,
+    'heatmap': _heatmap_widget,
+}
+
+# Данные виджета, которые отдаются в JSON для отрисовки на клиенте
+WIDGET_JSON_DATA = {'chart': 'daily_data', 'heatmap': 'heatmap'}
+
+
+def get_widget_cache_key(company: Company, name: str, filters: dict) -> str:
+    """Ключ кэша виджета (меняется вместе с версией данных компании)."""
+    return make_context_key(company.id, {
+        'widget': name,
+        'period': filters['period'],
+        'date_from': filters['date_from'],
+        'date_to': filters['date_to'],
+        'spots': ','.join(sorted(str(s) for s in filters['selected_spot_ids'])),
+        'mode': company.analysis_mode,
+        'today': timezone.localdate().isoformat(),
+    })
+
+
+def get_widget_etag(cache_key: str) -> str:
+    """ETag виджета: совпадает, пока не изменились данные и фильтры."""
+    return quote_etag(hashlib.md5(cache_key.encode('utf-8')).hexdigest())
+
+
+def get_widget_data(company: Company, name: str, filters: dict, cache_key: str) -> dict[str, Any]:
+    """
+    Данные виджета из кэша или вычисленные заново.
+
+    Returns:
+        Словарь блока + 'computed_at' (для Last-Modified).
+    """
+    compute = WIDGETS[name]
+    return get_or_compute(cache_key, lambda: {
+        **compute(company, filters),
+        'computed_at': timezone.now(),
+    })
@@ -0,0 +1,29 @@
+"""Signals invalidating cached memberships and connections."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import Member
+from apps.companies.models import Company, Connection
+
+from .services.company import invalidate_company_connections, invalidate_user_memberships
+
+
+@receiver([post_save, post_delete], sender=Member)
+def member_changed(sender, instance, **kwargs):
+    """Role, activity or company of a membership changed."""
+    invalidate_user_memberships([instance.user_id])
+
+
+@receiver(post_save, sender=Company)
+def company_changed(sender, instance, created, **kwargs):
+    """Cached memberships hold company objects: refresh them for all members."""
+    if created:
+        return
+    user_ids = Member.objects.filter(company=instance).values_list('user_id', flat=True)
+    invalidate_user_memberships(list(user_ids))
+
+
+@receiver([post_save, post_delete], sender=Connection)
+def connection_changed(sender, instance, **kwargs):
+    invalidate_company_connections(instance.company_id)
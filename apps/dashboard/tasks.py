@@ -0,0 +1,139 @@
+"""Celery tasks for dashboard derived data."""
+
+import logging
+
+from celery import shared_task
+
+from apps.companies.models import Company
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_alert_snapshots():
+    """
+    Refresh alert window snapshots for all active companies.
+
+    Windows slide by date, so snapshots are recomputed even without new
+    reviews. Scheduled hourly via Celery Beat.
+    """
+    from .services.alert_engine import refresh_alert_snapshot
+
+    count = 0
+    for company in Company.objects.filter(is_active=True).iterator():
+        refresh_alert_snapshot(company)
+        count += 1
+
+    logger.info(f'Refreshed alert snapshots for {count} companies')
+    return count
+
+
+@shared_task
+def rebuild_alert_counters():
+    """
+    Rebuild daily alert counters from review matches and prune old days.
+
+    Corrects any drift of incremental updates. Scheduled nightly.
+    """
+    from .services.alert_engine import prune_daily_counts, rebuild_alert_counters as rebuild
+
+    count = 0
+    for company in Company.objects.filter(is_active=True).iterator():
+        rebuild(company)
+        count += 1
+
+    pruned = prune_daily_counts()
+    logger.info(f'Rebuilt alert counters for {count} companies, pruned {pruned} rows')
+    return count
+
+
+@shared_task
+def detect_review_anomalies():
+    """
+    Detect spikes in per-spot daily review series for all active companies.
+
+    Results are stored on the alert snapshot and shown in the alerts block.
+    Scheduled hourly via Celery Beat, after the snapshot refresh.
+    """
+    from .services.anomalies import refresh_anomalies
+
+    count = 0
+    found = 0
+    for company in Company.objects.filter(is_active=True).iterator():
+        found += len(refresh_anomalies(company))
+        count += 1
+
+    logger.info(f'Checked {count} companies for anomalies, found {found}')
+    return found
+
+
+@shared_task
+def build_all_time_snapshots():
+    """
+    Rebuild the precomputed all-time snapshot of every active company.
+
+    The 'all' period reads the snapshot plus reviews created since its
+    cutoff, so the per-request scan stays a day deep. Scheduled nightly.
+    """
+    from .services.snapshots import build_all_time_snapshot
+
+    count = 0
+    build_ms = 0
+    for company in Company.objects.filter(is_active=True).iterator():
+        build_ms += build_all_time_snapshot(company).build_ms
+        count += 1
+
+    logger.info(f'Built all-time snapshots for {count} companies in {build_ms} ms')
+    return count
+
+
+@shared_task
+def rebuild_stale_all_time_snapshots():
+    """
+    Rebuild all-time snapshots invalidated by edits or deletions of old reviews.
+
+    Until rebuilt, such companies fall back to scanning the full history.
+    """
+    from .models import CompanyAllTimeSnapshot
+    from .services.snapshots import build_all_time_snapshot
+
+    count = 0
+    stale = CompanyAllTimeSnapshot.objects.filter(is_stale=True, company__is_active=True)
+    for snapshot in stale.select_related('company').iterator():
+        build_all_time_snapshot(snapshot.company)
+        count += 1
+
+    if count:
+        logger.info(f'Rebuilt {count} stale all-time snapshots')
+    return count
+
+
+@shared_task
+def export_reviews(company_id, params, fmt, export_id):
+    """
+    Write a filtered reviews export to a file for later download.
+
+    Used for XLSX and for exports too large to stream from a request.
+    A failure is marked next to the file, so the download page stops
+    waiting. Also removes expired export files.
+    """
+    from .services.export import (
+        get_export_path, mark_export_failed, prune_exports, write_export_file,
+    )
+
+    path = get_export_path(company_id, export_id, fmt)
+    company = Company.objects.filter(id=company_id).first()
+    if company is None:
+        logger.warning(f'Export {export_id}: company {company_id} not found')
+        mark_export_failed(path, 'Company not found')
+        return 0
+
+    prune_exports()
+    try:
+        count = write_export_file(company, params, fmt, path)
+    except Exception as e:
+        logger.exception(f'Export {export_id} failed')
+        mark_export_failed(path, str(e) or type(e).__name__)
+        raise
+    logger.info(f'Export {export_id}: {count} reviews written to {path}')
+    return count
@@ -0,0 +1,60 @@
+"""Test helpers for dashboard query budgets and media files."""
+import tempfile
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+class _AssertMaxQueriesContext(CaptureQueriesContext):
+    def __init__(self, test_case, num, connection):
+        self.test_case = test_case
+        self.num = num
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        self.test_case.assertLessEqual(
+            executed, self.num,
+            '%d queries executed, at most %d expected\nCaptured queries were:\n%s' % (
+                executed, self.num,
+                '\n'.join(
+                    '%d. %s' % (i, query['sql'])
+                    for i, query in enumerate(self.captured_queries, start=1)
+                ),
+            ),
+        )
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin: верхняя граница числа SQL-запросов.
+
+    В отличие от assertNumQueries не ломается от удаления лишнего запроса,
+    но ловит N+1 — бюджет задаётся для данных с несколькими объектами.
+
+        with self.assertMaxQueries(12):
+            self.client.get(url)
+    """
+
+    def assertMaxQueries(self, num, using=DEFAULT_DB_ALIAS):
+        return _AssertMaxQueriesContext(self, num, connections[using])
+
+
+class TempMediaMixin:
+    """
+    TestCase mixin: файлы (картинки QR) пишутся во временный MEDIA_ROOT,
+    который удаляется после тестов класса, а не в media/ проекта.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        cls.addClassCleanup(media_settings.disable)
+        super().setUpClass()
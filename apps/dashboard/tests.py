@@ -6,12 +6,15 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
+from pathlib import Path
 
 from apps.accounts.models import User, Member
 from apps.companies.models import Company, Spot
 from apps.qr.models import QR
 from apps.reviews.models import Review
 
+from .testing import QueryBudgetMixin, TempMediaMixin
+
 
 class DashboardAccessTests(TestCase):
     """Tests for dashboard access control."""
@@ -49,7 +52,7 @@ class DashboardAccessTests(TestCase):
         self.assertContains(response, self.company.name)
 
 
-class DashboardQRManagementTests(TestCase):
+class DashboardQRManagementTests(TempMediaMixin, TestCase):
     """Tests for QR management in dashboard."""
 
     def setUp(self):
@@ -253,7 +256,7 @@ class OAuthIntegrationTests(TestCase):
         self.assertFalse(can_auto_link_oauth(user))
 
 
-class DashboardDataIntegrityTests(TestCase):
+class DashboardDataIntegrityTests(TempMediaMixin, TestCase):
     """Tests for data integrity across dashboard operations."""
 
     def setUp(self):
@@ -340,7 +343,7 @@ class DashboardDataIntegrityTests(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
-class DashboardPerformanceTests(TestCase):
+class DashboardPerformanceTests(QueryBudgetMixin, TestCase):
     """Tests for dashboard performance and N+1 query issues."""
 
     def setUp(self):
@@ -357,17 +360,32 @@ class DashboardPerformanceTests(TestCase):
         )
         self.client.login(email='perf@test.com', password='pass123')
 
+    def _create_spots_with_reviews(self, spots=8, per_spot=3):
+        from apps.reviews.models import ReviewPhoto
+
+        for i in range(spots):
+            spot = Spot.objects.create(company=self.company, name=f'Точка {i}')
+            for j in range(per_spot):
+                review = Review.objects.create(
+                    company=self.company, spot=spot, rating=1 + (i + j) % 5,
+                    text='Долго ждали, официант грубил' if j % 2 else 'Всё вкусно',
+                )
+                ReviewPhoto.objects.create(review=review, image='reviews/photo.jpg')
+
     def test_dashboard_with_many_qr_codes(self):
         """Dashboard should handle many QR codes efficiently."""
+        spot = Spot.objects.create(company=self.company, name='Стол 1')
         # Create 50 QR codes
         for i in range(50):
             QR.objects.create(
                 company=self.company,
+                spot=spot if i % 2 else None,
                 created_by=self.user
             )
 
         # Dashboard should still load fast
-        response = self.client.get(reverse('dashboard:qr'))
+        with self.assertMaxQueries(6):
+            response = self.client.get(reverse('dashboard:qr'))
         self.assertEqual(response.status_code, 200)
 
         # Should have all QR codes
@@ -385,5 +403,1250 @@ class DashboardPerformanceTests(TestCase):
                 author_name=f'User {i}'
             )
 
-        response = self.client.get(reverse('dashboard:index'))
+        with self.assertMaxQueries(5):
+            response = self.client.get(reverse('dashboard:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_reviews_list_query_budget(self):
+        """Spots, photos and history of listed reviews should be batch-loaded."""
+        self._create_spots_with_reviews()
+
+        with self.assertMaxQueries(10):
+            response = self.client.get(reverse('dashboard:reviews'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['reviews']), 24)
+
+    def test_widgets_query_budget(self):
+        """Widget queries should not grow with the number of spots."""
+        from apps.dashboard.services.alert_engine import get_alert_snapshot
+
+        self._create_spots_with_reviews()
+        get_alert_snapshot(self.company)
+
+        budgets = {'alerts': 6, 'metrics': 9, 'insights': 8, 'spots': 7, 'chart': 7, 'heatmap': 6}
+        for name, budget in budgets.items():
+            with self.subTest(widget=name), self.assertMaxQueries(budget):
+                response = self.client.get(reverse('dashboard:widget', args=[name]))
+                self.assertEqual(response.status_code, 200)
+
+        spots = self.client.get(reverse('dashboard:widget', args=['spots'])).json()
+        self.assertEqual(spots['html'].count('Точка '), 8)
+
+    def test_query_budget_middleware(self):
+        """Opt-in middleware should report SQL stats in Server-Timing and logs."""
+        from django.test import override_settings
+
+        with override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET=1):
+            client = Client()
+            client.login(email='perf@test.com', password='pass123')
+            with self.assertLogs('apps.dashboard.middleware', 'INFO') as logs:
+                response = client.get(reverse('dashboard:qr'))
+
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries", app;dur=')
+        record = logs.records[-1]
+        self.assertEqual(record.levelname, 'WARNING')
+        self.assertGreater(record.queries, 1)
+        self.assertTrue(record.slowest[0]['sql'])
+
+        # Выключено по умолчанию
+        self.assertNotIn('Server-Timing', self.client.get(reverse('dashboard:qr')))
+
+
+class CompanyContextTests(TestCase):
+    """Tests for the per-request company context and membership cache."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = User.objects.create_user(email='ctx@test.com', password='pass123')
+        self.company = Company.objects.create(name='Context Co')
+        self.member = Member.objects.create(
+            user=self.user, company=self.company, role=Member.Role.VIEWER
+        )
+        Review.objects.create(company=self.company, rating=4, text='Неплохо')
+        self.client.login(email='ctx@test.com', password='pass123')
+
+    def _member_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in ctx if 'accounts_member' in q['sql']], response
+
+    def test_memberships_loaded_once_and_cached(self):
+        url = reverse('dashboard:reviews')
+
+        first, _ = self._member_queries(url)
+        second, _ = self._member_queries(url)
+
+        # Компания и роль из одного запроса членств, повторная страница — из кэша
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+
+    def test_role_change_invalidates(self):
+        url = reverse('dashboard:reviews')
+        self.assertFalse(self.client.get(url).context['can_respond'])
+
+        self.member.role = Member.Role.MANAGER
+        self.member.save()
+
+        self.assertTrue(self.client.get(url).context['can_respond'])
+
+    def test_company_rename_invalidates(self):
+        self.client.get(reverse('dashboard:reviews'))
+
+        self.company.name = 'Renamed Co'
+        self.company.save()
+
+        self.assertContains(self.client.get(reverse('dashboard:reviews')), 'Renamed Co')
+
+    def test_connections_cached_without_tokens(self):
+        from apps.companies.models import Connection, Platform
+        from apps.dashboard.services import get_company_connections
+
+        platform, _ = Platform.objects.get_or_create(id='yandex', defaults={'name': 'Яндекс'})
+        Connection.objects.create(
+            company=self.company, platform=platform, external_id='1', access_token='secret',
+        )
+        get_company_connections(self.company)
+
+        with self.assertNumQueries(0):
+            connection = get_company_connections(self.company)['yandex']
+        self.assertIn('access_token', connection.get_deferred_fields())
+
+        connection.platform_review_count = 120
+        connection.save()
+        self.assertEqual(get_company_connections(self.company)['yandex'].platform_review_count, 120)
+
+
+class ReviewMatchTests(TestCase):
+    """Tests for write-time pattern matching (ReviewMatch)."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Match Test')
+        self.spot = Spot.objects.create(company=self.company, name='Терраса')
+
+    def test_matches_created_on_save(self):
+        """Saving a review should store problem, complaint and praise matches."""
+        from apps.reviews.models import ReviewMatch
+
+        review = Review.objects.create(
+            company=self.company, spot=self.spot, rating=2,
+            text='Видели таракана, очень долго несли заказ',
+        )
+
+        matches = set(review.matches.values_list('kind', 'key'))
+        self.assertIn((ReviewMatch.Kind.PROBLEM, 'insects'), matches)
+        self.assertIn((ReviewMatch.Kind.PROBLEM, 'long_wait'), matches)
+        self.assertIn((ReviewMatch.Kind.COMPLAINT, 'Долгое ожидание'), matches)
+
+    def test_matches_follow_text_changes(self):
+        """Changing review text should re-match patterns."""
+        review = Review.objects.create(
+            company=self.company, rating=2, text='Нашли таракана',
+        )
+        review.text = 'Всё было вкусно'
+        review.save()
+
+        keys = set(review.matches.values_list('key', flat=True))
+        self.assertNotIn('insects', keys)
+        self.assertIn('Вкусная еда', keys)
+
+    def test_priority_alerts_use_matches(self):
+        """Priority alerts should aggregate stored matches by window."""
+        from apps.dashboard.services import get_priority_alerts
+        from apps.dashboard.services.alert_engine import rebuild_alert_counters
+
+        Review.objects.create(
+            company=self.company, spot=self.spot, rating=1, text='Отравление после ужина',
+        )
+        old = Review.objects.create(
+            company=self.company, rating=1, text='Отравление',
+        )
+        Review.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=300))
+        old.matches.update(review_created_at=timezone.now() - timedelta(days=300))
+        rebuild_alert_counters(self.company)
+
+        alerts = get_priority_alerts(self.company)
+
+        self.assertEqual(len(alerts), 1)
+        alert = alerts[0]
+        self.assertEqual(alert['key'], 'poisoning')
+        self.assertEqual(alert['count'], 1)
+        self.assertEqual(alert['trend'], 'stable')
+        self.assertEqual(alert['spots'][0]['name'], 'Терраса')
+
+    def test_top_complaints_and_filters(self):
+        """Top complaints and review filters should read stored matches."""
+        from apps.dashboard.services import filter_reviews, get_top_complaints
+
+        slow = Review.objects.create(company=self.company, rating=2, text='Очень долго ждали')
+        Review.objects.create(company=self.company, rating=5, text='Долго, но вкусно')
+
+        reviews = Review.objects.filter(company=self.company)
+        self.assertEqual(
+            get_top_complaints(reviews),
+            [{'label': 'Долгое ожидание', 'count': 1}],
+        )
+        self.assertEqual(
+            list(filter_reviews(self.company, {'problem': 'long_wait'})), [slow],
+        )
+        self.assertEqual(
+            list(filter_reviews(self.company, {'insight': 'Долгое ожидание'})), [slow],
+        )
+
+    def test_rebuild_command(self):
+        """rebuild_review_matches should restore missing matches."""
+        from io import StringIO
+        from django.core.management import call_command
+        from apps.reviews.models import ReviewMatch
+
+        Review.objects.create(company=self.company, rating=1, text='Нашли таракана')
+        ReviewMatch.objects.all().delete()
+
+        call_command('rebuild_review_matches', stdout=StringIO())
+
+        self.assertTrue(ReviewMatch.objects.filter(key='insects').exists())
+
+
+class AlertEngineTests(TestCase):
+    """Tests for daily alert counters and the alert snapshot."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Alert Test')
+        self.spot = Spot.objects.create(company=self.company, name='Зал')
+
+    def _snapshot_counts(self):
+        from apps.dashboard.models import CompanyAlertSnapshot
+        snapshot = CompanyAlertSnapshot.objects.get(company=self.company)
+        return {p['key']: p['count'] for p in snapshot.problems}
+
+    def test_new_review_updates_snapshot_immediately(self):
+        """A matching review should show up in the snapshot on save."""
+        from apps.dashboard.models import AlertDailyCount
+
+        Review.objects.create(company=self.company, spot=self.spot, rating=1, text='Тараканы на кухне')
+        Review.objects.create(company=self.company, spot=self.spot, rating=1, text='Видели таракана')
+
+        self.assertEqual(self._snapshot_counts(), {'insects': 2})
+        row = AlertDailyCount.objects.get(company=self.company)
+        self.assertEqual(row.count, 2)
+
+    def test_text_change_and_delete_decrement(self):
+        """Editing away a problem or deleting a review should decrement counters."""
+        from apps.dashboard.models import AlertDailyCount
+
+        first = Review.objects.create(company=self.company, rating=1, text='Нахамил официант')
+        second = Review.objects.create(company=self.company, rating=1, text='Грубый персонал')
+        self.assertEqual(self._snapshot_counts(), {'rude_staff': 2})
+
+        first.text = 'Всё отлично'
+        first.save()
+        self.assertEqual(self._snapshot_counts(), {'rude_staff': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self._snapshot_counts(), {})
+        self.assertFalse(AlertDailyCount.objects.filter(company=self.company).exists())
+
+    def test_decrement_never_goes_below_zero(self):
+        """A drifted counter should stop at zero instead of going negative."""
+        from apps.dashboard.models import AlertDailyCount
+        from apps.dashboard.services.alert_engine import _bump
+        from apps.reviews.models import ReviewMatch
+
+        Review.objects.create(company=self.company, spot=self.spot, rating=1, text='Тараканы на кухне')
+        match = ReviewMatch.objects.get(company=self.company, kind=ReviewMatch.Kind.PROBLEM)
+        AlertDailyCount.objects.filter(company=self.company).update(count=0)
+
+        _bump(self.company.id, match, -1)
+
+        self.assertEqual(AlertDailyCount.objects.get(company=self.company).count, 0)
+
+    def test_previous_window_gives_trend(self):
+        """Counts in the previous window should produce an 'up'/'down' trend."""
+        from apps.dashboard.services import get_priority_alerts
+        from apps.dashboard.services.alert_engine import rebuild_alert_counters
+
+        old = Review.objects.create(company=self.company, rating=1, text='Отравление')
+        Review.objects.create(company=self.company, rating=1, text='Отравление')
+        Review.objects.create(company=self.company, rating=1, text='Стало плохо, рвота')
+        old_date = timezone.now() - timedelta(days=200)
+        Review.objects.filter(pk=old.pk).update(created_at=old_date)
+        old.matches.update(review_created_at=old_date)
+        rebuild_alert_counters(self.company)
+
+        alert = get_priority_alerts(self.company)[0]
+
+        self.assertEqual(alert['count'], 2)
+        self.assertEqual(alert['trend'], 'up')
+        self.assertEqual(alert['delta'], 1)
+        self.assertEqual(alert['spots'][0]['name'], 'Без точки')
+
+    def test_rebuild_task_prunes_old_days(self):
+        """Nightly task should rebuild counters and drop days outside the windows."""
+        from apps.dashboard.models import AlertDailyCount
+        from apps.dashboard.tasks import rebuild_alert_counters
+
+        AlertDailyCount.objects.create(
+            company=self.company, problem_key='fraud',
+            day=timezone.localdate() - timedelta(days=1000),
+            count=1, last_at=timezone.now() - timedelta(days=1000),
+        )
+        Review.objects.create(company=self.company, rating=1, text='Обсчитали на кассе')
+
+        rebuild_alert_counters()
+
+        self.assertEqual(
+            list(AlertDailyCount.objects.values_list('problem_key', 'count')),
+            [('fraud', 1)],
+        )
+        self.assertEqual(self._snapshot_counts(), {'fraud': 1})
+
+
+class DashboardCacheTests(TestCase):
+    """Tests for the versioned dashboard widget cache."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = User.objects.create_user(email='cache@test.com', password='pass123')
+        self.company = Company.objects.create(name='Cache Test')
+        Member.objects.create(user=self.user, company=self.company, role=Member.Role.OWNER)
+        self.client.login(email='cache@test.com', password='pass123')
+        Review.objects.create(company=self.company, rating=2, text='Очень долго ждали')
+
+    def _widget(self, name, **params):
+        return self.client.get(reverse('dashboard:widget', args=[name]), params)
+
+    def test_repeat_request_hits_cache(self):
+        """Second identical request should skip the analytics queries."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.dashboard.services.cache import get_cache_stats
+
+        with CaptureQueriesContext(connection) as first:
+            self._widget('insights')
+        with CaptureQueriesContext(connection) as second:
+            response = self._widget('insights')
+
+        self.assertLess(len(second), len(first))
+        self.assertIn('Долгое ожидание', response.json()['html'])
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 50.0})
+
+    def test_review_write_invalidates(self):
+        """Saving or deleting a review should bump the data version."""
+        from apps.dashboard.services.cache import get_data_version
+
+        etag = self._widget('insights')['ETag']
+
+        version = get_data_version(self.company.id)
+        review = Review.objects.create(company=self.company, rating=1, text='Долго несут')
+        self.assertNotEqual(get_data_version(self.company.id), version)
+        self.assertNotEqual(self._widget('insights')['ETag'], etag)
+
+        version = get_data_version(self.company.id)
+        review.delete()
+        self.assertNotEqual(get_data_version(self.company.id), version)
+
+    def test_key_depends_on_period(self):
+        """Different periods should not share cached blocks."""
+        from apps.dashboard.services.cache import get_cache_stats
+
+        self._widget('metrics', period='week')
+        self._widget('metrics', period='month')
+
+        self.assertEqual(get_cache_stats()['misses'], 2)
+
+
+class DashboardWidgetTests(TestCase):
+    """Tests for lazy dashboard widget endpoints."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = User.objects.create_user(email='widget@test.com', password='pass123')
+        self.company = Company.objects.create(name='Widget Test')
+        Member.objects.create(user=self.user, company=self.company, role=Member.Role.OWNER)
+        self.client.login(email='widget@test.com', password='pass123')
+        Review.objects.create(company=self.company, rating=1, text='Отравление, нашли таракана')
+
+    def test_shell_renders_without_blocks(self):
+        """Index should render the shell with one placeholder per widget."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard:index'), {'period': 'week'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'class="dashboard-widget ', count=6)
+        self.assertContains(response, '/widgets/alerts/?period=week')
+        self.assertFalse(any('reviews_review' in q['sql'] and 'COUNT' in q['sql'] for q in queries))
+
+    def test_widgets_render(self):
+        """Every widget should return JSON with rendered html."""
+        for name in ('alerts', 'metrics', 'insights', 'spots', 'chart', 'heatmap'):
+            response = self._get(name)
+            self.assertEqual(response.status_code, 200, name)
+            self.assertEqual(response.json()['widget'], name)
+
+        self.assertIn('Отравления', self._get('alerts').json()['html'])
+        self.assertIn('values', self._get('chart').json()['data']['daily_data'])
+        self.assertEqual(self._get('heatmap').json()['data']['heatmap']['total'], 1)
+
+    def test_unknown_widget_404(self):
+        response = self._get('nope')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_widget_returns_304(self):
+        """Conditional requests should get 304 until the data changes."""
+        first = self._get('metrics')
+        self.assertTrue(first['ETag'])
+        self.assertTrue(first['Last-Modified'])
+
+        second = self._get('metrics', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+        by_date = self._get('metrics', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(by_date.status_code, 304)
+
+        Review.objects.create(company=self.company, rating=5, text='Всё понравилось')
+        third = self._get('metrics', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+
+    def _get(self, name, **headers):
+        return self.client.get(reverse('dashboard:widget', args=[name]), **headers)
+
+
+class ReviewHeatmapTests(TestCase):
+    """Tests for the weekday × hour review heatmap."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Heatmap Co')
+
+    def _review(self, rating, written_at, **fields):
+        return Review.objects.create(
+            company=self.company, rating=rating, text='Отзыв', platform_date=written_at, **fields
+        )
+
+    def test_matrix_in_local_time(self):
+        from datetime import datetime
+        from apps.dashboard.services.charts import get_review_heatmap
+
+        # Пятница 19:30 по Москве = 16:30 UTC
+        friday_evening = timezone.make_aware(datetime(2026, 10, 16, 19, 30))
+        self._review(1, friday_evening)
+        self._review(2, friday_evening)
+        self._review(5, friday_evening)
+        self._review(5, timezone.make_aware(datetime(2026, 10, 12, 9, 5)))
+
+        with self.assertNumQueries(1):
+            heatmap = get_review_heatmap(Review.objects.filter(company=self.company))
+
+        self.assertEqual(len(heatmap['counts']), 7)
+        self.assertEqual(len(heatmap['counts'][0]), 24)
+        self.assertEqual(heatmap['counts'][4][19], 3)
+        self.assertEqual(heatmap['negative_share'][4][19], 67)
+        self.assertEqual(heatmap['avg_rating'][4][19], 2.67)
+        self.assertEqual(heatmap['counts'][0][9], 1)
+        self.assertIsNone(heatmap['avg_rating'][0][10])
+        self.assertEqual(heatmap['total'], 4)
+        self.assertEqual(heatmap['negative_peak'], {'day': 'Пт', 'hour': 19, 'count': 2})
+
+    def test_falls_back_to_created_at(self):
+        from apps.dashboard.services.charts import get_review_heatmap
+
+        review = self._review(3, None)
+        local = timezone.localtime(review.created_at)
+
+        heatmap = get_review_heatmap(Review.objects.filter(company=self.company))
+
+        self.assertEqual(heatmap['counts'][local.weekday()][local.hour], 1)
+
+    def test_period_filters_by_platform_date(self):
+        """An imported review dated before the period must not appear in it."""
+        from datetime import timedelta
+        from apps.dashboard.services.widgets import _heatmap_widget
+
+        self._review(2, timezone.now() - timedelta(days=150))  # загружен сейчас, написан давно
+        recent = self._review(4, timezone.now() - timedelta(days=2))
+        Review.objects.filter(pk=recent.pk).update(created_at=timezone.now() - timedelta(days=200))
+
+        filters = {'period': 'quarter', 'date_from': None, 'date_to': None, 'selected_spot_ids': []}
+        heatmap = _heatmap_widget(self.company, filters)['heatmap']
+
+        self.assertEqual(heatmap['total'], 1)
+        self.assertIsNone(heatmap['negative_peak'])
+
+
+class ReviewPaginationTests(TestCase):
+    """Tests for keyset-paginated reviews list."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Page Test')
+        now = timezone.now()
+        self.reviews = []
+        for i in range(7):
+            review = Review.objects.create(
+                company=self.company, rating=5, text=f'Отзыв {i}',
+                tags=[{'category': 'Кухня' if i % 2 else 'Сервис', 'sentiment': 'positive'}],
+            )
+            self.reviews.append(review)
+        # Два отзыва с одинаковой датой — порядок определяет id
+        same = now - timedelta(hours=1)
+        for i, review in enumerate(self.reviews):
+            created = same if i in (2, 3) else now - timedelta(days=i)
+            Review.objects.filter(pk=review.pk).update(created_at=created)
+
+    def _walk(self, params, page_size):
+        from apps.dashboard.services import filter_reviews
+
+        seen = []
+        cursor = None
+        while True:
+            page = filter_reviews(self.company, {**params, 'cursor': cursor}, page_size=page_size)
+            seen.extend(r.pk for r in page)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_cursor_walks_all_reviews_once(self):
+        """Pages should cover every review exactly once in date/id order."""
+        seen = self._walk({}, page_size=3)
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+        expected = list(
+            Review.objects.filter(company=self.company)
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_category_filter_streams_pages(self):
+        """Python-side category filter should paginate too."""
+        seen = self._walk({'category': 'Кухня'}, page_size=2)
+        self.assertEqual(len(seen), 3)
+
+    def test_page_prefetches_only_visible_reviews(self):
+        """Only one page is loaded, with photos/history prefetched."""
+        from apps.dashboard.services import filter_reviews
+
+        page = filter_reviews(self.company, {}, page_size=2)
+        with self.assertNumQueries(3):
+            items = list(page)
+            for review in items:
+                list(review.photos.all())
+                list(review.history.all())
+        self.assertEqual(len(items), 2)
+        self.assertTrue(page.has_next)
+
+    def test_photos_count_uses_prefetch_or_count(self):
+        """photos_count should read prefetched photos, otherwise run a COUNT."""
+        from apps.dashboard.services import filter_reviews
+        from apps.reviews.models import ReviewPhoto
+
+        ReviewPhoto.objects.create(review=self.reviews[0], image='reviews/a.jpg')
+        ReviewPhoto.objects.create(review=self.reviews[0], image='reviews/b.jpg')
+
+        items = list(filter_reviews(self.company, {}, page_size=7))
+        with self.assertNumQueries(0):
+            counts = {review.pk: review.photos_count for review in items}
+        self.assertEqual(counts[self.reviews[0].pk], 2)
+
+        review = Review.objects.get(pk=self.reviews[0].pk)
+        with self.assertNumQueries(1) as ctx:
+            self.assertEqual(review.photos_count, 2)
+        self.assertIn('COUNT(', ctx.captured_queries[0]['sql'])
+
+    def test_invalid_cursor_starts_from_beginning(self):
+        from apps.dashboard.services import filter_reviews
+
+        page = filter_reviews(self.company, {'cursor': 'garbage'}, page_size=50)
+        self.assertEqual(len(page), 7)
+        self.assertIsNone(page.next_cursor)
+
+
+class ReviewCountersTests(TestCase):
+    """Tests for cached, incrementally updated tab counters."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Counters Test')
+        Review.objects.create(company=self.company, rating=5, text='Отлично')
+        Review.objects.create(company=self.company, rating=2, text='Плохо', tags_complex=True)
+
+    def _fresh_counts(self):
+        from apps.dashboard.services.counters import invalidate_review_counts
+        from apps.dashboard.services import get_review_counts
+        invalidate_review_counts(self.company.id)
+        return get_review_counts(self.company)
+
+    def test_counts_single_query_then_cached(self):
+        from apps.dashboard.services import get_review_counts
+
+        with self.assertNumQueries(1):
+            counts = self._fresh_counts()
+        self.assertEqual(counts, {'all': 2, 'new': 2, 'negative': 1, 'no_response': 2, 'complex': 1})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_review_counts(self.company), counts)
+
+    def test_incremental_updates_match_recount(self):
+        """Cached counters should follow saves and deletes without recounting."""
+        from apps.dashboard.services import get_review_counts
+
+        get_review_counts(self.company)
+
+        review = Review.objects.get(company=self.company, rating=2)
+        review.response = 'Извините'
+        review.status = Review.Status.RESOLVED
+        review.save()
+
+        other = Review.objects.get(company=self.company, rating=5)
+        other.rating = 1
+        other.save(update_fields=['rating'])
+
+        Review.objects.create(company=self.company, rating=3, text='Так себе')
+        Review.objects.get(company=self.company, rating=2).delete()
+
+        with self.assertNumQueries(0):
+            cached = get_review_counts(self.company)
+        self.assertEqual(cached, self._fresh_counts())
+
+    def test_unsaved_field_change_ignored(self):
+        """Changes outside update_fields are not written and must not count."""
+        from apps.dashboard.services import get_review_counts
+
+        before = get_review_counts(self.company)
+        review = Review.objects.get(company=self.company, rating=5)
+        review.status = Review.Status.ARCHIVED
+        review.save(update_fields=['text'])
+
+        self.assertEqual(get_review_counts(self.company), before)
+
+    def test_tag_counts_single_aggregate(self):
+        from apps.dashboard.services.counters import count_tagged_reviews
+
+        Review.objects.create(company=self.company, rating=4, tags=[{'category': 'Кухня'}])
+        with self.assertNumQueries(1):
+            counts = count_tagged_reviews(Review.objects.filter(company=self.company))
+        self.assertEqual(counts, {'total_with_tags': 1, 'complex_count': 1})
+
+
+class ReviewSearchTests(TestCase):
+    """Tests for lemmatized full-text review search."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Search Test')
+        self.other = Company.objects.create(name='Other Co')
+
+    def _search(self, query, **params):
+        from apps.dashboard.services import filter_reviews
+        return [r.pk for r in filter_reviews(self.company, {'search': query, **params})]
+
+    def test_inflected_forms_match(self):
+        """Query in another word form should find the review."""
+        review = Review.objects.create(company=self.company, rating=2, text='Официант нагрубил гостю')
+        Review.objects.create(company=self.company, rating=5, text='Всё понравилось')
+        Review.objects.create(company=self.other, rating=2, text='Официанты хамят')
+
+        self.assertEqual(self._search('официанты'), [review.pk])
+        self.assertEqual(self._search('нагрубила официанту'), [review.pk])
+        self.assertEqual(self._search('официант десерт'), [])
+
+    def test_relevance_ranking(self):
+        """Reviews where the term is more prominent should rank first."""
+        once = Review.objects.create(
+            company=self.company, rating=3,
+            text='Долго ждали, в зале шумно, музыка громкая, десерт был ничего',
+        )
+        dense = Review.objects.create(company=self.company, rating=2, text='Десерт, десерт и ещё раз десерт')
+
+        self.assertEqual(self._search('десерты'), [dense.pk, once.pk])
+
+    def test_reindexed_on_edit(self):
+        """Editing review text should update its search document."""
+        review = Review.objects.create(company=self.company, rating=4, text='Хороший кофе')
+        review.text = 'Вкусный чай'
+        review.save(update_fields=['text'])
+
+        self.assertEqual(self._search('кофе'), [])
+        self.assertEqual(self._search('вкусного'), [review.pk])
+
+    def test_spot_name_still_matches(self):
+        """Search by spot name should keep working alongside the index."""
+        spot = Spot.objects.create(company=self.company, name='Терраса')
+        by_text = Review.objects.create(company=self.company, rating=5, text='Терраса чудесная')
+        by_spot = Review.objects.create(company=self.company, rating=5, text='Всё отлично', spot=spot)
+
+        self.assertEqual(self._search('Терраса'), [by_text.pk, by_spot.pk])
+
+    def test_search_pages_follow_rank(self):
+        """Cursor pagination should walk search results in rank order."""
+        from apps.dashboard.services import filter_reviews
+
+        for i in range(5):
+            Review.objects.create(company=self.company, rating=4, text='кофе ' * (i + 1))
+        expected = self._search('кофе')
+
+        seen, cursor = [], None
+        while True:
+            page = filter_reviews(self.company, {'search': 'кофе', 'cursor': cursor}, page_size=2)
+            seen.extend(r.pk for r in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_search_pages_past_search_limit(self):
+        """Pages should go on past SEARCH_LIMIT matches, then to spot-only matches."""
+        from apps.dashboard.services import filter_reviews
+
+        spot = Spot.objects.create(company=self.company, name='Кофейня')
+        for i in range(7):
+            Review.objects.create(company=self.company, rating=4, text='кофейня ' * (i + 1), spot=spot)
+        by_spot = Review.objects.create(company=self.company, rating=4, text='Всё отлично', spot=spot)
+        Review.objects.create(company=self.company, rating=5, text='кофейня ' * 20)
+
+        with patch('apps.dashboard.services.reviews.SEARCH_LIMIT', 3):
+            seen, cursor = [], None
+            while True:
+                page = filter_reviews(
+                    self.company, {'search': 'Кофейня', 'rating': '4', 'cursor': cursor}, page_size=2,
+                )
+                seen.extend(r.pk for r in page)
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+
+        # Отзыв с оценкой 5 занимает место в окне, но страницы добираются из следующих
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(len(set(seen)), 8)
+        self.assertEqual(seen[-1], by_spot.pk)
+
+    def test_rebuild_command(self):
+        """rebuild_search_index should restore missing documents."""
+        from django.core.management import call_command
+        from apps.reviews.models import ReviewSearchDocument
+
+        review = Review.objects.create(company=self.company, rating=4, text='Уютный интерьер')
+        ReviewSearchDocument.objects.all().delete()
+        self.assertEqual(self._search('интерьер'), [])
+
+        call_command('rebuild_search_index', company=str(self.company.id), stdout=Mock())
+        self.assertEqual(self._search('интерьеры'), [review.pk])
+
+
+class ReviewExportTests(TestCase):
+    """Tests for filtered CSV/XLSX review exports."""
+
+    def setUp(self):
+        import tempfile
+
+        self.client = Client()
+        self.user = User.objects.create_user(email='export@test.com', password='pass123')
+        self.company = Company.objects.create(name='Export Test')
+        Member.objects.create(user=self.user, company=self.company, role=Member.Role.OWNER)
+        self.client.login(email='export@test.com', password='pass123')
+
+        spot = Spot.objects.create(company=self.company, name='Зал')
+        Review.objects.create(
+            company=self.company, rating=2, text='=HYPERLINK("x")', spot=spot,
+            tags=[
+                {'category': 'Сервис', 'subcategory': 'Вежливость персонала', 'sentiment': 'negative'},
+                {'category': 'Продукт', 'subcategory': 'Качество блюд', 'sentiment': 'positive'},
+                {'category': 'Продукт', 'subcategory': 'Напитки', 'sentiment': 'negative'},
+            ],
+        )
+        Review.objects.create(company=self.company, rating=5, text='Всё отлично')
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = patch('apps.dashboard.services.export.EXPORT_ROOT', Path(tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _read_csv(self, content):
+        import csv
+        import io
+        return list(csv.DictReader(io.StringIO(content.decode('utf-8-sig'))))
+
+    def test_csv_streams_filtered_rows(self):
+        """CSV export should stream only filtered reviews with flattened tags."""
+        response = self.client.get(reverse('dashboard:reviews_export'), {'filter': 'negative', 'cursor': 'x'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+
+        rows = self._read_csv(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row['spot'], 'Зал')
+        self.assertEqual(row['text'], '\'=HYPERLINK("x")')
+        self.assertEqual(row['tag:Сервис'], 'negative')
+        self.assertEqual(row['tag:Продукт'], 'mixed')
+        self.assertEqual(row['tag:Цена'], '')
+        self.assertEqual(row['subcategories'], 'Вежливость персонала; Качество блюд; Напитки')
+
+    def test_large_export_runs_in_background(self):
+        """Exports over the sync limit should be queued and downloaded when ready."""
+        from apps.dashboard.tasks import export_reviews
+
+        with patch('apps.dashboard.views.EXPORT_SYNC_LIMIT', 1), \
+                patch.object(export_reviews, 'delay') as delay:
+            response = self.client.get(reverse('dashboard:reviews_export'))
+
+        company_id, params, fmt, export_id = delay.call_args.args
+        file_url = reverse('dashboard:reviews_export_file', args=[export_id, 'csv'])
+        self.assertRedirects(response, file_url, fetch_redirect_response=False)
+
+        self.assertEqual(self.client.get(file_url).status_code, 202)
+
+        self.assertEqual(export_reviews(company_id, params, fmt, export_id), 2)
+        response = self.client.get(file_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._read_csv(b''.join(response.streaming_content))), 2)
+
+    def test_xlsx_export_opens_as_workbook(self):
+        """XLSX export should be written by the task and open in openpyxl."""
+        import io
+        from openpyxl import load_workbook
+        from apps.dashboard.tasks import export_reviews
+
+        with patch.object(export_reviews, 'delay') as delay:
+            response = self.client.get(reverse('dashboard:reviews_export'), {'format': 'xlsx'})
+        company_id, params, fmt, export_id = delay.call_args.args
+        self.assertEqual(fmt, 'xlsx')
+
+        self.assertEqual(export_reviews(company_id, params, fmt, export_id), 2)
+        response = self.client.get(reverse('dashboard:reviews_export_file', args=[export_id, 'xlsx']))
+
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content)))['Отзывы']
+        rows = list(sheet.values)
+        self.assertEqual(len(rows), 3)
+        header = rows[0]
+        by_text = {row[header.index('text')]: row for row in rows[1:]}
+        self.assertEqual(by_text['\'=HYPERLINK("x")'][header.index('tag:Продукт')], 'mixed')
+        self.assertEqual(by_text['Всё отлично'][header.index('rating')], 5)
+
+    def test_failed_background_export_stops_waiting(self):
+        """A failed export task should turn the waiting page into an error."""
+        from apps.dashboard.tasks import export_reviews
+
+        export_id = 'f' * 32
+        file_url = reverse('dashboard:reviews_export_file', args=[export_id, 'xlsx'])
+        self.assertEqual(self.client.get(file_url).status_code, 202)
+
+        with patch('apps.dashboard.services.export._write_xlsx', side_effect=OSError('disk full')), \
+                self.assertRaises(OSError):
+            export_reviews(str(self.company.id), {}, 'xlsx', export_id)
+
+        response = self.client.get(file_url)
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('Refresh', response)
+
+    def test_export_command(self):
+        """export_reviews command should apply list filters."""
+        import tempfile
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'reviews.csv'
+            call_command(
+                'export_reviews', company=self.company.slug, output=str(output),
+                param=['rating=positive'], stdout=Mock(),
+            )
+            rows = self._read_csv(output.read_bytes())
+
+        self.assertEqual([row['text'] for row in rows], ['Всё отлично'])
+
+
+class SyntheticDataTests(TestCase):
+    """Tests for the synthetic dataset generator and dashboard benchmark."""
+
+    def _generate(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command(
+            'generate_synthetic_data', companies=2, spots=5, reviews=120,
+            days=90, batch_size=50, stdout=StringIO(), **options,
+        )
+
+    def test_generates_requested_scale(self):
+        """Generator should bulk-create companies, spots, QR codes and reviews."""
+        from apps.reviews.models import ReviewMatch, ReviewSearchDocument
+
+        self._generate()
+
+        companies = Company.objects.filter(slug__startswith='synthetic-')
+        self.assertEqual(companies.count(), 2)
+        self.assertEqual(Spot.objects.filter(company__in=companies).count(), 5)
+        self.assertEqual(QR.objects.filter(company__in=companies).count(), 10)
+
+        reviews = Review.objects.filter(company__in=companies)
+        self.assertEqual(reviews.count(), 120)
+        # Крупная сеть первой, даты разнесены по истории
+        first, second = companies.order_by('slug')
+        self.assertGreater(first.reviews.count(), second.reviews.count())
+        self.assertLess(reviews.order_by('created_at').first().created_at, timezone.now() - timedelta(days=7))
+        self.assertTrue(reviews.exclude(tags=[]).exists())
+        self.assertTrue(reviews.exclude(response='').exists())
+
+        # Производные данные перестроены после bulk_create
+        self.assertEqual(ReviewSearchDocument.objects.filter(company__in=companies).count(), 120)
+        self.assertTrue(ReviewMatch.objects.filter(company__in=companies).exists())
+
+    def test_clear_replaces_previous_run(self):
+        # Пользовательская компания с тем же префиксом slug — не синтетическая
+        own = Company.objects.create(name='Synthetic Cafe', slug='synthetic-cafe')
+        Review.objects.create(company=own, rating=5, text='Своя компания')
+
+        self._generate()
+        self._generate(clear=True, skip_derived=True)
+
+        self.assertEqual(Company.objects.filter(is_synthetic=True).count(), 2)
+        self.assertTrue(Company.objects.filter(pk=own.pk).exists())
+        self.assertEqual(Review.objects.count(), 121)
+
+    def test_benchmark_reports_percentiles(self):
+        """Benchmark should print a p50/p95/queries row per scenario."""
+        from io import StringIO
+        from django.core.management import call_command
+
+        self._generate()
+        out = StringIO()
+        call_command('benchmark_dashboard', iterations=2, period=['month'], stdout=out)
+
+        output = out.getvalue()
+        for scenario in ('build_dashboard_context', 'widget:alerts', 'get_analytics_data', 'filter_reviews:search'):
+            self.assertRegex(output, rf'{scenario}\s+\S+\s+[\d.]+\s+[\d.]+\s+\d+')
+
+
+class ChainOverviewTests(QueryBudgetMixin, TestCase):
+    """Tests for the cross-company chain overview."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = User.objects.create_user(email='chain@test.com', password='pass123')
+        self.companies = []
+        for name, ratings in (('North', [5, 5, 5, 4, 5]), ('South', [1, 2, 5, 3, 1])):
+            company = Company.objects.create(name=name)
+            Member.objects.create(user=self.user, company=company, role=Member.Role.OWNER)
+            spot = Spot.objects.create(company=company, name=f'{name} Spot')
+            for rating in ratings:
+                Review.objects.create(company=company, spot=spot, rating=rating, text='Долго ждали')
+            self.companies.append(company)
+        self.client.login(email='chain@test.com', password='pass123')
+
+    def test_aggregates_across_companies(self):
+        from apps.dashboard.services import get_chain_overview
+
+        overview = get_chain_overview(self.companies, 'month')
+
+        self.assertEqual(overview['totals']['total_count'], 10)
+        self.assertEqual(overview['totals']['avg_rating'], 3.6)
+        self.assertEqual(overview['totals']['negative_count'], 4)
+        stats = {item['name']: item for item in overview['company_stats']}
+        self.assertEqual(stats['North']['avg_rating'], 4.8)
+        self.assertEqual(stats['South']['negative_unanswered_count'], 4)
+        self.assertEqual(overview['best_spots'][0]['name'], 'North Spot')
+        self.assertEqual(overview['worst_spots'][0]['company_name'], 'South')
+
+    def test_query_count_does_not_grow_with_companies(self):
+        """Grouped queries: adding companies should not add queries."""
+        from django.core.cache import cache
+        from apps.dashboard.services import get_chain_overview
+        from apps.dashboard.services.alert_engine import get_alert_snapshot
+
+        for company in self.companies:
+            get_alert_snapshot(company)
+        with self.assertMaxQueries(3):
+            get_chain_overview(self.companies, 'month')
+
+        for i in range(3):
+            company = Company.objects.create(name=f'Extra {i}')
+            Review.objects.create(company=company, rating=4, text='Нормально')
+            get_alert_snapshot(company)
+            self.companies.append(company)
+        cache.clear()
+        with self.assertMaxQueries(3):
+            get_chain_overview(self.companies, 'month')
+
+    def test_cached_until_review_written(self):
+        from apps.dashboard.services import get_chain_overview
+
+        get_chain_overview(self.companies, 'month')
+        with self.assertNumQueries(0):
+            get_chain_overview(list(reversed(self.companies)), 'month')
+
+        Review.objects.create(company=self.companies[1], rating=5, text='Отлично')
+        self.assertEqual(get_chain_overview(self.companies, 'month')['totals']['total_count'], 11)
+
+    def test_view_renders_for_member(self):
+        response = self.client.get(reverse('dashboard:chain'), {'period': 'week'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'North')
+        self.assertContains(response, 'South Spot')
+
+    def test_demo_company_excluded(self):
+        from django.core.cache import cache
+        from apps.accounts.services.signup import connect_to_demo_company
+
+        demo = Company.objects.create(name='Demo Cafe', is_demo=True)
+        Review.objects.create(company=demo, rating=1, text='Демо-отзыв')
+        connect_to_demo_company(self.user)
+        cache.clear()
+
+        response = self.client.get(reverse('dashboard:chain'))
+
+        self.assertEqual(
+            sorted(item['name'] for item in response.context['company_stats']), ['North', 'South'],
+        )
+        self.assertEqual(response.context['totals']['total_count'], 10)
+        self.assertContains(self.client.get(reverse('dashboard:index')), reverse('dashboard:chain'))
+
+        # A single real company plus the demo isn't a chain
+        owner = User.objects.create_user(email='single@test.com', password='pass123')
+        Member.objects.create(user=owner, company=self.companies[0], role=Member.Role.OWNER)
+        connect_to_demo_company(owner)
+        self.client.force_login(owner)
+
+        self.assertNotContains(self.client.get(reverse('dashboard:index')), reverse('dashboard:chain'))
+        self.assertRedirects(self.client.get(reverse('dashboard:chain')), reverse('dashboard:index'))
+
+
+class AnomalyDetectionTests(TestCase):
+    """Tests for EWMA/z-score anomaly detection on per-spot daily series."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = Client()
+        self.user = User.objects.create_user(email='anomaly@test.com', password='pass123')
+        self.company = Company.objects.create(name='Anomaly Co')
+        Member.objects.create(user=self.user, company=self.company, role=Member.Role.OWNER)
+        self.spot = Spot.objects.create(company=self.company, name='Терраса')
+        self.client.login(email='anomaly@test.com', password='pass123')
+
+    def _series(self, values):
+        import numpy as np
+        return np.array(values, dtype=float)
+
+    def test_flags_negative_spike_only_for_established_spot(self):
+        from datetime import date
+        from apps.dashboard.services.anomalies import find_anomalies
+
+        days = 30
+        steady = [1, 0] * (days // 2)
+        volume = self._series([
+            [4] * days,
+            [4] * days,
+            [0] * (days - 3) + [4, 4, 7],  # новая точка без истории
+        ])
+        negative = self._series([
+            steady[:-1] + [6],
+            steady,
+            [0] * (days - 1) + [6],
+        ])
+        rating_sum = volume * 4
+        spots = [('a', 'A'), ('b', 'B'), ('c', 'C')]
+
+        anomalies = find_anomalies(spots, date(2026, 1, 1), volume, negative, rating_sum)
+
+        self.assertEqual([(a['spot_id'], a['metric']) for a in anomalies], [('a', 'negative')])
+        self.assertEqual(anomalies[0]['day'], '2026-01-30')
+        self.assertEqual(anomalies[0]['value'], 6)
+        self.assertGreaterEqual(anomalies[0]['z'], 3)
+
+    def test_flags_rating_drop(self):
+        from datetime import date
+        from apps.dashboard.services.anomalies import find_anomalies
+
+        days = 30
+        volume = self._series([[3] * days])
+        rating_sum = self._series([[14, 13, 14] * 9 + [14, 13, 4]])
+
+        anomalies = find_anomalies([('a', 'A')], date(2026, 1, 1), volume, volume * 0, rating_sum)
+
+        self.assertEqual([a['metric'] for a in anomalies], ['rating'])
+        self.assertLess(anomalies[0]['z'], -3)
+
+    def test_refresh_surfaces_spike_in_alerts_widget(self):
+        from apps.dashboard.services.alert_engine import get_alert_snapshot
+        from apps.dashboard.services.anomalies import refresh_anomalies
+
+        now = timezone.now()
+        for days_ago in range(1, 30):
+            review = Review.objects.create(company=self.company, spot=self.spot, rating=5, text='Хорошо')
+            Review.objects.filter(pk=review.pk).update(created_at=now - timedelta(days=days_ago))
+        for _ in range(5):
+            Review.objects.create(company=self.company, spot=self.spot, rating=1, text='Ужасно')
+
+        anomalies = refresh_anomalies(self.company)
+
+        self.assertIn(('negative', 'Терраса'), [(a['metric'], a['spot_name']) for a in anomalies])
+        self.assertEqual(get_alert_snapshot(self.company).anomalies, anomalies)
+        response = self.client.get(reverse('dashboard:widget', args=['alerts']))
+        self.assertIn('Всплеск негатива', response.json()['html'])
+        self.assertIn(f'spot={self.spot.id}', response.json()['html'])
+
+    def test_reviews_list_filters_by_spot(self):
+        other = Spot.objects.create(company=self.company, name='Бар')
+        Review.objects.create(company=self.company, spot=self.spot, rating=2, text='На террасе холодно')
+        Review.objects.create(company=self.company, spot=other, rating=2, text='В баре шумно')
+
+        response = self.client.get(reverse('dashboard:reviews'), {'spot': str(self.spot.id)})
+        self.assertContains(response, 'На террасе холодно')
+        self.assertNotContains(response, 'В баре шумно')
+
+        response = self.client.get(reverse('dashboard:reviews'), {'spot': 'not-a-uuid'})
+        self.assertContains(response, 'В баре шумно')
+
+
+class AllTimeSnapshotTests(TestCase):
+    """Tests for the precomputed all-time company snapshot."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.company = Company.objects.create(name='Snapshot Co')
+        self.spot = Spot.objects.create(company=self.company, name='Зал')
+        self.filters = {'period': 'all', 'date_from': None, 'date_to': None, 'selected_spot_ids': []}
+
+        now = timezone.now()
+        texts = ['Долго ждали, холодно', 'Вкусно и быстро', 'Нашли волос', 'Отличный сервис']
+        for days_ago in range(1, 40):
+            review = Review.objects.create(
+                company=self.company,
+                spot=self.spot if days_ago % 3 else None,
+                rating=days_ago % 5 + 1,
+                text=texts[days_ago % 4],
+            )
+            Review.objects.filter(pk=review.pk).update(created_at=now - timedelta(days=days_ago))
+
+    def _widgets(self):
+        from django.core.cache import cache
+        from apps.dashboard.services.widgets import WIDGETS
+
+        cache.clear()
+        return {name: WIDGETS[name](self.company, self.filters) for name in ('metrics', 'insights', 'spots', 'heatmap')}
+
+    def test_snapshot_plus_today_matches_live(self):
+        from apps.dashboard.models import CompanyAllTimeSnapshot
+        from apps.dashboard.services.snapshots import build_all_time_snapshot
+
+        snapshot = build_all_time_snapshot(self.company)
+        self.assertEqual(snapshot.data['total'], 39)
+        self.assertIsNotNone(snapshot.build_ms)
+
+        Review.objects.create(company=self.company, spot=self.spot, rating=1, text='Холодно и долго')
+        from_snapshot = self._widgets()
+
+        CompanyAllTimeSnapshot.objects.all().delete()
+        self.assertEqual(from_snapshot, self._widgets())
+        self.assertEqual(from_snapshot['metrics']['metrics']['total'], 40)
+
+    def test_reads_only_reviews_after_cutoff(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.dashboard.services.snapshots import build_all_time_snapshot
+
+        build_all_time_snapshot(self.company)
+        Review.objects.create(company=self.company, rating=5, text='Вкусно')
+
+        with CaptureQueriesContext(connection) as queries:
+            self._widgets()
+
+        review_queries = [q['sql'] for q in queries if 'FROM "reviews_review"' in q['sql']]
+        self.assertTrue(review_queries)
+        for sql in review_queries:
+            self.assertIn('"created_at" >=', sql)
+
+    def test_editing_old_review_falls_back_until_rebuild(self):
+        from apps.dashboard.models import CompanyAllTimeSnapshot
+        from apps.dashboard.services.snapshots import build_all_time_snapshot, get_all_time_partials
+        from apps.dashboard.tasks import rebuild_stale_all_time_snapshots
+
+        build_all_time_snapshot(self.company)
+        old = Review.objects.filter(company=self.company).last()
+        old.rating = 1
+        old.save(update_fields=['rating'])
+
+        self.assertTrue(CompanyAllTimeSnapshot.objects.get(company=self.company).is_stale)
+        self.assertIsNone(get_all_time_partials(self.company))
+        live = self._widgets()
+
+        self.assertEqual(rebuild_stale_all_time_snapshots(), 1)
+        self.assertIsNotNone(get_all_time_partials(self.company))
+        self.assertEqual(self._widgets(), live)
+
+    def test_unrelated_changes_keep_snapshot_fresh(self):
+        from apps.dashboard.models import CompanyAllTimeSnapshot
+        from apps.dashboard.services.snapshots import build_all_time_snapshot
+
+        build_all_time_snapshot(self.company)
+        Review.objects.create(company=self.company, rating=4, text='Неплохо')
+        old = Review.objects.filter(company=self.company).last()
+        old.response = 'Спасибо!'
+        old.save(update_fields=['response'])
+
+        self.assertFalse(CompanyAllTimeSnapshot.objects.get(company=self.company).is_stale)
+
+    def test_reply_keeps_snapshot_fresh(self):
+        from apps.dashboard.models import CompanyAllTimeSnapshot
+        from apps.dashboard.services.snapshots import build_all_time_snapshot
+
+        user = User.objects.create_user(email='owner@snapshot.co', password='pass123')
+        Member.objects.create(user=user, company=self.company, role=Member.Role.OWNER)
+        self.client.force_login(user)
+        build_all_time_snapshot(self.company)
+        old = Review.objects.filter(company=self.company).last()
+
+        with patch('apps.reviews.search.index_review') as index, \
+                patch('apps.dashboard.services.matching.sync_review_matches') as match:
+            response = self.client.post(
+                reverse('api_respond', args=[old.id]),
+                data='{"response": "Спасибо!"}',
+                content_type='application/json',
+            )
+            # save() without update_fields: only the changed fields count
+            old = Review.objects.get(pk=old.pk)
+            old.response = 'Спасибо ещё раз!'
+            old.save()
+
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(Review.objects.get(pk=old.pk).response, 'Спасибо ещё раз!')
+        self.assertFalse(CompanyAllTimeSnapshot.objects.get(company=self.company).is_stale)
+        index.assert_not_called()
+        match.assert_not_called()
+
+        old.rating = 1
+        old.save()
+        self.assertTrue(CompanyAllTimeSnapshot.objects.get(company=self.company).is_stale)
+
+    def test_nightly_task_builds_snapshots(self):
+        from apps.dashboard.models import CompanyAllTimeSnapshot
+        from apps.dashboard.tasks import build_all_time_snapshots
+
+        self.assertEqual(build_all_time_snapshots(), Company.objects.filter(is_active=True).count())
+        snapshot = CompanyAllTimeSnapshot.objects.get(company=self.company)
+        self.assertFalse(snapshot.is_stale)
+        self.assertEqual(snapshot.data['mode'], self.company.analysis_mode)
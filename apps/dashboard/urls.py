@@ -5,7 +5,11 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path('', views.dashboard_index, name='index'),
+    path('chain/', views.chain_overview, name='chain'),
+    path('widgets/<str:name>/', views.dashboard_widget, name='widget'),
     path('reviews/', views.reviews_list, name='reviews'),
+    path('reviews/export/', views.reviews_export, name='reviews_export'),
+    path('reviews/export/<slug:export_id>.<slug:fmt>', views.reviews_export_file, name='reviews_export_file'),
     path('qr/', views.qr_list, name='qr'),
     path('qr/create/', views.qr_create, name='qr_create'),
     path('qr/<uuid:qr_id>/edit/', views.qr_edit, name='qr_edit'),
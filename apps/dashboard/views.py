@@ -1,5 +1,12 @@
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
+from django.http import (
+    FileResponse, Http404, HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils import timezone
+from django.utils.http import http_date
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
@@ -9,7 +16,7 @@ from apps.qr.models import QR
 from .services import (
     get_user_companies,
     get_current_company,
-    get_user_membership,
+    get_company_context,
     get_review_counts,
     filter_reviews,
     update_feedback_settings,
@@ -21,7 +28,14 @@ from .services import (
     build_platform_data,
     build_dashboard_context,
     build_form_settings_platform_data,
+    get_chain_overview,
+)
+from .services.analytics import get_dashboard_filters
+from .services.export import (
+    EXPORT_FORMATS, EXPORT_SYNC_LIMIT, estimate_export_size, export_failed, export_rows,
+    get_export_params, get_export_path, new_export_id, stream_csv,
 )
+from .services.widgets import WIDGET_JSON_DATA, WIDGETS, get_widget_cache_key, get_widget_data, get_widget_etag
 
 
 @login_required
@@ -47,6 +61,80 @@ def dashboard_index(request: HttpRequest) -> HttpResponse:
     return render(request, 'dashboard/index.html', context)
 
 
+@login_required
+def chain_overview(request: HttpRequest) -> HttpResponse:
+    """Сводка по всем компаниям пользователя."""
+    company, companies = get_current_company(request)
+    if not company:
+        return render(request, 'dashboard/no_company.html')
+    chain_companies = get_company_context(request).chain_companies
+    if len(chain_companies) < 2:
+        return redirect('dashboard:index')
+
+    overview = get_chain_overview(chain_companies, request.GET.get('period', 'month'))
+    context = {
+        'company': company,
+        'companies': companies,
+        'spot_groups': [
+            ('Лучшие точки', overview['best_spots']),
+            ('Худшие точки', overview['worst_spots']),
+        ],
+        **overview,
+    }
+    return render(request, 'dashboard/chain.html', context)
+
+
+@login_required
+def dashboard_widget(request: HttpRequest, name: str) -> HttpResponse:
+    """
+    JSON-виджет главной страницы: {'html': ..., 'data': ...}.
+
+    Поддерживает условные запросы: ETag строится из ключа кэша (версия данных
+    + фильтры), поэтому неизменившийся виджет отвечает 304.
+    """
+    if name not in WIDGETS:
+        raise Http404
+
+    company, _ = get_current_company(request)
+    if not company:
+        return JsonResponse({'error': 'Компания не найдена'}, status=404)
+
+    filters = get_dashboard_filters(company, request.GET)
+    cache_key = get_widget_cache_key(company, name, filters)
+    etag = get_widget_etag(cache_key)
+
+    # ETag известен до вычисления — неизменившийся виджет не считаем вовсе
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return _widget_headers(response, etag)
+
+    data = get_widget_data(company, name, filters, cache_key)
+    last_modified = int(data['computed_at'].timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _widget_headers(response, etag, last_modified)
+
+    html = render_to_string(
+        f'dashboard/widgets/{name}.html', {**data, 'company': company}, request
+    )
+    json_key = WIDGET_JSON_DATA.get(name)
+    response = JsonResponse({
+        'widget': name,
+        'html': html,
+        'data': {json_key: data[json_key]} if json_key else {},
+    })
+    return _widget_headers(response, etag, last_modified)
+
+
+def _widget_headers(response: HttpResponse, etag: str, last_modified: int | None = None) -> HttpResponse:
+    """Заголовки валидации: браузер перепроверяет виджет при каждом обновлении."""
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @login_required
 def reviews_list(request: HttpRequest) -> HttpResponse:
     """Reviews list with filters"""
@@ -55,16 +143,30 @@ def reviews_list(request: HttpRequest) -> HttpResponse:
         return render(request, 'dashboard/no_company.html')
 
     reviews = filter_reviews(company, request.GET)
+
+    # Ссылки пагинации: те же фильтры, другой курсор
+    params = request.GET.copy()
+    first_page_url = None
+    if params.pop('cursor', None):
+        first_page_url = f'?{params.urlencode()}'
+    export_query = params.urlencode()
+    next_page_url = None
+    if reviews.has_next:
+        params['cursor'] = reviews.next_cursor
+        next_page_url = f'?{params.urlencode()}'
     filter_type = request.GET.get('filter')
 
     # Check if user can respond to reviews (not for demo or viewer role)
-    membership = get_user_membership(request.user, company)
+    membership = get_company_context(request).membership
     can_respond = membership.can_respond() if membership else False
 
     context = {
         'company': company,
         'companies': companies,
-        'reviews': reviews[:50] if isinstance(reviews, list) else list(reviews)[:50],
+        'reviews': reviews,
+        'first_page_url': first_page_url,
+        'next_page_url': next_page_url,
+        'export_query': export_query,
         'counts': get_review_counts(company),
         'current_filter': filter_type or 'all',
         'current_source': request.GET.get('source'),
@@ -78,6 +180,68 @@ def reviews_list(request: HttpRequest) -> HttpResponse:
     return render(request, 'dashboard/reviews.html', context)
 
 
+@login_required
+def reviews_export(request: HttpRequest) -> HttpResponse:
+    """
+    Выгрузка отзывов с фильтрами списка.
+
+    CSV до EXPORT_SYNC_LIMIT строк отдаётся потоком; XLSX и большие выгрузки
+    готовятся Celery-задачей, пользователь ждёт на странице скачивания.
+    """
+    from .tasks import export_reviews
+
+    company, _ = get_current_company(request)
+    if not company:
+        return render(request, 'dashboard/no_company.html')
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        raise Http404
+
+    params = get_export_params(request.GET)
+    if fmt == 'csv' and estimate_export_size(company, params) <= EXPORT_SYNC_LIMIT:
+        response = StreamingHttpResponse(
+            stream_csv(export_rows(company, params)),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{_export_filename(company, fmt)}"'
+        return response
+
+    export_id = new_export_id()
+    export_reviews.delay(str(company.id), params, fmt, export_id)
+    return redirect('dashboard:reviews_export_file', export_id=export_id, fmt=fmt)
+
+
+@login_required
+def reviews_export_file(request: HttpRequest, export_id: str, fmt: str) -> HttpResponse:
+    """Скачать фоновую выгрузку; пока файл не готов — 202 с автообновлением."""
+    company, _ = get_current_company(request)
+    if not company or fmt not in EXPORT_FORMATS:
+        raise Http404
+
+    path = get_export_path(company.id, export_id, fmt)
+    if not path.exists() and export_failed(path):
+        return HttpResponse(
+            'Не удалось подготовить выгрузку. Попробуйте ещё раз.',
+            status=500,
+            content_type='text/plain; charset=utf-8',
+        )
+    if not path.exists():
+        response = HttpResponse(
+            'Выгрузка готовится, страница обновится автоматически…',
+            status=202,
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Refresh'] = '5'
+        return response
+
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=_export_filename(company, fmt))
+
+
+def _export_filename(company: Company, fmt: str) -> str:
+    return f'reviews-{company.slug}-{timezone.localdate():%Y-%m-%d}.{fmt}'
+
+
 @login_required
 def qr_list(request: HttpRequest) -> HttpResponse:
     """QR codes management"""
@@ -0,0 +1,388 @@
+"""
+Local stand-in for the Yandex Business and Google My Business endpoints.
+
+FakePlatformServer replays recorded responses (apps/integrations/testdata)
+on a local port, so sync, reply and rating paths run offline against real
+HTTP: the services' own clients, parsers, paging and retries. Recorded
+reviews are cloned to any number of reviews; latency, random errors and
+scripted failures are configurable.
+
+    with FakePlatformServer(yandex_reviews=500, latency=0.02) as server:
+        with server.patch_services():
+            YandexReviewsService(connection).sync_reviews_to_db()
+
+Endpoints:
+    GET  /sprav/<org>/p/edit/reviews/?page=N       Yandex reviews page
+    POST /sprav/api/ugcpub/business-answer          Yandex reply
+    GET  /google/$discovery                         mybusiness v4 discovery
+    GET  /google/v4/<location>/reviews              Google reviews list
+    PUT  /google/v4/<location>/reviews/<id>/reply   Google reply
+"""
+
+import copy
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+TESTDATA = Path(__file__).parent / 'testdata'
+
+YANDEX_PAGES = ('yandex_reviews_page1.html', 'yandex_reviews_page2.html')
+GOOGLE_REVIEWS = 'google_reviews.json'
+
+_decoder = json.JSONDecoder()
+
+
+class FakePlatformServer:
+    """
+    Threaded local HTTP server replaying Yandex and Google review endpoints.
+
+    Args:
+        yandex_reviews: Number of Yandex reviews (recorded ones cloned)
+        google_reviews: Number of Google reviews
+        per_page: Yandex page size (Google uses the requested pageSize)
+        latency: Seconds added to every response
+        error_rate: Share of requests answered with 503
+        seed: Seed for error injection
+    """
+
+    def __init__(
+        self,
+        yandex_reviews: int = 5,
+        google_reviews: int = 3,
+        per_page: int = 20,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.per_page = per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._failures: dict[str, deque] = defaultdict(deque)
+
+        self.requests: Counter = Counter()
+        self.replies: list[dict] = []
+
+        self._page_prefix, self._page_suffix, yandex_templates = _load_yandex_fixture()
+        google_fixture = json.loads((TESTDATA / GOOGLE_REVIEWS).read_text(encoding='utf-8'))
+        self.google_rating = google_fixture['averageRating']
+        self.yandex_items: list[dict] = []
+        self.google_items: list[dict] = []
+        self._yandex_templates = yandex_templates
+        self._google_templates = google_fixture['reviews']
+        self.add_yandex_reviews(yandex_reviews)
+        self.add_google_reviews(google_reviews)
+
+        self._httpd = None
+        self._thread = None
+
+    # --- Lifecycle ---
+
+    def start(self) -> 'FakePlatformServer':
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> 'FakePlatformServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def yandex_base_url(self) -> str:
+        return f'{self.url}/sprav'
+
+    @property
+    def google_discovery_url(self) -> str:
+        return f'{self.url}/google/$discovery'
+
+    @contextmanager
+    def patch_services(self):
+        """Point the Yandex and Google services at this server."""
+        from unittest.mock import patch
+
+        from .services import GoogleReviewsService, YandexReviewsService
+
+        with ExitStack() as stack:
+            stack.enter_context(patch.object(YandexReviewsService, 'BASE_URL', self.yandex_base_url))
+            stack.enter_context(
+                patch.object(GoogleReviewsService, 'DISCOVERY_URL', self.google_discovery_url)
+            )
+            yield self
+
+    # --- Data ---
+
+    def add_yandex_reviews(self, count: int) -> None:
+        """Add newest-first reviews cloned from the recorded pages."""
+        self.yandex_items[:0] = [
+            self._clone_yandex(len(self.yandex_items) + i) for i in reversed(range(count))
+        ]
+
+    def add_google_reviews(self, count: int) -> None:
+        """Add newest-first reviews cloned from the recorded list."""
+        self.google_items[:0] = [
+            self._clone_google(len(self.google_items) + i) for i in reversed(range(count))
+        ]
+
+    def fail_next(self, endpoint: str, *statuses: int) -> None:
+        """
+        Answer the next requests to an endpoint with the given statuses.
+
+        endpoint: 'yandex_page', 'yandex_answer', 'google_list' or 'google_reply'
+        statuses: None serves that request normally, e.g. (None, 403)
+            fails the second request
+        """
+        with self._lock:
+            self._failures[endpoint].extend(statuses)
+
+    def answer_token(self, external_id: str) -> str:
+        return f'tok-{external_id}'
+
+    def _clone_yandex(self, number: int) -> dict:
+        item = copy.deepcopy(self._yandex_templates[number % len(self._yandex_templates)])
+        review_id = f'ya{number:06d}'
+        item.update({
+            'id': review_id,
+            'cmnt_entity_id': review_id,
+            'business_answer_csrf_token': self.answer_token(review_id),
+            # Newer numbers are newer reviews
+            'time_created': 1700000000000 + number * 60000,
+        })
+        return item
+
+    def _clone_google(self, number: int) -> dict:
+        item = copy.deepcopy(self._google_templates[number % len(self._google_templates)])
+        review_id = f'g{number:06d}'
+        created = datetime(2024, 1, 1, tzinfo=dt_timezone.utc) + timedelta(minutes=number)
+        item.update({
+            'reviewId': review_id,
+            'createTime': created.isoformat().replace('+00:00', 'Z'),
+            'updateTime': created.isoformat().replace('+00:00', 'Z'),
+        })
+        return item
+
+    # --- Responses ---
+
+    def _take_failure(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] += 1
+            if self._failures[endpoint]:
+                return self._failures[endpoint].popleft()
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 503
+        return None
+
+    def yandex_page(self, page: int) -> str:
+        offset = (page - 1) * self.per_page
+        items = self.yandex_items[offset:offset + self.per_page]
+        pager = {'limit': self.per_page, 'offset': offset, 'total': len(self.yandex_items)}
+        return (
+            self._page_prefix
+            + json.dumps(items, ensure_ascii=False)
+            + ',"pager":' + json.dumps(pager)
+            + self._page_suffix
+        )
+
+    def yandex_answer(self, body: dict, csrf: str) -> int:
+        review = next(
+            (item for item in self.yandex_items if item['cmnt_entity_id'] == body.get('reviewId')),
+            None,
+        )
+        if (
+            review is None
+            or csrf != YANDEX_CSRF
+            or body.get('reviewsCsrfToken') != YANDEX_REVIEWS_CSRF
+            or body.get('answerCsrfToken') != review['business_answer_csrf_token']
+        ):
+            return 403
+        review['owner_comment'] = {'time_created': int(time.time() * 1000), 'text': body['text']}
+        with self._lock:
+            self.replies.append({'platform': 'yandex', 'review_id': body['reviewId'], 'text': body['text']})
+        return 200
+
+    def google_list(self, page_size: int, page_token: str) -> dict:
+        offset = int(page_token or 0)
+        page = self.google_items[offset:offset + page_size]
+        response = {
+            'reviews': page,
+            'averageRating': self.google_rating,
+            'totalReviewCount': len(self.google_items),
+        }
+        if offset + page_size < len(self.google_items):
+            response['nextPageToken'] = str(offset + page_size)
+        return response
+
+    def google_reply(self, review_id: str, body: dict):
+        review = next((item for item in self.google_items if item['reviewId'] == review_id), None)
+        if review is None:
+            return None
+        review['reviewReply'] = {'comment': body.get('comment', ''), 'updateTime': _now_iso()}
+        with self._lock:
+            self.replies.append({'platform': 'google', 'review_id': review_id, 'text': body.get('comment', '')})
+        return review['reviewReply']
+
+    def google_discovery(self) -> dict:
+        return _google_discovery_document(f'{self.url}/google/')
+
+
+# Page-level tokens of the recorded pages
+YANDEX_CSRF = '9f8e7d6c5b4a:1760789012'
+YANDEX_REVIEWS_CSRF = 'rv/csrf+token=='
+
+
+def _load_yandex_fixture():
+    """Recorded page split around items+pager, and the recorded review items."""
+    items = []
+    prefix = suffix = None
+    for name in YANDEX_PAGES:
+        html = (TESTDATA / name).read_text(encoding='utf-8')
+        start = html.index('"list":{"items":') + len('"list":{"items":')
+        page_items, end = _decoder.raw_decode(html, start)
+        items.extend(page_items)
+        if prefix is None:
+            pager_start = html.index('"pager":', end) + len('"pager":')
+            _, pager_end = _decoder.raw_decode(html, pager_start)
+            prefix, suffix = html[:start], html[pager_end:]
+    return prefix, suffix, items
+
+
+def _now_iso() -> str:
+    return datetime.now(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _google_discovery_document(root_url: str) -> dict:
+    """Minimal mybusiness v4 discovery document: reviews list and replies."""
+    def method(name, path, http_method, parameters, request=False):
+        described = {
+            'id': f'mybusiness.accounts.locations.reviews.{name}',
+            'path': path,
+            'httpMethod': http_method,
+            'parameters': parameters,
+            'parameterOrder': [p for p, spec in parameters.items() if spec.get('required')],
+            'response': {'$ref': 'Object'},
+        }
+        if request:
+            described['request'] = {'$ref': 'Object'}
+        return described
+
+    path_param = {'type': 'string', 'location': 'path', 'required': True}
+    return {
+        'kind': 'discovery#restDescription',
+        'discoveryVersion': 'v1',
+        'id': 'mybusiness:v4',
+        'name': 'mybusiness',
+        'version': 'v4',
+        'rootUrl': root_url,
+        'servicePath': '',
+        'batchPath': 'batch',
+        'protocol': 'rest',
+        'parameters': {},
+        'schemas': {'Object': {'id': 'Object', 'type': 'object', 'additionalProperties': {'type': 'any'}}},
+        'resources': {'accounts': {'resources': {'locations': {'resources': {'reviews': {'methods': {
+            'list': method('list', 'v4/{+parent}/reviews', 'GET', {
+                'parent': path_param,
+                'pageSize': {'type': 'integer', 'location': 'query'},
+                'pageToken': {'type': 'string', 'location': 'query'},
+            }),
+            'updateReply': method('updateReply', 'v4/{+name}/reply', 'PUT', {'name': path_param}, request=True),
+            'deleteReply': method('deleteReply', 'v4/{+name}/reply', 'DELETE', {'name': path_param}),
+        }}}}}}},
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes requests to the FakePlatformServer of the HTTP server."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def fake(self) -> FakePlatformServer:
+        return self.server.fake
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def _dispatch(self, method: str):
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+        path = url.path
+
+        if method == 'GET' and path.startswith('/sprav/') and path.endswith('/p/edit/reviews/'):
+            endpoint = 'yandex_page'
+        elif method == 'POST' and path == '/sprav/api/ugcpub/business-answer':
+            endpoint = 'yandex_answer'
+        elif method == 'GET' and path == '/google/$discovery':
+            return self._send_json(200, self.fake.google_discovery())
+        elif method == 'GET' and path.startswith('/google/v4/') and path.endswith('/reviews'):
+            endpoint = 'google_list'
+        elif method == 'PUT' and path.startswith('/google/v4/') and path.endswith('/reply'):
+            endpoint = 'google_reply'
+        else:
+            return self._send_json(404, {'error': 'not found'})
+
+        status = self.fake._take_failure(endpoint)
+        if status is not None:
+            return self._send_json(status, {'error': {'code': status, 'message': 'injected'}})
+
+        if endpoint == 'yandex_page':
+            html = self.fake.yandex_page(int(query.get('page', 1)))
+            return self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+        if endpoint == 'yandex_answer':
+            status = self.fake.yandex_answer(body, self.headers.get('x-csrf-token', ''))
+            return self._send_json(status, {'status': 'ok' if status == 200 else 'error'})
+        if endpoint == 'google_list':
+            page_size = int(query.get('pageSize', 50))
+            return self._send_json(200, self.fake.google_list(page_size, query.get('pageToken', '')))
+
+        review_id = path.rsplit('/', 2)[-2]
+        reply = self.fake.google_reply(review_id, body)
+        if reply is None:
+            return self._send_json(404, {'error': {'code': 404, 'message': 'review not found'}})
+        return self._send_json(200, reply)
+
+    def _send_json(self, status: int, payload: dict):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,252 @@
+"""
+Shared HTTP client for outbound calls (Yandex, Telegram, map pages, Google).
+
+Every client keeps one requests.Session per thread, so connections to a
+host are reused (keep-alive) from a pool instead of opened per call.
+Requests get a default timeout and are retried on 429/5xx and connection
+errors with jittered exponential backoff. Non-idempotent requests (POST)
+are retried only when the server can't have processed them: 429 or a
+failed connect. A per-host semaphore caps concurrent requests to a host
+across all clients of the process.
+
+Calls made while a user waits for the response (public review form,
+map-page lookups) use get_interactive_http_client(): no retries, so they
+fail as fast as their timeout.
+
+Per-host metrics (latency, status counts, bytes) are kept in-process:
+get_http_stats() / reset_http_stats().
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = getattr(settings, 'HTTP_TIMEOUT', (5, 30))
+READ_TIMEOUT = DEFAULT_TIMEOUT[1] if isinstance(DEFAULT_TIMEOUT, tuple) else DEFAULT_TIMEOUT
+MAX_RETRIES = getattr(settings, 'HTTP_MAX_RETRIES', 3)
+BACKOFF_BASE = getattr(settings, 'HTTP_BACKOFF_BASE', 0.5)
+BACKOFF_MAX = getattr(settings, 'HTTP_BACKOFF_MAX', 30)
+POOL_MAXSIZE = getattr(settings, 'HTTP_POOL_MAXSIZE', 10)
+# Concurrent requests per host, e.g. {'api.telegram.org': 8}
+HOST_CONCURRENCY = getattr(settings, 'HTTP_HOST_CONCURRENCY', {})
+DEFAULT_HOST_CONCURRENCY = getattr(settings, 'HTTP_DEFAULT_HOST_CONCURRENCY', 8)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+class HttpClient:
+    """
+    Pooled HTTP client with timeouts, retries and per-host limits.
+
+    Usage:
+        client = HttpClient(headers={'user-agent': ...}, cookies={...})
+        resp = client.get(url, params={...})
+
+    Module-level get_http_client() is the shared client for calls that
+    don't need their own headers or cookies; get_interactive_http_client()
+    is the same without retries.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[dict] = None,
+        cookies: Optional[dict] = None,
+        timeout=DEFAULT_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.headers = dict(headers or {})
+        self.cookies = dict(cookies or {})
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """This thread's session (a Session isn't thread-safe)."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update(self.headers)
+            session.cookies.update(self.cookies)
+            self._local.session = session
+        return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying transient failures.
+
+        Accepts requests.Session.request arguments. The response of the last
+        attempt is returned whatever its status; connection errors and
+        timeouts of the last attempt are raised.
+        """
+        method = method.upper()
+        kwargs.setdefault('timeout', self.timeout)
+        idempotent = method in IDEMPOTENT_METHODS
+        host = urlsplit(url).hostname or ''
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            started = time.monotonic()
+            try:
+                with _host_slot(host):
+                    resp = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                _record(host, None, time.monotonic() - started)
+                # A connect timeout means the request never reached the server
+                retryable = isinstance(e, requests.exceptions.ConnectTimeout) or (
+                    idempotent and isinstance(e, TRANSIENT_ERRORS)
+                )
+                if last_attempt or not retryable:
+                    raise
+                delay = _backoff(attempt)
+                logger.warning(f'{method} {host} failed ({e}), retry in {delay:.1f}s')
+            else:
+                _record(
+                    host, resp.status_code, time.monotonic() - started,
+                    sent=_body_size(resp.request.body), received=len(resp.content),
+                )
+                retryable = resp.status_code == 429 or (
+                    idempotent and resp.status_code in RETRY_STATUSES
+                )
+                if last_attempt or not retryable:
+                    return resp
+                delay = _retry_after(resp) or _backoff(attempt)
+                logger.warning(
+                    f'{method} {host} returned {resp.status_code}, retry in {delay:.1f}s'
+                )
+                resp.close()
+            time.sleep(delay)
+
+
+_shared_client: Optional[HttpClient] = None
+_interactive_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """Process-wide client without custom headers or cookies."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HttpClient()
+    return _shared_client
+
+
+def get_interactive_http_client() -> HttpClient:
+    """Process-wide client for the request path: pooled, but never retries."""
+    global _interactive_client
+    if _interactive_client is None:
+        _interactive_client = HttpClient(max_retries=0)
+    return _interactive_client
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    """Delay from a Retry-After header in seconds, capped at BACKOFF_MAX."""
+    try:
+        return min(float(resp.headers.get('Retry-After', '')), BACKOFF_MAX)
+    except ValueError:
+        return None
+
+
+@contextmanager
+def _host_slot(host: str):
+    """Hold one of the host's concurrent request slots."""
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            limit = HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY)
+            slot = _host_slots[host] = threading.BoundedSemaphore(limit)
+    with slot:
+        yield
+
+
+# --- Metrics ---
+
+def _body_size(body) -> int:
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    return len(body) if isinstance(body, bytes) else 0
+
+
+def _record(
+    host: str, status: Optional[int], elapsed: float, sent: int = 0, received: int = 0,
+) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(host, {
+            'requests': 0,
+            'errors': 0,
+            'statuses': Counter(),
+            'latency_ms_total': 0.0,
+            'latency_ms_max': 0.0,
+            'bytes_sent': 0,
+            'bytes_received': 0,
+        })
+        latency_ms = elapsed * 1000
+        stats['requests'] += 1
+        stats['latency_ms_total'] += latency_ms
+        stats['latency_ms_max'] = max(stats['latency_ms_max'], latency_ms)
+        stats['bytes_sent'] += sent
+        stats['bytes_received'] += received
+        if status is None:
+            stats['errors'] += 1
+        else:
+            stats['statuses'][status] += 1
+    logger.debug(
+        f'HTTP {host}: {status or "error"} in {latency_ms:.0f} ms, '
+        f'{sent} bytes sent, {received} received'
+    )
+
+
+def get_http_stats() -> dict:
+    """Per-host request counts, statuses, latency and bytes."""
+    with _stats_lock:
+        return {
+            host: {
+                'requests': stats['requests'],
+                'errors': stats['errors'],
+                'statuses': dict(stats['statuses']),
+                'latency_ms_avg': round(stats['latency_ms_total'] / stats['requests'], 1),
+                'latency_ms_max': round(stats['latency_ms_max'], 1),
+                'bytes_sent': stats['bytes_sent'],
+                'bytes_received': stats['bytes_received'],
+            }
+            for host, stats in _stats.items()
+        }
+
+
+def reset_http_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
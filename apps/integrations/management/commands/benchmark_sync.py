@@ -0,0 +1,143 @@
+"""
+Management command для замера пропускной способности синхронизации отзывов.
+
+Поднимает локальную подмену Яндекс Бизнеса и Google My Business
+(apps/integrations/fake_platforms.py) и прогоняет через неё настоящие
+сервисы синхронизации: полную синхронизацию, затем инкрементальную после
+появления новых отзывов. Выводит время, отзывов в секунду, HTTP-запросов
+и SQL-запросов на синхронизацию. Сеть не нужна.
+
+    python manage.py benchmark_sync --reviews 2000 --latency 50
+
+Данные пишутся во временную компанию, которая удаляется после замера.
+"""
+import json
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+from django.db import connection as db_connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.companies.models import Company, Connection, Platform
+from apps.integrations.fake_platforms import FakePlatformServer
+from apps.integrations.services import GoogleReviewsService, YandexReviewsService, yandex_reviews
+
+PLATFORMS = ('yandex', 'google')
+
+
+class Command(BaseCommand):
+    help = 'Замерить скорость синхронизации отзывов на локальной подмене платформ'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reviews',
+            type=int,
+            default=1000,
+            help='Отзывов на платформе (по умолчанию 1000)',
+        )
+        parser.add_argument(
+            '--new-reviews',
+            type=int,
+            default=10,
+            help='Новых отзывов перед инкрементальной синхронизацией (по умолчанию 10)',
+        )
+        parser.add_argument(
+            '--per-page',
+            type=int,
+            default=20,
+            help='Отзывов на странице Яндекса (по умолчанию 20)',
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=20,
+            help='Задержка ответа платформы, мс (по умолчанию 20)',
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0,
+            help='Доля ответов 503 (по умолчанию 0)',
+        )
+        parser.add_argument(
+            '--request-interval',
+            type=float,
+            help='Пауза между запросами к Яндексу, с (по умолчанию — из настроек)',
+        )
+        parser.add_argument(
+            '--platform',
+            action='append',
+            choices=PLATFORMS,
+            help='Платформа (можно несколько); по умолчанию — все',
+        )
+
+    def handle(self, *args, **options):
+        platforms = options['platform'] or PLATFORMS
+        server = FakePlatformServer(
+            yandex_reviews=options['reviews'],
+            google_reviews=options['reviews'],
+            per_page=options['per_page'],
+            latency=options['latency'] / 1000,
+            error_rate=options['error_rate'],
+        )
+        interval = options['request_interval']
+        if interval is None:
+            interval = yandex_reviews.REQUEST_INTERVAL
+
+        company = Company.objects.create(name='Benchmark sync')
+        self.stdout.write(
+            f'Отзывов: {options["reviews"]}, задержка: {options["latency"]:.0f} мс, '
+            f'ошибок: {options["error_rate"]:.0%}, пауза Яндекса: {interval} с\n'
+        )
+        self.stdout.write(
+            f'{"Платформа":<10} {"Синхронизация":<16} {"Отзывов":>8} {"Время, с":>9} '
+            f'{"Отзывов/с":>10} {"HTTP":>6} {"SQL":>6}'
+        )
+        try:
+            with server, server.patch_services(), \
+                    patch.object(yandex_reviews, 'REQUEST_INTERVAL', interval):
+                for platform in platforms:
+                    connection = self._create_connection(company, platform)
+                    self._measure(server, connection, 'полная')
+                    getattr(server, f'add_{platform}_reviews')(options['new_reviews'])
+                    self._measure(server, connection, 'инкрементальная')
+        finally:
+            company.delete()
+
+    def _measure(self, server: FakePlatformServer, connection: Connection, label: str) -> None:
+        service_class = YandexReviewsService if connection.platform_id == 'yandex' else GoogleReviewsService
+        requests_before = sum(server.requests.values())
+
+        with CaptureQueriesContext(db_connection) as ctx:
+            start = time.perf_counter()
+            result = service_class(connection).sync_reviews_to_db()
+            elapsed = time.perf_counter() - start
+
+        written = result.created + result.updated + result.unchanged
+        self.stdout.write(
+            f'{connection.platform_id:<10} {label:<16} {written:>8} {elapsed:>9.2f} '
+            f'{written / elapsed:>10.0f} {sum(server.requests.values()) - requests_before:>6} '
+            f'{len(ctx):>6}'
+        )
+
+    def _create_connection(self, company: Company, platform_id: str) -> Connection:
+        platform, _ = Platform.objects.get_or_create(id=platform_id, defaults={'name': platform_id})
+        if platform_id == 'yandex':
+            return Connection.objects.create(
+                company=company,
+                platform=platform,
+                external_id='benchmark',
+                access_token=json.dumps({'Session_id': 'a', 'sessionid2': 'b', 'yandexuid': 'c'}),
+            )
+        return Connection.objects.create(
+            company=company,
+            platform=platform,
+            external_id='benchmark',
+            access_token='benchmark',
+            token_expires_at=timezone.now() + timedelta(hours=1),
+            google_account_id='accounts/1',
+            google_location_id='locations/1',
+        )
@@ -3,6 +3,7 @@ from typing import Optional, Tuple
 
 from apps.accounts.models import Member
 from apps.companies.models import Company, Connection, Platform
+from apps.dashboard.services import get_user_membership
 
 from .google_auth import GoogleAuthService
 from .google_reviews import GoogleReviewsService
@@ -11,11 +12,10 @@ from .yandex_reviews import YandexReviewsService
 
 def check_integration_access(user, company: Company) -> Tuple[bool, Optional[Member]]:
     """Check if user has permission to manage integrations."""
-    try:
-        membership = Member.objects.get(user=user, company=company, is_active=True)
-        return membership.can_manage(), membership
-    except Member.DoesNotExist:
+    membership = get_user_membership(user, company)
+    if not membership:
         return False, None
+    return membership.can_manage(), membership
 
 
 def check_connection_access(user, connection: Connection) -> Tuple[bool, Optional[Member]]:
@@ -12,6 +12,7 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 
 from apps.companies.models import Connection
+from ..http import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -127,9 +128,9 @@ class GoogleAuthService:
                 client_secret=self.client_secret,
             )
 
-            # Force refresh
+            # Force refresh (through the shared pooled session)
             from google.auth.transport.requests import Request
-            credentials.refresh(Request())
+            credentials.refresh(Request(session=get_http_client().session))
 
             # Update connection
             connection.access_token = credentials.token
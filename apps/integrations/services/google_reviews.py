@@ -5,17 +5,36 @@ from datetime import datetime
 from typing import Optional
 from dateutil import parser as date_parser
 
+from django.conf import settings
 from django.utils import timezone
 
+import google_auth_httplib2
+import httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from apps.companies.models import Connection
 from apps.reviews.models import Review
+from ..http import READ_TIMEOUT
 from .google_auth import GoogleAuthService
+from .review_sync import (
+    WATERMARK_FIELDS,
+    SyncResult,
+    advance_sync_watermark,
+    get_sync_watermark,
+    reaches_watermark,
+    write_platform_reviews,
+)
 
 logger = logging.getLogger(__name__)
 
+STAR_RATINGS = {'ONE': 1, 'TWO': 2, 'THREE': 3, 'FOUR': 4, 'FIVE': 5}
+
+# Built API clients by (connection id, access token, discovery URL): tasks reuse them
+# until the token is refreshed
+_clients: dict = {}
+MAX_CACHED_CLIENTS = 32
+
 
 class GoogleReviewsService:
     """
@@ -29,6 +48,8 @@ class GoogleReviewsService:
 
     API_SERVICE_NAME = 'mybusiness'
     API_VERSION = 'v4'
+    # Discovery document URL; None uses googleapiclient's bundled documents
+    DISCOVERY_URL = getattr(settings, 'GOOGLE_MYBUSINESS_DISCOVERY_URL', None)
 
     def __init__(self, connection: Connection):
         """
@@ -40,37 +61,61 @@ class GoogleReviewsService:
         self.connection = connection
         self.auth_service = GoogleAuthService()
         self._client = None
+        self._fetch_complete = False
 
     @property
     def client(self):
         """Get or create Google API client."""
         if self._client is None:
-            self._client = self._build_client()
+            self._client = self._get_client()
         return self._client
 
-    def _build_client(self):
-        """Build Google My Business API client."""
+    def _get_client(self):
+        """Reuse the connection's API client while its token is unchanged."""
         credentials = self.auth_service.get_credentials(self.connection)
         if not credentials:
             raise ValueError('No valid credentials for this connection')
 
+        key = (self.connection.id, credentials.token, self.DISCOVERY_URL)
+        client = _clients.get(key)
+        if client is None:
+            if len(_clients) >= MAX_CACHED_CLIENTS:
+                _clients.pop(next(iter(_clients)))
+            client = _clients[key] = self._build_client(credentials)
+        return client
+
+    def _build_client(self, credentials):
+        """Build Google My Business API client."""
+        # googleapiclient sends through httplib2: give it the default read timeout
+        http = google_auth_httplib2.AuthorizedHttp(
+            credentials, http=httplib2.Http(timeout=READ_TIMEOUT),
+        )
+        discovery = (
+            {'discoveryServiceUrl': self.DISCOVERY_URL, 'static_discovery': False}
+            if self.DISCOVERY_URL else {}
+        )
         return build(
             self.API_SERVICE_NAME,
             self.API_VERSION,
-            credentials=credentials,
+            http=http,
             cache_discovery=False,
+            **discovery,
         )
 
-    def fetch_reviews(self, page_size: int = 50) -> list[dict]:
+    def fetch_reviews(self, page_size: int = 50, watermark=None) -> list[dict]:
         """
-        Fetch all reviews from Google Business Profile.
+        Fetch reviews from Google Business Profile, newest first.
 
         Args:
             page_size: Number of reviews per page (max 50)
+            watermark: (platform_date, external_id) of the newest synced
+                review; paging stops at the first page reaching it
 
         Returns:
-            List of review dictionaries
+            List of review dictionaries. self._fetch_complete tells whether
+            it is the location's complete list.
         """
+        self._fetch_complete = False
         if not self.connection.google_resource_name:
             logger.warning(f'No Google resource name for connection {self.connection.id}')
             return []
@@ -87,10 +132,16 @@ class GoogleReviewsService:
                 )
                 response = request.execute()
 
-                reviews.extend(response.get('reviews', []))
+                page = response.get('reviews', [])
+                reviews.extend(page)
 
                 page_token = response.get('nextPageToken')
                 if not page_token:
+                    self._fetch_complete = True
+                    break
+
+                if reaches_watermark([self._review_fields(r) for r in page], watermark):
+                    logger.info('Reached sync watermark')
                     break
 
             logger.info(
@@ -103,47 +154,54 @@ class GoogleReviewsService:
             self._handle_api_error(e)
             return []
 
-    def sync_reviews_to_db(self) -> tuple[int, int]:
+    def sync_reviews_to_db(self) -> SyncResult:
         """
         Sync reviews from Google to local database.
 
+        Incremental up to the connection's watermark; a periodic full sync
+        pages through everything and removes reviews deleted on Google.
+
         Returns:
-            Tuple of (created_count, updated_count)
+            SyncResult with created, updated, unchanged and deleted counts
         """
-        google_reviews = self.fetch_reviews()
-        created = 0
-        updated = 0
-
-        for google_review in google_reviews:
-            review, was_created = self._save_review(google_review)
-            if was_created:
-                created += 1
-            else:
-                updated += 1
+        watermark = get_sync_watermark(self.connection)
+        rows = [
+            self._review_fields(google_review)
+            for google_review in self.fetch_reviews(watermark=watermark)
+        ]
+        full_sync = watermark is None and self._fetch_complete
+        result = write_platform_reviews(
+            self.connection.company, Review.Source.GOOGLE, rows, delete_missing=full_sync,
+        )
+        advance_sync_watermark(self.connection, rows, watermark, self._fetch_complete)
 
         # Update sync status
         self.connection.last_sync = timezone.now()
         self.connection.last_sync_status = Connection.SyncStatus.SUCCESS
         self.connection.last_sync_error = ''
+        self.connection.sync_failures = 0
         self.connection.save(update_fields=[
-            'last_sync', 'last_sync_status', 'last_sync_error', 'updated_at'
+            'last_sync', 'last_sync_status', 'last_sync_error', 'sync_failures', 'updated_at',
+            *WATERMARK_FIELDS,
         ])
 
         logger.info(
-            f'Synced reviews for {self.connection.company.name}: '
-            f'{created} created, {updated} updated'
+            f'Synced reviews for {self.connection.company.name}'
+            f'{" (full)" if full_sync else ""}: '
+            f'{result.created} created, {result.updated} updated, '
+            f'{result.unchanged} unchanged, {result.deleted} deleted'
         )
-        return created, updated
+        return result
 
-    def _save_review(self, google_review: dict) -> tuple[Review, bool]:
+    def _review_fields(self, google_review: dict) -> dict:
         """
-        Save or update a single review from Google.
+        Map a review from Google API to Review fields.
 
         Args:
             google_review: Review data from Google API
 
         Returns:
-            Tuple of (Review object, was_created)
+            Dict of Review fields including external_id
         """
         review_id = google_review.get('reviewId', '')
         reviewer = google_review.get('reviewer', {})
@@ -153,27 +211,17 @@ class GoogleReviewsService:
         created_at = self._parse_datetime(google_review.get('createTime'))
         response_at = self._parse_datetime(reply.get('updateTime')) if reply else None
 
-        # Build review URL
-        external_url = self._build_review_url(review_id)
-
-        review, created = Review.objects.update_or_create(
-            company=self.connection.company,
-            source=Review.Source.GOOGLE,
-            external_id=review_id,
-            defaults={
-                'rating': google_review.get('starRating', 0),
-                'text': google_review.get('comment', ''),
-                'author_name': reviewer.get('displayName', 'Google User'),
-                'external_url': external_url,
-                'platform_date': created_at,
-                'response': reply.get('comment', '') if reply else '',
-                'response_at': response_at,
-                # Don't overwrite local status if review was processed
-                # 'status': Review.Status.NEW if created else review.status,
-            }
-        )
-
-        return review, created
+        # Don't overwrite local status if review was processed
+        return {
+            'external_id': review_id,
+            'rating': self._parse_rating(google_review.get('starRating')),
+            'text': google_review.get('comment', ''),
+            'author_name': reviewer.get('displayName', 'Google User'),
+            'external_url': self._build_review_url(review_id),
+            'platform_date': created_at,
+            'response': reply.get('comment', '') if reply else '',
+            'response_at': response_at,
+        }
 
     def reply_to_review(self, review_id: str, text: str) -> bool:
         """
@@ -231,6 +279,13 @@ class GoogleReviewsService:
             logger.error(f'Failed to delete reply from review {review_id}: {e}')
             return False
 
+    @staticmethod
+    def _parse_rating(star_rating) -> int:
+        """Convert Google's starRating enum (e.g. 'FOUR') to 1-5."""
+        if isinstance(star_rating, int):
+            return star_rating
+        return STAR_RATINGS.get(star_rating, 0)
+
     def _parse_datetime(self, dt_string: Optional[str]) -> Optional[datetime]:
         """Parse ISO datetime string."""
         if not dt_string:
@@ -0,0 +1,313 @@
+"""
+Bulk writer for reviews fetched from external platforms.
+
+A sync batch is written with a fixed number of queries: one SELECT of the
+content hashes of existing (source, external_id) rows, one SELECT of the
+reviews whose hash differs, one bulk_create for new reviews and one
+bulk_update for reviews whose fields actually changed. Unchanged reviews
+are neither loaded nor written (except on full syncs, which compare every
+review's fields to catch local drift); new Yandex answer tokens are written by
+one more bulk_update of just the token fields. New reviews and reviews
+whose text or rating changed are analyzed (tags, sentiment) in one batch
+before the write, through the analysis cache. Signals don't
+fire for bulk writes, so derived data is refreshed once per batch via
+reviews_bulk_changed (apps/reviews/signals.py).
+
+Syncs are incremental: the newest review seen is stored on the Connection
+as a watermark, and paging stops at the first page that reaches it. Every
+PLATFORM_FULL_SYNC_INTERVAL seconds a full resync pages through everything
+to pick up edits of older reviews and removes reviews deleted upstream
+(after two full syncs in a row miss them).
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.companies.models import Company, Connection
+from apps.reviews.models import Review
+from apps.reviews.services import analyze_reviews
+from apps.reviews.signals import reviews_bulk_changed
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+FULL_SYNC_INTERVAL = timedelta(
+    seconds=getattr(settings, 'PLATFORM_FULL_SYNC_INTERVAL', 60 * 60 * 24)
+)
+
+WATERMARK_FIELDS = ['sync_watermark_at', 'sync_watermark_id', 'last_full_sync']
+
+# Review analysis depends on these fields and produces the others
+ANALYSIS_INPUTS = {'text', 'rating'}
+ANALYSIS_FIELDS = {'tags', 'tags_complex', 'sentiment_score'}
+
+# Row fields that aren't platform content: left out of the content hash
+# and written on their own, without loading or touching the review
+TOKEN_FIELDS = {'answer_token'}
+
+
+class SyncResult(NamedTuple):
+    """Outcome of writing a sync batch."""
+
+    created: int
+    updated: int
+    unchanged: int
+    deleted: int = 0
+
+
+# --- Watermark ---
+
+def is_full_sync_due(connection: Connection) -> bool:
+    """Whether this sync should page through all reviews."""
+    if connection.sync_watermark_at is None or connection.last_full_sync is None:
+        return True
+    return timezone.now() - connection.last_full_sync >= FULL_SYNC_INTERVAL
+
+
+def get_sync_watermark(connection: Connection) -> Optional[tuple[datetime, str]]:
+    """(platform_date, external_id) to stop paging at, or None for a full sync."""
+    if is_full_sync_due(connection):
+        return None
+    return connection.sync_watermark_at, connection.sync_watermark_id
+
+
+def reaches_watermark(rows: list[dict], watermark: Optional[tuple[datetime, str]]) -> bool:
+    """
+    Whether a page of reviews (newest first) reaches already synced ones.
+
+    The watermark review itself or anything older means every later page
+    was seen by a previous sync.
+    """
+    if watermark is None:
+        return False
+    watermark_at, watermark_id = watermark
+    return any(
+        row['external_id'] == watermark_id
+        or (row['platform_date'] is not None and row['platform_date'] < watermark_at)
+        for row in rows
+    )
+
+
+def advance_sync_watermark(
+    connection: Connection,
+    rows: list[dict],
+    watermark: Optional[tuple[datetime, str]],
+    complete: bool,
+) -> None:
+    """
+    Move the connection's watermark to the newest fetched review (not saved).
+
+    Args:
+        rows: Fetched reviews as Review fields
+        watermark: Watermark the fetch used (None for a full sync)
+        complete: Whether rows are the platform's complete list
+    """
+    if watermark is not None and not complete and not reaches_watermark(rows, watermark):
+        # New reviews didn't fit the page limit: close the gap with a full sync
+        connection.last_full_sync = None
+        return
+
+    dated = [row for row in rows if row.get('platform_date') is not None]
+    if dated:
+        newest = max(dated, key=lambda row: row['platform_date'])
+        if watermark is None or newest['platform_date'] > watermark[0]:
+            connection.sync_watermark_at = newest['platform_date']
+            connection.sync_watermark_id = newest['external_id']
+    if watermark is None and complete:
+        connection.last_full_sync = timezone.now()
+
+
+# --- Writer ---
+
+def write_platform_reviews(
+    company: Company,
+    source: str,
+    rows: list[dict],
+    delete_missing: bool = False,
+) -> SyncResult:
+    """
+    Insert new and update changed platform reviews of a company.
+
+    Args:
+        company: Company the reviews belong to
+        source: Review.Source value
+        rows: Review fields keyed by model field name; each row must have
+            'external_id'. Fields missing from a row are left untouched on
+            existing reviews (e.g. a response Yandex didn't return).
+            A changed 'answer_token' also stamps 'answer_token_at'.
+        delete_missing: rows are the platform's complete list; local
+            reviews of this source missing from it are marked, and deleted
+            when they are still missing from the next complete list
+
+    Returns:
+        SyncResult with created, updated, unchanged and deleted counts
+    """
+    # Последняя версия отзыва в пачке побеждает
+    rows_by_id = {row['external_id']: row for row in rows if row.get('external_id')}
+    if not rows_by_id:
+        # Пустой ответ платформы — не повод удалять все отзывы
+        return SyncResult(0, 0, 0)
+
+    with transaction.atomic():
+        deleted = 0
+        if delete_missing:
+            deleted = _reconcile_missing(company, source, rows_by_id.keys())
+
+        hashes = {external_id: content_hash(row) for external_id, row in rows_by_id.items()}
+        known = {
+            external_id: (pk, stored_hash, answer_token)
+            for external_id, pk, stored_hash, answer_token in Review.objects.filter(
+                company=company,
+                source=source,
+                external_id__in=list(rows_by_id),
+            ).values_list('external_id', 'pk', 'content_hash', 'answer_token')
+        }
+        now = timezone.now()
+        # Новый токен ответа — не изменение отзыва: пишется отдельно
+        token_updates = []
+        for external_id, (pk, _, answer_token) in known.items():
+            new_token = rows_by_id[external_id].get('answer_token', answer_token)
+            if new_token != answer_token:
+                token_updates.append(Review(pk=pk, answer_token=new_token, answer_token_at=now))
+
+        # Полностью загружаются только отзывы, чьё содержимое изменилось.
+        # Полная синхронизация сверяет все: хэш не видит локальных правок
+        changed_pks = [
+            pk for external_id, (pk, stored_hash, _) in known.items()
+            if delete_missing or stored_hash != hashes[external_id]
+        ]
+        existing = {
+            review.external_id: review
+            for review in Review.objects.filter(pk__in=changed_pks)
+        } if changed_pks else {}
+
+        to_create = []
+        to_update = []
+        to_analyze = []
+        update_fields = set()
+        rehashed = []
+        for external_id, row in rows_by_id.items():
+            if external_id in known and external_id not in existing:
+                continue  # Хэш совпал: отзыв не изменился
+
+            review = existing.get(external_id)
+            if review is None:
+                review = Review(company=company, source=source, content_hash=hashes[external_id], **row)
+                review.set_derived_fields()
+                if review.answer_token:
+                    review.answer_token_at = now
+                to_create.append(review)
+                continue
+
+            changed = {
+                name for name, value in row.items()
+                if name not in TOKEN_FIELDS and getattr(review, name) != value
+            }
+            if changed:
+                for name in changed:
+                    setattr(review, name, row[name])
+                if changed & ANALYSIS_INPUTS:
+                    to_analyze.append(review)
+                    changed |= ANALYSIS_FIELDS
+            review.content_hash = hashes[external_id]
+            if changed:
+                to_update.append(review)
+                update_fields |= changed
+            else:
+                # Нечего менять, кроме хэша (например, отзыв записан до его появления)
+                rehashed.append(review)
+
+        # Новые и изменённые по тексту отзывы анализируются одной пачкой
+        # и записываются тем же bulk_create/bulk_update
+        analyze_reviews(to_create + to_analyze)
+
+        if to_create:
+            Review.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_update:
+            # bulk_update не проставляет auto_now
+            for review in to_update:
+                review.updated_at = now
+            Review.objects.bulk_update(
+                to_update + rehashed,
+                sorted(update_fields | {'updated_at', 'content_hash'}),
+                batch_size=BATCH_SIZE,
+            )
+        elif rehashed:
+            Review.objects.bulk_update(rehashed, ['content_hash'], batch_size=BATCH_SIZE)
+        if token_updates:
+            # Без updated_at и сигналов: производные данные от токенов не зависят
+            Review.objects.bulk_update(
+                token_updates, sorted(Review.ANSWER_TOKEN_FIELDS), batch_size=BATCH_SIZE,
+            )
+
+        reviews_bulk_changed.send(
+            sender=Review,
+            company=company,
+            created=to_create,
+            updated=to_update,
+            update_fields=update_fields,
+        )
+
+    result = SyncResult(
+        created=len(to_create),
+        updated=len(to_update),
+        unchanged=len(rows_by_id) - len(to_create) - len(to_update),
+        deleted=deleted,
+    )
+    logger.debug(f'Wrote {source} reviews for company {company.id}: {result}')
+    return result
+
+
+def content_hash(row: dict) -> str:
+    """Hash of a row's platform content: text, rating, response, dates, author."""
+    content = {name: value for name, value in row.items() if name not in TOKEN_FIELDS}
+    raw = json.dumps(content, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _reconcile_missing(company: Company, source: str, external_ids) -> int:
+    """
+    Mark local reviews of the source absent from the platform's full list.
+
+    A review is deleted only when it was already missing from the previous
+    full list: one incomplete list taken for complete can't remove reviews
+    with their local responses and history. Reviews found again are unmarked.
+
+    Returns:
+        Number of deleted reviews
+    """
+    external_ids = set(external_ids)
+    missing, marked, found = [], [], []
+    for pk, external_id, missing_since in (
+        Review.objects.filter(company=company, source=source)
+        .exclude(external_id='')
+        .values_list('pk', 'external_id', 'missing_since')
+    ):
+        if external_id in external_ids:
+            if missing_since is not None:
+                found.append(pk)
+        elif missing_since is None:
+            missing.append(pk)
+        else:
+            marked.append(pk)
+
+    if found:
+        Review.objects.filter(pk__in=found).update(missing_since=None)
+    if missing:
+        Review.objects.filter(pk__in=missing).update(missing_since=timezone.now())
+        logger.info(f'Marked {len(missing)} {source} reviews missing from the platform')
+    if not marked:
+        return 0
+
+    # Через QuerySet.delete: сигналы удаления обновляют счётчики и алерты
+    Review.objects.filter(pk__in=marked).delete()
+    logger.info(f'Deleted {len(marked)} {source} reviews removed from the platform')
+    return len(marked)
@@ -0,0 +1,168 @@
+"""
+Scheduling of platform review syncs.
+
+Instead of queueing every connection at the same minute, a beat task runs
+every few minutes and queues only connections whose sync is due:
+last_sync + sync_frequency + a per-connection jitter. The jitter and the
+countdown within the run are derived from the connection id, so the same
+connection always lands at the same offset and connections stay spread
+out instead of drifting back into one burst.
+
+Due connections are queued in priority order: never synced, recent
+negative reviews (the owner wants to see them fast), then the most
+overdue relative to their frequency. At most SYNC_SCHEDULER_MAX_PER_RUN
+are queued per run; the rest stay due for the next run.
+
+A failing connection (expired cookies or token) is due again only after
+an exponential backoff from its last attempt (record_sync_failure), and
+ranks after healthy ones, so broken connections can't starve the run.
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.companies.models import Connection
+from apps.reviews.models import Review
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_PLATFORMS = ('google', 'yandex')
+
+# How often the scheduler runs (seconds); queued syncs are spread over it
+SCHEDULER_INTERVAL = getattr(settings, 'SYNC_SCHEDULER_INTERVAL', 5 * 60)
+MAX_PER_RUN = getattr(settings, 'SYNC_SCHEDULER_MAX_PER_RUN', 50)
+# Jitter added to the sync period: share of sync_frequency, capped
+JITTER_RATIO = 0.1
+MAX_JITTER = timedelta(minutes=30)
+RECENT_NEGATIVE_WINDOW = timedelta(hours=24)
+# Longest wait between attempts of a failing connection
+MAX_FAILURE_BACKOFF = timedelta(seconds=getattr(settings, 'SYNC_SCHEDULER_MAX_BACKOFF', 24 * 60 * 60))
+# A queued connection isn't queued again for this long (sync in flight)
+QUEUED_TIMEOUT = getattr(settings, 'SYNC_SCHEDULER_QUEUED_TIMEOUT', 30 * 60)
+
+
+def jitter_fraction(connection_id) -> float:
+    """Stable value in [0, 1) for a connection."""
+    digest = hashlib.md5(str(connection_id).encode()).hexdigest()
+    return int(digest[:8], 16) / 0x100000000
+
+
+def is_failing(connection: Connection) -> bool:
+    """Whether the last sync attempt failed (and when is known)."""
+    return (
+        connection.last_sync_status == Connection.SyncStatus.ERROR
+        and connection.last_sync_attempt is not None
+    )
+
+
+def sync_period(connection: Connection) -> timedelta:
+    """Wait between syncs: sync_frequency, doubled per failure in a row."""
+    period = timedelta(seconds=connection.sync_frequency)
+    if not is_failing(connection) or not connection.sync_failures:
+        return period
+    backoff = period * 2 ** min(connection.sync_failures - 1, 16)
+    return min(backoff, max(MAX_FAILURE_BACKOFF, period))
+
+
+def _last_run(connection: Connection) -> Optional[datetime]:
+    """The sync or failed attempt the next sync is counted from."""
+    return connection.last_sync_attempt if is_failing(connection) else connection.last_sync
+
+
+def next_sync_at(connection: Connection) -> Optional[datetime]:
+    """When the connection's next sync is due (None: never synced, due now)."""
+    last_run = _last_run(connection)
+    if last_run is None:
+        return None
+    period = sync_period(connection)
+    jitter = min(period * JITTER_RATIO, MAX_JITTER) * jitter_fraction(connection.id)
+    return last_run + period + jitter
+
+
+def queue_countdown(connection: Connection) -> int:
+    """Seconds to delay the queued sync, spreading a run's syncs over the interval."""
+    return int(SCHEDULER_INTERVAL * jitter_fraction(connection.id))
+
+
+def due_connections(
+    now: Optional[datetime] = None, limit: Optional[int] = MAX_PER_RUN,
+) -> list[Connection]:
+    """
+    Connections whose sync is due, highest priority first.
+
+    Args:
+        now: Current time (defaults to timezone.now())
+        limit: Maximum number of connections to return (None: all)
+    """
+    now = now or timezone.now()
+    connections = (
+        Connection.objects
+        .filter(platform_id__in=SCHEDULED_PLATFORMS, sync_enabled=True)
+        .annotate(has_recent_negative=Exists(
+            Review.objects.filter(
+                company=OuterRef('company'),
+                rating__lte=3,
+                created_at__gte=now - RECENT_NEGATIVE_WINDOW,
+            )
+        ))
+        .only(
+            'id', 'company_id', 'platform_id', 'sync_frequency', 'last_sync',
+            'last_sync_status', 'last_sync_attempt', 'sync_failures',
+        )
+    )
+
+    due = []
+    for connection in connections:
+        due_at = next_sync_at(connection)
+        if due_at is not None and due_at > now:
+            continue
+        last_run = _last_run(connection)
+        overdue = (
+            (now - last_run).total_seconds() / max(sync_period(connection).total_seconds(), 1)
+            if last_run else float('inf')
+        )
+        priority = (
+            is_failing(connection),
+            last_run is not None,
+            not connection.has_recent_negative,
+            -overdue,
+        )
+        due.append((priority, connection))
+
+    due.sort(key=lambda item: item[0])
+    return [connection for _, connection in due[:limit]]
+
+
+def mark_queued(connection: Connection) -> bool:
+    """Reserve the connection for this run; False if a sync is already queued."""
+    timeout = min(QUEUED_TIMEOUT, connection.sync_frequency)
+    return cache.add(_queued_key(connection.id), 1, timeout)
+
+
+def record_sync_failure(connection: Connection, error: str, retry: bool = False) -> None:
+    """
+    Save a failed sync attempt; the scheduler backs off from it.
+
+    Args:
+        retry: the attempt is a task retry of a run whose failure is
+            already counted; only the error and attempt time are saved
+    """
+    connection.last_sync_status = Connection.SyncStatus.ERROR
+    connection.last_sync_error = error[:500]
+    connection.last_sync_attempt = timezone.now()
+    update_fields = ['last_sync_status', 'last_sync_error', 'last_sync_attempt']
+    if not retry:
+        connection.sync_failures += 1
+        update_fields.append('sync_failures')
+    connection.save(update_fields=update_fields)
+
+
+def _queued_key(connection_id) -> str:
+    return f'integrations:sync:queued:{connection_id}'
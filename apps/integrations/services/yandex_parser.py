@@ -0,0 +1,251 @@
+"""
+Single-pass parser for Yandex Business reviews pages.
+
+The page embeds its state in a script as a JS object literal. The literal
+as a whole isn't guaranteed to be valid JSON, but the values we need are:
+the review list ("items"), "pager", the page CSRF tokens and the org
+rating. One regex scan over the page finds those keys in order, and each
+value is decoded in place with json.JSONDecoder.raw_decode. The decoded
+review list is skipped over, so review fields are never re-scanned and
+no per-review chunks are copied.
+
+If the review list as a whole isn't valid JSON (a JS literal such as
+undefined in one review), it is decoded item by item and the bad items
+are skipped. A review list whose end can't be found raises
+YandexParseError rather than passing for an empty page.
+"""
+
+import json
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUTHOR = 'Пользователь Яндекс'
+
+# Keys of interest, in one alternation. Rating alternatives are listed in
+# priority order (lower group index wins), as the old per-pattern search.
+_SCAN_RE = re.compile(
+    r'"(?P<key>items|pager|csrf|csrf_token)"\s*:\s*'
+    # "rating":4.9},"tdsCompany" — org rating near tdsCompany block
+    r'|"rating"\s*:\s*(?P<rating_0>\d\.\d)\s*\}\s*,\s*"tdsCompany"'
+    r'|"orgRating"\s*:\s*(?P<rating_1>\d\.\d)'
+    r'|"averageGrade"\s*:\s*(?P<rating_2>\d\.?\d?)'
+    r'|"totalScore"\s*:\s*(?P<rating_3>\d\.\d)'
+    # "rating":{"value":4.9, ...}  (org-level, not review-level)
+    r'|"rating"\s*:\s*\{\s*"value"\s*:\s*(?P<rating_4>\d\.\d)'
+    r'|"ratingValue"\s*:\s*"(?P<rating_5>\d\.\d)"'
+)
+_RATING_GROUPS = [f'rating_{i}' for i in range(6)]
+
+# x-csrf-token format: "hash:timestamp"
+_CSRF_RE = re.compile(r'[a-f0-9]+:[0-9]+')
+
+# Strings and structural characters, for skipping a JS value
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{},]', re.DOTALL)
+_WS_RE = re.compile(r'\s*')
+
+REVIEW_ID_KEY = 'cmnt_entity_id'
+
+_decoder = json.JSONDecoder()
+
+
+class YandexParseError(ValueError):
+    """The page has a review list that couldn't be decoded."""
+
+
+class YandexReviewsPage(NamedTuple):
+    """Everything the service needs from one reviews page."""
+
+    reviews: list[dict]
+    pager: dict
+    csrf: Optional[str]
+    reviews_csrf: Optional[str]
+    org_rating: Optional[float]
+
+    def answer_token(self, external_id: str) -> Optional[str]:
+        """Per-review answer CSRF token, if the review is on this page."""
+        for review in self.reviews:
+            if review['external_id'] == external_id:
+                return review['answer_csrf_token'] or None
+        return None
+
+
+def parse_reviews_page(html: str) -> YandexReviewsPage:
+    """Parse reviews, pager, CSRF tokens and org rating from a page."""
+    reviews = None
+    pager = {}
+    csrf = None
+    reviews_csrf = None
+    ratings = {}
+    undecoded_items = False
+
+    pos = 0
+    while True:
+        match = _SCAN_RE.search(html, pos)
+        if match is None:
+            break
+        pos = match.end()
+
+        key = match.group('key')
+        if key is None:
+            for priority, group in enumerate(_RATING_GROUPS):
+                value = match.group(group)
+                if value is not None:
+                    ratings.setdefault(priority, float(value))
+                    break
+            continue
+
+        if key == 'items':
+            if reviews is None:
+                items, end = _decode_review_list(html, match.end())
+                if items is not None:
+                    reviews = [_review_from_item(item) for item in items]
+                    pos = end
+                elif end is None:
+                    undecoded_items = True
+            continue
+
+        value, end = _decode_value(html, match.end())
+        if key == 'pager':
+            if not pager and isinstance(value, dict) and 'total' in value:
+                pager = {name: int(value.get(name, 0)) for name in ('limit', 'offset', 'total')}
+                pos = end
+        elif key == 'csrf':
+            if csrf is None and isinstance(value, str) and _CSRF_RE.fullmatch(value):
+                csrf = value
+        elif key == 'csrf_token':
+            if reviews_csrf is None and isinstance(value, str):
+                reviews_csrf = value
+
+    if reviews is None and undecoded_items:
+        raise YandexParseError('"items" is present but could not be decoded')
+
+    org_rating = next(
+        (ratings[p] for p in sorted(ratings) if 1.0 <= ratings[p] <= 5.0),
+        None,
+    )
+    return YandexReviewsPage(reviews or [], pager, csrf, reviews_csrf, org_rating)
+
+
+def _decode_value(html: str, start: int):
+    """Decode the JSON value at start; (None, start) if it isn't valid JSON."""
+    try:
+        return _decoder.raw_decode(html, start)
+    except json.JSONDecodeError:
+        return None, start
+
+
+def _decode_review_list(html: str, start: int):
+    """
+    Decode the review list at start.
+
+    Returns (review items, end); (None, start) if the value isn't a review
+    list and (None, None) if it isn't a value that can be decoded. Items
+    that aren't valid JSON or lack the review id are skipped.
+    """
+    value, end = _decode_value(html, start)
+    if value is not None:
+        if not isinstance(value, list):
+            return None, start
+        items, skipped = value, []
+    else:
+        decoded = _decode_list_items(html, start)
+        if decoded is None:
+            if REVIEW_ID_KEY in html[start:start + 1000]:
+                raise YandexParseError(f'Unterminated review list at {start}')
+            return None, None
+        items, skipped, end = decoded
+
+    reviews = [item for item in items if isinstance(item, dict) and REVIEW_ID_KEY in item]
+    bad = len(items) - len(reviews) + sum(REVIEW_ID_KEY in chunk for chunk in skipped)
+    if not reviews and not any(REVIEW_ID_KEY in chunk for chunk in skipped):
+        return None, start
+    if bad:
+        logger.warning(f'Skipped {bad} undecodable Yandex review items')
+    return reviews, end
+
+
+def _decode_list_items(html: str, start: int):
+    """
+    Decode a JS array item by item.
+
+    Returns (decoded items, raw chunks of items that aren't valid JSON,
+    end), or None if there's no array at start or its end isn't found.
+    """
+    pos = _WS_RE.match(html, start).end()
+    if not html.startswith('[', pos):
+        return None
+    items, skipped = [], []
+    pos += 1
+    while True:
+        pos = _WS_RE.match(html, pos).end()
+        if html.startswith(']', pos):
+            return items, skipped, pos + 1
+        try:
+            item, end = _decoder.raw_decode(html, pos)
+        except json.JSONDecodeError:
+            item, end = None, pos
+        after = _WS_RE.match(html, end).end()
+        if end == pos or not html.startswith((',', ']'), after):
+            # Not JSON (or JSON followed by a JS literal): skip the whole item
+            end = _skip_value(html, pos)
+            if end is None:
+                return None
+            skipped.append(html[pos:end])
+            after = end
+        else:
+            items.append(item)
+        pos = after + 1 if html.startswith(',', after) else after
+
+
+def _skip_value(html: str, start: int) -> Optional[int]:
+    """Index of the ',' or ']' ending the array item at start (None if unbalanced)."""
+    depth = 0
+    for match in _TOKEN_RE.finditer(html, start):
+        token = match.group()
+        if token in '[{':
+            depth += 1
+        elif token in ']}':
+            if depth == 0:
+                return match.start() if token == ']' else None
+            depth -= 1
+        elif token == ',' and depth == 0:
+            return match.start()
+    return None
+
+
+def _review_from_item(item: dict) -> dict:
+    """Map a decoded review object to the service's review dict."""
+    author = item.get('author') or {}
+    public_id = author.get('public_id') or item.get('public_id')
+    owner_comment = item.get('owner_comment') or {}
+
+    return {
+        'external_id': item['cmnt_entity_id'],
+        'author_name': author.get('user') or DEFAULT_AUTHOR,
+        'author_profile_url': f'https://yandex.ru/maps/user/{public_id}' if public_id else '',
+        'text': item.get('full_text') or item.get('snippet') or '',
+        'rating': _parse_rating(item.get('rating')),
+        'platform_date': _parse_timestamp(item.get('time_created')),
+        'response': owner_comment.get('text') or '',
+        'response_at': _parse_timestamp(owner_comment.get('time_created')),
+        'answer_csrf_token': item.get('business_answer_csrf_token') or '',
+    }
+
+
+def _parse_rating(value) -> int:
+    try:
+        rating = int(value)
+    except (TypeError, ValueError):
+        return 5
+    return rating if 1 <= rating <= 5 else 5
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Milliseconds since epoch to an aware datetime."""
+    if not isinstance(value, (int, float)):
+        return None
+    return datetime.fromtimestamp(value / 1000, tz=dt_timezone.utc)
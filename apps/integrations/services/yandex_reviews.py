@@ -2,17 +2,28 @@
 
 import json
 import logging
-import re
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import requests
-from datetime import timezone as dt_timezone
 
+from django.conf import settings
 from django.utils import timezone
 
 from apps.companies.models import Connection
 from apps.reviews.models import Review
+from ..http import HttpClient
+from .review_sync import (
+    WATERMARK_FIELDS,
+    SyncResult,
+    advance_sync_watermark,
+    get_sync_watermark,
+    reaches_watermark,
+    write_platform_reviews,
+)
+from .yandex_parser import YandexReviewsPage, parse_reviews_page
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +36,13 @@ USER_AGENT = (
     'Chrome/145.0.0.0 Safari/537.36'
 )
 
+# Pages fetched in parallel and the minimum gap between request starts
+FETCH_CONCURRENCY = getattr(settings, 'YANDEX_SYNC_CONCURRENCY', 4)
+REQUEST_INTERVAL = getattr(settings, 'YANDEX_SYNC_REQUEST_INTERVAL', 0.25)
+
+# Reply statuses meaning the answer token wasn't accepted
+ANSWER_TOKEN_REJECTED = {400, 403}
+
 
 class YandexSessionError(Exception):
     """Raised when Yandex session is invalid or expired."""
@@ -39,21 +57,28 @@ class YandexReviewsService:
 
     Usage:
         service = YandexReviewsService(connection)
-        created, updated = service.sync_reviews_to_db()
+        result = service.sync_reviews_to_db()
         service.reply_to_review(external_id, "Спасибо!")
+        service.reply_to_reviews({external_id: "Спасибо!", ...})
     """
 
     BASE_URL = 'https://yandex.ru/sprav'
     REVIEWS_PER_PAGE = 20  # Yandex default
+    MAX_PAGES = 10  # Incremental sync usually stops at the first page
+    FULL_SYNC_MAX_PAGES = 250
 
     def __init__(self, connection: Connection):
         self.connection = connection
         self.company_id = connection.external_id  # Yandex org ID
-        self._session: Optional[requests.Session] = None
+        self._pacing_lock = threading.Lock()
+        self._next_request_at = 0.0
         self._cookies: dict = {}
-        self._first_page_html: Optional[str] = None
+        self._first_page: Optional[YandexReviewsPage] = None
         self._pager: dict = {}
+        self._fetch_complete = False
         self._load_cookies()
+        # Pooled, thread-safe client: one keep-alive session per fetching thread
+        self.session = HttpClient(headers={'user-agent': USER_AGENT}, cookies=self._cookies)
 
     def _load_cookies(self):
         """Load cookies from connection.access_token (JSON string)."""
@@ -68,14 +93,14 @@ class YandexReviewsService:
         if missing:
             raise YandexSessionError(f'Missing required cookies: {", ".join(missing)}')
 
-    @property
-    def session(self) -> requests.Session:
-        """Get or create requests session with cookies."""
-        if self._session is None:
-            self._session = requests.Session()
-            self._session.cookies.update(self._cookies)
-            self._session.headers.update({'user-agent': USER_AGENT})
-        return self._session
+    def _wait_turn(self):
+        """Space request starts at least REQUEST_INTERVAL apart across threads."""
+        with self._pacing_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + REQUEST_INTERVAL
+        if wait > 0:
+            time.sleep(wait)
 
     def check_session_valid(self) -> bool:
         """Check if cookies are still valid by loading the reviews page."""
@@ -85,66 +110,126 @@ class YandexReviewsService:
         except Exception:
             return False
 
-    def fetch_reviews(self, max_pages: int = 10) -> list[dict]:
+    def fetch_reviews(self, max_pages: int = 10, watermark=None) -> list[dict]:
         """
-        Fetch all reviews from Yandex Business.
+        Fetch reviews from Yandex Business, newest first.
+
+        Page 1 is fetched first; its pager tells how many pages there are,
+        and the rest are fetched concurrently in waves of FETCH_CONCURRENCY
+        pages. Pages are assembled in order; if one fails, the pages before
+        it are kept.
 
-        Returns list of parsed review dicts.
+        Args:
+            max_pages: Page limit
+            watermark: (platform_date, external_id) of the newest synced
+                review; paging stops at the first page reaching it
+
+        Returns list of parsed review dicts. self._fetch_complete tells
+        whether it is the organization's complete list: only when as many
+        distinct reviews were collected as the pager's total (pages shifted
+        by new reviews repeat some and may skip others).
         """
+        self._fetch_complete = False
+        try:
+            first = self._fetch_page(1)
+        except Exception as e:
+            logger.warning(f'Stopped fetching at page 1: {e}. Returning 0 reviews.')
+            return []
+
+        # Cache first page data for platform rating extraction
+        self._first_page = first
+        self._pager = first.pager
+
         all_reviews = []
-        total = None
+        seen_ids = set()
+        total = first.pager.get('total')
+        per_page = first.pager.get('limit') or len(first.reviews) or self.REVIEWS_PER_PAGE
+        last_page = min(max_pages, -(-total // per_page)) if total else max_pages
+
+        next_page = 2
+        pages = iter([(1, first)])
+        with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as pool:
+            while True:
+                stop = self._collect_pages(pages, all_reviews, seen_ids, total, watermark)
+                if stop or next_page > last_page:
+                    break
+                wave = range(next_page, min(next_page + FETCH_CONCURRENCY, last_page + 1))
+                next_page = wave.stop
+                futures = [(page, pool.submit(self._fetch_page, page)) for page in wave]
+                pages = self._page_results(futures)
 
-        for page in range(1, max_pages + 1):
-            try:
-                html = self._fetch_reviews_html(page=page)
-            except (YandexSessionError, Exception) as e:
-                logger.warning(
-                    f'Stopped fetching at page {page}: {e}. '
-                    f'Returning {len(all_reviews)} reviews fetched so far.'
-                )
-                break
+        logger.info(
+            f'Fetched {len(all_reviews)} reviews for Yandex org {self.company_id}'
+        )
+        return all_reviews
 
-            reviews, pager = self._parse_reviews_from_html(html)
+    def _collect_pages(
+        self, pages, all_reviews: list, seen_ids: set, total: Optional[int], watermark,
+    ) -> bool:
+        """
+        Append fetched pages in order.
 
-            # Cache first page data for platform rating extraction
-            if page == 1:
-                self._first_page_html = html
-                self._pager = pager
+        Returns:
+            True if paging should stop (failed page, last page, watermark).
+        """
+        for page, parsed in pages:
+            if parsed is None:
+                # Failed page: keep what came before it, in order
+                return True
 
-            if not reviews:
-                break
+            all_reviews.extend(parsed.reviews)
+            seen_ids.update(review['external_id'] for review in parsed.reviews)
 
-            all_reviews.extend(reviews)
+            if total is not None and len(seen_ids) >= total:
+                self._fetch_complete = True
+                return True
 
-            # Check if there are more pages
-            if total is None and pager:
-                total = pager.get('total', 0)
+            if not parsed.reviews:
+                # Short of the pager's total: not the end of the list
+                logger.warning(
+                    f'Empty page {page} after {len(seen_ids)} of {total} reviews'
+                )
+                return True
 
-            if total and len(all_reviews) >= total:
-                break
+            if reaches_watermark(parsed.reviews, watermark):
+                logger.info(f'Reached sync watermark at page {page}')
+                return True
+        return False
 
-        logger.info(
-            f'Fetched {len(all_reviews)} reviews for Yandex org {self.company_id}'
-        )
-        return all_reviews
+    def _page_results(self, futures):
+        """Yield (page, parsed page or None) in page order."""
+        for page, future in futures:
+            try:
+                yield page, future.result()
+            except Exception as e:
+                logger.warning(f'Stopped fetching at page {page}: {e}.')
+                yield page, None
 
-    def sync_reviews_to_db(self) -> tuple[int, int]:
+    def _fetch_page(self, page: int) -> YandexReviewsPage:
+        """Fetch and parse one reviews page (runs in a pool thread)."""
+        return parse_reviews_page(self._fetch_reviews_html(page=page))
+
+    def sync_reviews_to_db(self) -> SyncResult:
         """
         Sync reviews from Yandex to local database.
 
+        Incremental up to the connection's watermark; a periodic full sync
+        pages through everything and removes reviews deleted on Yandex.
+
         Returns:
-            Tuple of (created_count, updated_count)
+            SyncResult with created, updated, unchanged and deleted counts
         """
-        yandex_reviews = self.fetch_reviews()
-        created = 0
-        updated = 0
-
-        for review_data in yandex_reviews:
-            review, was_created = self._save_review(review_data)
-            if was_created:
-                created += 1
-            else:
-                updated += 1
+        watermark = get_sync_watermark(self.connection)
+        yandex_reviews = self.fetch_reviews(
+            max_pages=self.MAX_PAGES if watermark else self.FULL_SYNC_MAX_PAGES,
+            watermark=watermark,
+        )
+        rows = [self._review_fields(review_data) for review_data in yandex_reviews]
+        full_sync = watermark is None and self._fetch_complete
+        result = write_platform_reviews(
+            self.connection.company, Review.Source.YANDEX, rows, delete_missing=full_sync,
+        )
+        advance_sync_watermark(self.connection, rows, watermark, self._fetch_complete)
 
         # Update platform rating from cached first-page HTML
         self._update_platform_rating()
@@ -153,16 +238,20 @@ class YandexReviewsService:
         self.connection.last_sync = timezone.now()
         self.connection.last_sync_status = Connection.SyncStatus.SUCCESS
         self.connection.last_sync_error = ''
+        self.connection.sync_failures = 0
         self.connection.save(update_fields=[
-            'last_sync', 'last_sync_status', 'last_sync_error',
+            'last_sync', 'last_sync_status', 'last_sync_error', 'sync_failures',
             'platform_rating', 'platform_review_count', 'updated_at',
+            *WATERMARK_FIELDS,
         ])
 
         logger.info(
-            f'Synced Yandex reviews for {self.connection.company.name}: '
-            f'{created} created, {updated} updated'
+            f'Synced Yandex reviews for {self.connection.company.name}'
+            f'{" (full)" if full_sync else ""}: '
+            f'{result.created} created, {result.updated} updated, '
+            f'{result.unchanged} unchanged, {result.deleted} deleted'
         )
-        return created, updated
+        return result
 
     def reply_to_review(self, external_id: str, text: str) -> bool:
         """
@@ -175,71 +264,86 @@ class YandexReviewsService:
         Returns:
             True if successful
         """
-        # Need to fetch the page to get fresh CSRF tokens
-        html = self._fetch_reviews_html(page=1)
-        csrf_tokens = self._find_csrf_tokens(html)
+        return self.reply_to_reviews({external_id: text})[external_id]
 
-        x_csrf = csrf_tokens.get('x-csrf-token')
-        reviews_csrf = csrf_tokens.get('reviewsCsrfToken')
+    def reply_to_reviews(self, replies: dict[str, str]) -> dict[str, bool]:
+        """
+        Reply to several reviews on Yandex.
 
-        if not x_csrf or not reviews_csrf:
-            logger.error('Could not extract CSRF tokens for reply')
-            return False
+        Page CSRF tokens come from one page 1 fetch. Answer tokens are taken
+        from the reviews saved by sync; a review is looked up on the pages
+        only when it has no token or Yandex rejects the cached one.
 
-        # Find the per-review answer token
-        answer_token = self._find_answer_token(html, external_id)
-        if not answer_token:
-            # Review might be on a different page, fetch all pages
-            answer_token = self._find_answer_token_all_pages(external_id)
-            if not answer_token:
-                logger.error(f'Could not find answer token for review {external_id}')
-                return False
+        Args:
+            replies: {external_id: reply text}
 
-        url = f'{self.BASE_URL}/api/ugcpub/business-answer'
-        headers = {
-            'accept': 'application/json; charset=UTF-8',
-            'content-type': 'application/json; charset=UTF-8',
-            'origin': 'https://yandex.ru',
-            'x-requested-with': 'XMLHttpRequest',
-            'x-csrf-token': x_csrf,
-            'referer': (
-                f'{self.BASE_URL}/{self.company_id}/p/edit/reviews/'
-                f'?ranking=by_time&page=1&type=company'
-            ),
-        }
-        body = {
-            'reviewId': external_id,
-            'text': text,
-            'answerCsrfToken': answer_token,
-            'reviewsCsrfToken': reviews_csrf,
-        }
+        Returns:
+            {external_id: True if the reply was posted}
+        """
+        results = {external_id: False for external_id in replies}
+        if not replies:
+            return results
 
-        resp = self.session.post(url, json=body, headers=headers)
+        # Need to fetch the page to get fresh CSRF tokens
+        page = parse_reviews_page(self._fetch_reviews_html(page=1))
+        if not page.csrf or not page.reviews_csrf:
+            logger.error('Could not extract CSRF tokens for reply')
+            return results
+        self._pager = page.pager
+
+        reviews = {
+            review.external_id: review
+            for review in Review.objects.filter(
+                company=self.connection.company,
+                source=Review.Source.YANDEX,
+                external_id__in=list(replies),
+            ).only('id', 'external_id', 'platform_date', 'answer_token')
+        }
 
-        if resp.status_code == 200:
-            logger.info(f'Posted reply to Yandex review {external_id}')
-            return True
+        for external_id, text in replies.items():
+            review = reviews.get(external_id)
+            answer_token = page.answer_token(external_id)
+            cached = not answer_token and review is not None and bool(review.answer_token)
+            if cached:
+                answer_token = review.answer_token
+            elif not answer_token:
+                answer_token = self._refetch_answer_token(external_id, review)
+                if not answer_token:
+                    logger.error(f'Could not find answer token for review {external_id}')
+                    continue
+
+            resp = self._post_answer(page, external_id, text, answer_token)
+            if cached and resp.status_code in ANSWER_TOKEN_REJECTED:
+                # The cached token may be outdated: look the review up again
+                fresh_token = self._refetch_answer_token(external_id, review)
+                if fresh_token and fresh_token != answer_token:
+                    resp = self._post_answer(page, external_id, text, fresh_token)
+
+            if resp.status_code == 200:
+                logger.info(f'Posted reply to Yandex review {external_id}')
+                results[external_id] = True
+            else:
+                logger.error(
+                    f'Failed to reply to Yandex review {external_id}: '
+                    f'status={resp.status_code}, body={resp.text[:200]}'
+                )
 
-        logger.error(
-            f'Failed to reply to Yandex review {external_id}: '
-            f'status={resp.status_code}, body={resp.text[:200]}'
-        )
-        return False
+        return results
 
     # --- Private methods ---
 
     def _update_platform_rating(self):
-        """Extract org rating from cached first-page HTML and update connection."""
-        html = self._first_page_html
-        if not html:
+        """Take org rating from the cached first page and update connection."""
+        page = self._first_page
+        if page is None:
             return
 
         # Review count from pager
         if self._pager.get('total'):
             self.connection.platform_review_count = self._pager['total']
 
-        # Org-level rating — try several known patterns
-        rating = self._parse_org_rating(html)
+        # Org-level rating
+        rating = page.org_rating
         if rating:
             from decimal import Decimal
             self.connection.platform_rating = Decimal(str(rating))
@@ -248,36 +352,12 @@ class YandexReviewsService:
                 f'{rating} ({self.connection.platform_review_count} reviews)'
             )
 
-    @staticmethod
-    def _parse_org_rating(html: str) -> Optional[float]:
-        """Try to extract the organization's overall rating from HTML."""
-        patterns = [
-            # "rating":4.9},"tdsCompany" — org rating near tdsCompany block
-            r'"rating"\s*:\s*(\d\.\d)\s*\}\s*,\s*"tdsCompany"',
-            # "orgRating":4.9
-            r'"orgRating"\s*:\s*(\d\.\d)',
-            # "averageGrade":4.9
-            r'"averageGrade"\s*:\s*(\d\.?\d?)',
-            # "totalScore":4.9
-            r'"totalScore"\s*:\s*(\d\.\d)',
-            # "rating":{"value":4.9, ...}  (org-level, not review-level)
-            r'"rating"\s*:\s*\{\s*"value"\s*:\s*(\d\.\d)',
-            # "ratingValue":"4.9"
-            r'"ratingValue"\s*:\s*"(\d\.\d)"',
-        ]
-        for pattern in patterns:
-            m = re.search(pattern, html)
-            if m:
-                val = float(m.group(1))
-                if 1.0 <= val <= 5.0:
-                    return val
-        return None
-
     def _fetch_reviews_html(self, page: int = 1) -> str:
         """Fetch reviews page HTML."""
         url = f'{self.BASE_URL}/{self.company_id}/p/edit/reviews/'
         params = {'ranking': 'by_time', 'page': page, 'type': 'company'}
 
+        self._wait_turn()
         resp = self.session.get(url, params=params)
         resp.raise_for_status()
 
@@ -288,151 +368,14 @@ class YandexReviewsService:
 
         return resp.text
 
-    def _parse_reviews_from_html(self, html: str) -> tuple[list[dict], dict]:
-        """
-        Parse reviews and pager from HTML.
-
-        Returns:
-            Tuple of (reviews_list, pager_dict)
-        """
-        reviews = []
-
-        # Extract pager: "pager":{"limit":20,"offset":0,"total":16}
-        pager = {}
-        pager_match = re.search(
-            r'"pager"\s*:\s*\{"limit"\s*:\s*(\d+)\s*,'
-            r'\s*"offset"\s*:\s*(\d+)\s*,'
-            r'\s*"total"\s*:\s*(\d+)\s*\}',
-            html
-        )
-        if pager_match:
-            pager = {
-                'limit': int(pager_match.group(1)),
-                'offset': int(pager_match.group(2)),
-                'total': int(pager_match.group(3)),
-            }
-
-        # Find all review IDs and their tokens
-        review_ids = re.findall(r'"cmnt_entity_id"\s*:\s*"([^"]+)"', html)
-        tokens = re.findall(r'"business_answer_csrf_token"\s*:\s*"([^"]+)"', html)
-
-        for rid, token in zip(review_ids, tokens):
-            review_data = self._extract_review_data(html, rid, token)
-            if review_data:
-                reviews.append(review_data)
-
-        return reviews, pager
-
-    def _extract_review_data(self, html: str, review_id: str, token: str) -> Optional[dict]:
-        """Extract a single review's data from HTML context."""
-        pos = html.find(f'"cmnt_entity_id":"{review_id}"')
-        if pos < 0:
-            return None
-
-        # Get context: 3000 chars before (contains review data)
-        start = max(0, pos - 3000)
-        end = min(len(html), pos + 200)
-        chunk = html[start:end]
-
-        # Find the boundary of THIS review's data by locating
-        # the previous review's cmnt_entity_id in the chunk.
-        # Everything after it belongs to the current review.
-        review_offset = 0
-        current_cmnt_marker = f'"cmnt_entity_id":"{review_id}"'
-        current_cmnt_pos = chunk.find(current_cmnt_marker)
-        if current_cmnt_pos > 0:
-            # Find any cmnt_entity_id BEFORE the current one
-            prev_cmnt = chunk.rfind('"cmnt_entity_id"', 0, current_cmnt_pos)
-            if prev_cmnt >= 0:
-                review_offset = prev_cmnt + 80  # skip past previous review's tail
-
-        # Use only this review's data for field extraction
-        review_chunk = chunk[review_offset:]
-
-        # Author name and profile URL
-        author = 'Пользователь Яндекс'
-        author_profile_url = ''
-        author_match = re.search(
-            r'"author"\s*:\s*\{[^}]*"user"\s*:\s*"([^"]+)"', review_chunk
-        )
-        if author_match:
-            author = author_match.group(1)
-
-        public_id_match = re.search(
-            r'"public_id"\s*:\s*"([^"]+)"', review_chunk
-        )
-        if public_id_match:
-            author_profile_url = (
-                f'https://yandex.ru/maps/user/{public_id_match.group(1)}'
-            )
-
-        # Review text (snippet or full_text)
-        text = ''
-        for field in ['full_text', 'snippet']:
-            text_match = re.search(
-                rf'"{field}"\s*:\s*"((?:[^"\\]|\\.)*)"', review_chunk
-            )
-            if text_match:
-                text = text_match.group(1)
-                text = self._decode_text(text)
-                break
-
-        # Rating
-        rating = 5
-        rating_match = re.search(r'"rating"\s*:\s*(\d)', review_chunk)
-        if rating_match:
-            rating = int(rating_match.group(1))
-
-        # Created timestamp (ms) — use time_created that is NOT inside owner_comment
-        platform_date = None
-        oc_pos = review_chunk.find('"owner_comment"')
-        # Search for time_created only before owner_comment (review's own date)
-        search_area = review_chunk[:oc_pos] if oc_pos > 0 else review_chunk
-        time_match = re.search(r'"time_created"\s*:\s*(\d{13})', search_area)
-        if time_match:
-            ts_ms = int(time_match.group(1))
-            platform_date = datetime.fromtimestamp(ts_ms / 1000, tz=dt_timezone.utc)
-
-        # Owner response
-        response = ''
-        oc_match = re.search(
-            r'"owner_comment"\s*:\s*\{[^}]*"text"\s*:\s*"((?:[^"\\]|\\.)*)"',
-            review_chunk
-        )
-        if oc_match:
-            response = self._decode_text(oc_match.group(1))
-
-        # Response date
-        response_at = None
-        oc_time_match = re.search(
-            r'"owner_comment"\s*:\s*\{"time_created"\s*:\s*(\d{13})', review_chunk
-        )
-        if oc_time_match:
-            ts_ms = int(oc_time_match.group(1))
-            response_at = datetime.fromtimestamp(ts_ms / 1000, tz=dt_timezone.utc)
-
-        # Decode token
-        token_decoded = self._decode_unicode_escapes(token)
-
-        return {
-            'external_id': review_id,
-            'author_name': author,
-            'author_profile_url': author_profile_url,
-            'text': text,
-            'rating': rating,
-            'platform_date': platform_date,
-            'response': response,
-            'response_at': response_at,
-            'answer_csrf_token': token_decoded,
-        }
-
-    def _save_review(self, review_data: dict) -> tuple[Review, bool]:
-        """Save or update a single review from Yandex."""
+    def _review_fields(self, review_data: dict) -> dict:
+        """Map a parsed Yandex review to Review fields."""
         external_url = (
             f'https://yandex.ru/maps/org/{self.company_id}/reviews/'
         )
 
-        defaults = {
+        fields = {
+            'external_id': review_data['external_id'],
             'rating': review_data['rating'],
             'text': review_data['text'],
             'author_name': review_data['author_name'],
@@ -441,77 +384,80 @@ class YandexReviewsService:
             'platform_date': review_data['platform_date'],
         }
 
+        # Keep the cached answer token if this fetch didn't return one
+        if review_data.get('answer_csrf_token'):
+            fields['answer_token'] = review_data['answer_csrf_token']
+
         # Only update response if Yandex has one and we don't have a local one yet
         if review_data['response']:
-            defaults['response'] = review_data['response']
-            defaults['response_at'] = review_data['response_at']
-
-        review, created = Review.objects.update_or_create(
-            company=self.connection.company,
-            source=Review.Source.YANDEX,
-            external_id=review_data['external_id'],
-            defaults=defaults,
-        )
-
-        return review, created
-
-    def _find_csrf_tokens(self, html: str) -> dict:
-        """Extract page-level CSRF tokens from HTML."""
-        tokens = {}
-
-        # x-csrf-token: "csrf":"hash:timestamp"
-        csrf_match = re.search(r'"csrf"\s*:\s*"([a-f0-9]+:[0-9]+)"', html)
-        if csrf_match:
-            tokens['x-csrf-token'] = csrf_match.group(1)
+            fields['response'] = review_data['response']
+            fields['response_at'] = review_data['response_at']
 
-        # reviewsCsrfToken: "csrf_token":"..." (near pager)
-        csrf_token_match = re.search(r'"csrf_token"\s*:\s*"([^"]+)"', html)
-        if csrf_token_match:
-            tokens['reviewsCsrfToken'] = self._decode_unicode_escapes(csrf_token_match.group(1))
+        return fields
 
-        return tokens
+    def _post_answer(
+        self, page: YandexReviewsPage, external_id: str, text: str, answer_token: str,
+    ) -> requests.Response:
+        """POST a business answer to one review."""
+        url = f'{self.BASE_URL}/api/ugcpub/business-answer'
+        headers = {
+            'accept': 'application/json; charset=UTF-8',
+            'content-type': 'application/json; charset=UTF-8',
+            'origin': 'https://yandex.ru',
+            'x-requested-with': 'XMLHttpRequest',
+            'x-csrf-token': page.csrf,
+            'referer': (
+                f'{self.BASE_URL}/{self.company_id}/p/edit/reviews/'
+                f'?ranking=by_time&page=1&type=company'
+            ),
+        }
+        body = {
+            'reviewId': external_id,
+            'text': text,
+            'answerCsrfToken': answer_token,
+            'reviewsCsrfToken': page.reviews_csrf,
+        }
+        return self.session.post(url, json=body, headers=headers)
 
-    def _find_answer_token(self, html: str, external_id: str) -> Optional[str]:
-        """Find per-review answer CSRF token."""
-        pos = html.find(f'"cmnt_entity_id":"{external_id}"')
-        if pos < 0:
-            return None
+    def _refetch_answer_token(self, external_id: str, review: Optional[Review]) -> Optional[str]:
+        """
+        Fetch a fresh answer token and save it on the review.
 
-        # Token is after cmnt_entity_id in the HTML
-        chunk = html[pos:pos + 500]
-        token_match = re.search(
-            r'"business_answer_csrf_token"\s*:\s*"([^"]+)"', chunk
-        )
-        if token_match:
-            return self._decode_unicode_escapes(token_match.group(1))
-        return None
+        The page a synced review is on follows from how many reviews are
+        newer than it; that page and the next one (new reviews push older
+        ones down) are tried before scanning all pages.
+        """
+        token = None
+        if review is not None and review.platform_date is not None:
+            newer = Review.objects.filter(
+                company=self.connection.company,
+                source=Review.Source.YANDEX,
+                platform_date__gt=review.platform_date,
+            ).count()
+            per_page = self._pager.get('limit') or self.REVIEWS_PER_PAGE
+            expected_page = newer // per_page + 1
+            token = self._find_answer_token(external_id, [expected_page, expected_page + 1])
+        if not token:
+            token = self._find_answer_token(external_id, range(2, 20))
+
+        if token and review is not None:
+            # Через update: служебное поле, сигналы сохранения не нужны
+            Review.objects.filter(pk=review.pk).update(
+                answer_token=token, answer_token_at=timezone.now(),
+            )
+        return token
 
-    def _find_answer_token_all_pages(self, external_id: str) -> Optional[str]:
-        """Search all pages for a review's answer token."""
-        for page in range(1, 20):
+    def _find_answer_token(self, external_id: str, pages) -> Optional[str]:
+        """Search the given pages for a review's answer token."""
+        for page in pages:
             try:
-                html = self._fetch_reviews_html(page=page)
-                token = self._find_answer_token(html, external_id)
-                if token:
-                    return token
-                # Check if we've gone past the last page
-                if f'"cmnt_entity_id"' not in html:
-                    break
+                parsed = parse_reviews_page(self._fetch_reviews_html(page=page))
             except Exception:
                 break
+            token = parsed.answer_token(external_id)
+            if token:
+                return token
+            # Check if we've gone past the last page
+            if not parsed.reviews:
+                break
         return None
-
-    @staticmethod
-    def _decode_unicode_escapes(s: str) -> str:
-        """Decode \\u002F-style escapes in tokens. Use only for CSRF tokens."""
-        if '\\u' not in s:
-            return s
-        try:
-            return s.encode().decode('unicode_escape')
-        except (UnicodeDecodeError, UnicodeEncodeError):
-            return s.replace('\\u002F', '/')
-
-    @staticmethod
-    def _decode_text(s: str) -> str:
-        """Clean up review text — handle \\n but don't mangle UTF-8."""
-        return s.replace('\\n', '\n').replace('\\/', '/')
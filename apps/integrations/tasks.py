@@ -7,10 +7,32 @@ from celery import shared_task
 from django.utils import timezone
 
 from apps.companies.models import Connection, Platform
+from apps.dashboard.services.cache import bump_data_version
 from apps.reviews.models import Review
+from .services.sync_schedule import record_sync_failure
 
 logger = logging.getLogger(__name__)
 
+# Connection fields shown on the dashboard (metrics widget)
+DASHBOARD_CONNECTION_FIELDS = ('platform_rating', 'platform_review_count')
+
+
+def _run_sync(service):
+    """
+    Run a service's sync and bump the company's dashboard data version
+    if it wrote reviews or changed the platform rating or review count.
+    """
+    connection = service.connection
+
+    def dashboard_values():
+        return [getattr(connection, name) for name in DASHBOARD_CONNECTION_FIELDS]
+
+    before = dashboard_values()
+    result = service.sync_reviews_to_db()
+    if result.created or result.updated or result.deleted or dashboard_values() != before:
+        bump_data_version(connection.company_id)
+    return result
+
 
 @shared_task(
     bind=True,
@@ -36,24 +58,20 @@ def sync_google_reviews(self, connection_id: str):
 
     if not connection.is_token_valid and not connection.refresh_token:
         logger.warning(f'No valid token for connection {connection_id}')
-        connection.last_sync_status = Connection.SyncStatus.ERROR
-        connection.last_sync_error = 'No valid authentication token'
-        connection.save(update_fields=['last_sync_status', 'last_sync_error'])
+        record_sync_failure(connection, 'No valid authentication token')
         return
 
     try:
         from .services import GoogleReviewsService
-        service = GoogleReviewsService(connection)
-        created, updated = service.sync_reviews_to_db()
+        result = _run_sync(GoogleReviewsService(connection))
 
         logger.info(
-            f'Synced {created + updated} reviews for {connection.company.name}'
+            f'Synced {result.created + result.updated} reviews for {connection.company.name}'
         )
     except Exception as e:
         logger.exception(f'Error syncing reviews for connection {connection_id}')
-        connection.last_sync_status = Connection.SyncStatus.ERROR
-        connection.last_sync_error = str(e)[:500]
-        connection.save(update_fields=['last_sync_status', 'last_sync_error'])
+        # One scheduled run counts as one failure, however many times it is retried
+        record_sync_failure(connection, str(e), retry=self.request.retries > 0)
 
         # Retry on transient errors
         raise self.retry(exc=e)
@@ -64,7 +82,8 @@ def sync_all_google_reviews():
     """
     Sync reviews for all active Google connections.
 
-    This task is scheduled to run hourly via Celery Beat.
+    Queues every connection at once (manual runs); periodic syncs go
+    through schedule_platform_syncs.
     """
     connections = Connection.objects.filter(
         platform_id='google',
@@ -80,6 +99,36 @@ def sync_all_google_reviews():
     return count
 
 
+@shared_task
+def schedule_platform_syncs():
+    """
+    Queue syncs of connections that are due, spread over the run interval.
+
+    Replaces queueing every connection at once (sync_all_*_reviews): see
+    services/sync_schedule.py. Scheduled via Celery Beat every few minutes.
+    """
+    from .services.sync_schedule import (
+        MAX_PER_RUN, due_connections, mark_queued, queue_countdown,
+    )
+
+    sync_tasks = {'google': sync_google_reviews, 'yandex': sync_yandex_reviews}
+    queued = 0
+    # Без лимита: часть подошедших может быть уже в очереди
+    for connection in due_connections(limit=None):
+        if queued >= MAX_PER_RUN:
+            break
+        if not mark_queued(connection):
+            continue
+        sync_tasks[connection.platform_id].apply_async(
+            args=[str(connection.id)],
+            countdown=queue_countdown(connection),
+        )
+        queued += 1
+
+    logger.info(f'Queued {queued} platform review syncs')
+    return queued
+
+
 @shared_task(
     bind=True,
     max_retries=3,
@@ -160,24 +209,19 @@ def sync_yandex_reviews(self, connection_id: str):
 
     if not connection.access_token:
         logger.warning(f'No cookies for Yandex connection {connection_id}')
-        connection.last_sync_status = Connection.SyncStatus.ERROR
-        connection.last_sync_error = 'No session cookies configured'
-        connection.save(update_fields=['last_sync_status', 'last_sync_error'])
+        record_sync_failure(connection, 'No session cookies configured')
         return
 
     try:
         from .services import YandexReviewsService
-        service = YandexReviewsService(connection)
-        created, updated = service.sync_reviews_to_db()
+        result = _run_sync(YandexReviewsService(connection))
 
         logger.info(
-            f'Synced {created + updated} Yandex reviews for {connection.company.name}'
+            f'Synced {result.created + result.updated} Yandex reviews for {connection.company.name}'
         )
     except Exception as e:
         logger.exception(f'Error syncing Yandex reviews for connection {connection_id}')
-        connection.last_sync_status = Connection.SyncStatus.ERROR
-        connection.last_sync_error = str(e)[:500]
-        connection.save(update_fields=['last_sync_status', 'last_sync_error'])
+        record_sync_failure(connection, str(e), retry=self.request.retries > 0)
 
         raise self.retry(exc=e)
 
@@ -187,7 +231,8 @@ def sync_all_yandex_reviews():
     """
     Sync reviews for all active Yandex connections.
 
-    Scheduled via Celery Beat.
+    Queues every connection at once (manual runs); periodic syncs go
+    through schedule_platform_syncs.
     """
     connections = Connection.objects.filter(
         platform_id='yandex',
@@ -251,5 +296,3 @@ def push_yandex_reply(self, review_id: str):
     except Exception as e:
         logger.exception(f'Error pushing Yandex reply for review {review_id}')
         raise self.retry(exc=e)
-
-
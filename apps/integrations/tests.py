@@ -1,6 +1,8 @@
 """Tests for integrations app."""
 
 import json
+import time
+from pathlib import Path
 from unittest.mock import patch
 
 from django.test import TestCase, Client, override_settings
@@ -195,3 +197,1065 @@ class NotificationTests(TestCase):
 
         self.assertFalse(result)
         mock_send.assert_not_called()
+
+
+class PlatformReviewSyncTests(TestCase):
+    """Tests for the bulk writer used by platform review sync."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.company = Company.objects.create(name='Sync Co')
+
+    def _rows(self, count, overrides=None):
+        from datetime import datetime, timezone as dt_timezone
+
+        return [
+            {
+                'external_id': f'ya-{i}',
+                'rating': 5,
+                'text': f'Отзыв {i}',
+                'author_name': f'Автор {i}',
+                'platform_date': datetime(2026, 10, 1, 12, i, tzinfo=dt_timezone.utc),
+                **(overrides or {}).get(i, {}),
+            }
+            for i in range(count)
+        ]
+
+    def _write(self, rows):
+        from apps.integrations.services.review_sync import write_platform_reviews
+        from apps.reviews.models import Review
+
+        return write_platform_reviews(self.company, Review.Source.YANDEX, rows)
+
+    def test_counts_created_updated_unchanged(self):
+        from apps.reviews.models import Review
+
+        self.assertEqual(tuple(self._write(self._rows(3))), (3, 0, 0, 0))
+
+        result = self._write(self._rows(4, {1: {'rating': 2, 'text': 'Долго ждали'}}))
+
+        self.assertEqual((result.created, result.updated, result.unchanged), (1, 1, 2))
+        review = Review.objects.get(company=self.company, external_id='ya-1')
+        self.assertEqual(review.rating, 2)
+        self.assertEqual(review.sentiment, Review.Sentiment.POSITIVE)  # kept, as with save()
+        self.assertEqual(Review.objects.get(external_id='ya-3').sentiment, Review.Sentiment.POSITIVE)
+
+    def test_created_and_text_changed_reviews_analyzed_in_batch(self):
+        from apps.reviews.models import Review
+        from apps.reviews.services import analyze_review_impressions
+
+        with patch('apps.reviews.cache.analyze_review_impressions',
+                   side_effect=analyze_review_impressions) as analyze:
+            self._write(self._rows(3, {0: {'rating': 1, 'text': 'Грубый официант, холодный суп'}}))
+            self.assertEqual(analyze.call_count, 3)
+
+            review = Review.objects.get(company=self.company, external_id='ya-0')
+            self.assertNotEqual(review.tags, [])
+            self.assertIsNotNone(review.sentiment_score)
+
+            analyze.reset_mock()
+            self._write(self._rows(3, {
+                0: {'rating': 1, 'text': 'Грубый официант, холодный суп'},
+                1: {'author_name': 'Новое имя'},
+                2: {'text': 'Очень вкусно и уютно'},
+            }))
+            # Only the review whose text changed is analyzed again
+            self.assertEqual(analyze.call_count, 1)
+
+            # Same texts of another company come from the analysis cache
+            analyze.reset_mock()
+            other = Company.objects.create(name='Other Co')
+            from apps.integrations.services.review_sync import write_platform_reviews
+            write_platform_reviews(other, Review.Source.YANDEX, self._rows(3)[1:])
+            self.assertEqual(analyze.call_count, 0)
+
+        praise = Review.objects.get(company=self.company, external_id='ya-2')
+        self.assertTrue(any(tag['sentiment'] == 'positive' for tag in praise.tags))
+
+    def test_batch_uses_constant_queries(self):
+        self._write(self._rows(5))
+        changed = {i: {'text': f'Новый текст {i}'} for i in range(10)}
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as small:
+            self._write(self._rows(10, {i: changed[i] for i in range(3)}))
+        with CaptureQueriesContext(connection) as large:
+            self._write(self._rows(40, changed))
+
+        self.assertEqual(len(large), len(small))
+
+    def test_unchanged_batch_only_reads(self):
+        self._write(self._rows(5))
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            result = self._write(self._rows(5))
+
+        self.assertEqual(result.unchanged, 5)
+        self.assertFalse([q for q in queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))])
+
+    def test_unchanged_rows_are_not_loaded(self):
+        from apps.reviews.models import Review
+
+        self._write(self._rows(5))
+        stored = Review.objects.get(external_id='ya-2').content_hash
+        self.assertEqual(len(stored), 32)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            result = self._write(self._rows(5, {2: {'text': 'Стало хуже'}}))
+
+        self.assertEqual((result.updated, result.unchanged), (1, 4))
+        # Hash lookup plus the one changed review, not the whole batch
+        full_selects = [q for q in queries if q['sql'].startswith('SELECT') and '"text"' in q['sql']]
+        self.assertEqual(len(full_selects), 1)
+        self.assertNotEqual(Review.objects.get(external_id='ya-2').content_hash, stored)
+
+    def test_full_sync_reconciles_local_drift(self):
+        from apps.integrations.services.review_sync import write_platform_reviews
+        from apps.reviews.models import Review
+
+        rows = self._rows(3, {1: {'response': ''}})
+        self._write(rows)
+        # A reply saved locally whose push to the platform failed
+        Review.objects.filter(external_id='ya-1').update(response='Спасибо!')
+
+        self.assertEqual(self._write(rows).unchanged, 3)
+        result = write_platform_reviews(self.company, Review.Source.YANDEX, rows, delete_missing=True)
+
+        self.assertEqual((result.updated, result.unchanged), (1, 2))
+        self.assertEqual(Review.objects.get(external_id='ya-1').response, '')
+
+    def test_missing_hash_is_backfilled_without_derived_updates(self):
+        from apps.dashboard.services.cache import get_data_version
+        from apps.reviews.models import Review
+
+        self._write(self._rows(3))
+        Review.objects.filter(company=self.company).update(content_hash='')
+        version = get_data_version(self.company.id)
+
+        result = self._write(self._rows(3))
+
+        self.assertEqual(result.unchanged, 3)
+        self.assertFalse(Review.objects.filter(company=self.company, content_hash='').exists())
+        self.assertEqual(get_data_version(self.company.id), version)
+
+    def test_missing_fields_are_kept(self):
+        from apps.reviews.models import Review
+
+        self._write(self._rows(1, {0: {'response': 'Спасибо!'}}))
+        result = self._write(self._rows(1))
+
+        self.assertEqual(result.unchanged, 1)
+        self.assertEqual(Review.objects.get(external_id='ya-0').response, 'Спасибо!')
+
+    def test_derived_data_follows_bulk_write(self):
+        from apps.dashboard.services.alert_engine import get_alert_snapshot
+        from apps.dashboard.services.cache import get_data_version
+        from apps.dashboard.services.counters import get_review_counts
+        from apps.reviews.models import ReviewMatch
+        from apps.reviews.search import search_reviews
+
+        self.assertEqual(get_review_counts(self.company)['all'], 0)
+        version = get_data_version(self.company.id)
+
+        self._write(self._rows(2, {1: {'rating': 1, 'text': 'Отравление после ужина'}}))
+
+        self.assertNotEqual(get_data_version(self.company.id), version)
+        self.assertEqual(get_review_counts(self.company)['all'], 2)
+        self.assertTrue(ReviewMatch.objects.filter(review__external_id='ya-1').exists())
+        self.assertEqual(len(search_reviews(self.company.id, 'ужина')), 1)
+        self.assertTrue(get_alert_snapshot(self.company).problems)
+
+        self._write(self._rows(2, {1: {'rating': 1, 'text': 'Холодный суп'}}))
+        self.assertEqual(search_reviews(self.company.id, 'ужина'), [])
+        self.assertEqual(len(search_reviews(self.company.id, 'суп')), 1)
+
+    def test_google_star_rating_enum(self):
+        from apps.integrations.services.google_reviews import GoogleReviewsService
+
+        self.assertEqual(GoogleReviewsService._parse_rating('FOUR'), 4)
+        self.assertEqual(GoogleReviewsService._parse_rating(3), 3)
+
+
+class IncrementalSyncTests(TestCase):
+    """Tests for watermark-based incremental Yandex sync."""
+
+    PER_PAGE = 20
+
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.companies.models import Connection, Platform
+        cache.clear()
+
+        self.company = Company.objects.create(name='Incremental Co')
+        platform, _ = Platform.objects.get_or_create(id='yandex', defaults={'name': 'Яндекс'})
+        self.connection = Connection.objects.create(
+            company=self.company,
+            platform=platform,
+            external_id='12345',
+            access_token=json.dumps({'Session_id': 'a', 'sessionid2': 'b', 'yandexuid': 'c'}),
+        )
+        # Новейшие первыми, как ranking=by_time
+        self.platform_reviews = [self._platform_review(i) for i in range(45, 0, -1)]
+        self.fetched_pages = []
+
+    def _platform_review(self, i):
+        return {'id': f'r{i}', 'ts': 1759000000000 + i * 60000, 'rating': 5, 'text': f'Отзыв номер {i}'}
+
+    def _page_html(self, page, offset=None):
+        if offset is None:
+            offset = (page - 1) * self.PER_PAGE
+        items = ','.join(
+            '{"author":{"user":"Гость"},"snippet":"%s","rating":%d,"time_created":%d,'
+            '"cmnt_entity_id":"%s","business_answer_csrf_token":"tok-%s"}'
+            % (r['text'], r['rating'], r['ts'], r['id'], r['id'])
+            for r in self.platform_reviews[offset:offset + self.PER_PAGE]
+        )
+        return (
+            '{"items":[%s],"pager":{"limit":%d,"offset":%d,"total":%d}}'
+            % (items, self.PER_PAGE, offset, len(self.platform_reviews))
+        )
+
+    def _sync(self):
+        from apps.integrations.services import YandexReviewsService
+
+        def fetch(service, page=1):
+            self.fetched_pages.append(page)
+            return self._page_html(page)
+
+        self.fetched_pages = []
+        self.connection.refresh_from_db()
+        with patch.object(YandexReviewsService, '_fetch_reviews_html', fetch):
+            return YandexReviewsService(self.connection).sync_reviews_to_db()
+
+    def test_first_sync_is_full_and_sets_watermark(self):
+        result = self._sync()
+
+        self.assertEqual(result.created, 45)
+        self.assertEqual(sorted(self.fetched_pages), [1, 2, 3])
+        self.connection.refresh_from_db()
+        self.assertEqual(self.connection.sync_watermark_id, 'r45')
+        self.assertIsNotNone(self.connection.last_full_sync)
+
+    def test_incremental_sync_stops_at_watermark(self):
+        self._sync()
+        self.platform_reviews.insert(0, self._platform_review(46))
+
+        result = self._sync()
+
+        self.assertEqual(self.fetched_pages, [1])
+        self.assertEqual((result.created, result.updated), (1, 0))
+        self.connection.refresh_from_db()
+        self.assertEqual(self.connection.sync_watermark_id, 'r46')
+
+    def test_periodic_full_sync_removes_deleted_reviews(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.reviews.models import Review
+
+        self._sync()
+        self.platform_reviews = [r for r in self.platform_reviews if r['id'] != 'r3']
+
+        self.assertEqual(self._sync().deleted, 0)  # incremental: old pages not fetched
+
+        # Первая полная синхронизация только помечает пропавший отзыв, вторая удаляет
+        for deleted in (0, 1):
+            self._force_full_sync()
+            result = self._sync()
+            self.assertEqual(result.deleted, deleted)
+            self.assertEqual(sorted(self.fetched_pages), [1, 2, 3])
+        self.assertFalse(Review.objects.filter(company=self.company, external_id='r3').exists())
+
+    def test_rating_change_bumps_data_version(self):
+        """A sync that only changes the platform rating must invalidate dashboard caches."""
+        from apps.dashboard.services.cache import get_data_version
+        from apps.integrations.services import YandexReviewsService
+        from apps.integrations.tasks import sync_yandex_reviews
+
+        def fetch(service, page=1):
+            return self._page_html(page)
+
+        def run_task():
+            with patch.object(YandexReviewsService, '_fetch_reviews_html', fetch):
+                sync_yandex_reviews(str(self.connection.id))
+
+        run_task()
+        version = get_data_version(self.company.id)
+        run_task()
+        self.assertEqual(get_data_version(self.company.id), version)  # ничего не изменилось
+
+        page_html = self._page_html
+        self._page_html = lambda page: page_html(page) + ('"orgRating":4.7' if page == 1 else '')
+        run_task()
+
+        self.assertGreater(get_data_version(self.company.id), version)
+        self.connection.refresh_from_db()
+        self.assertEqual(str(self.connection.platform_rating), '4.7')
+
+    def test_review_found_again_is_unmarked(self):
+        from apps.reviews.models import Review
+
+        self._sync()
+        r3 = self.platform_reviews.pop(-3)
+        self._force_full_sync()
+        self._sync()
+        self.assertIsNotNone(Review.objects.get(company=self.company, external_id='r3').missing_since)
+
+        self.platform_reviews.insert(-2, r3)
+        for _ in range(2):
+            self._force_full_sync()
+            self.assertEqual(self._sync().deleted, 0)
+        self.assertIsNone(Review.objects.get(company=self.company, external_id='r3').missing_since)
+
+    def test_shifted_pages_with_duplicates_are_not_complete(self):
+        """Repeated reviews from a shifted page must not count towards the total."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.reviews.models import Review
+
+        self._sync()
+        page_html = self._page_html
+        # Страница 2 сдвинута на 5 назад: повторяет конец первой, а r10..r6
+        # не попали ни на одну страницу
+        self._page_html = lambda page: page_html(page, offset=15 if page == 2 else None)
+        for _ in range(2):
+            self._force_full_sync()
+            self.assertEqual(self._sync().deleted, 0)
+        self.assertEqual(
+            Review.objects.filter(company=self.company, missing_since__isnull=True).count(), 45,
+        )
+        self.connection.refresh_from_db()
+        self.assertLess(self.connection.last_full_sync, timezone.now() - timedelta(days=1))
+
+    def _force_full_sync(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.connection.refresh_from_db()
+        self.connection.last_full_sync = timezone.now() - timedelta(days=2)
+        self.connection.save(update_fields=['last_full_sync'])
+
+    def test_full_sync_with_bad_middle_page_keeps_reviews(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.reviews.models import Review
+
+        self._sync()
+        page_html = self._page_html
+        for bad_page in (
+            '{"items":[],"pager":{"limit":20,"offset":20,"total":45}}',
+            page_html(2).replace('"rating":5', '"rating":undefined', 1).replace(
+                '"cmnt_entity_id"', '"id"', 3),
+            '{"items":[{"cmnt_entity_id":',
+        ):
+            self._page_html = lambda page: bad_page if page == 2 else page_html(page)
+            self.connection.last_full_sync = timezone.now() - timedelta(days=2)
+            self.connection.save(update_fields=['last_full_sync'])
+
+            result = self._sync()
+
+            self.assertEqual(result.deleted, 0)
+            self.assertEqual(Review.objects.filter(company=self.company).count(), 45)
+            self.connection.refresh_from_db()
+            self.assertLess(self.connection.last_full_sync, timezone.now() - timedelta(days=1))
+
+    def test_gap_beyond_page_limit_forces_full_sync(self):
+        from apps.integrations.services import YandexReviewsService
+
+        self._sync()
+        self.platform_reviews = (
+            [self._platform_review(i) for i in range(300, 45, -1)] + self.platform_reviews
+        )
+
+        with patch.object(YandexReviewsService, 'MAX_PAGES', 2):
+            result = self._sync()
+
+        self.assertEqual(result.created, 40)
+        self.connection.refresh_from_db()
+        self.assertIsNone(self.connection.last_full_sync)
+        self.assertEqual(self.connection.sync_watermark_id, 'r45')
+
+
+class ConcurrentFetchTests(TestCase):
+    """Tests for concurrent Yandex page fetching."""
+
+    PER_PAGE = 20
+
+    def setUp(self):
+        from apps.companies.models import Connection, Platform
+
+        company = Company.objects.create(name='Concurrent Co')
+        platform, _ = Platform.objects.get_or_create(id='yandex', defaults={'name': 'Яндекс'})
+        self.connection = Connection.objects.create(
+            company=company,
+            platform=platform,
+            external_id='777',
+            access_token=json.dumps({'Session_id': 'a', 'sessionid2': 'b', 'yandexuid': 'c'}),
+        )
+        self.total = 130
+
+    def _page_html(self, page, offset=None):
+        if offset is None:
+            offset = (page - 1) * self.PER_PAGE
+        items = ','.join(
+            '{"rating":5,"snippet":"Отзыв %d","time_created":%d,"cmnt_entity_id":"r%d",'
+            '"business_answer_csrf_token":"t"}' % (i, 1760000000000 - i * 1000, i)
+            for i in range(offset, min(offset + self.PER_PAGE, self.total))
+        )
+        return '{"items":[%s],"pager":{"limit":%d,"offset":%d,"total":%d}}' % (
+            items, self.PER_PAGE, offset, self.total,
+        )
+
+    def _fetch(self, fetch_html, **kwargs):
+        from apps.integrations.services import YandexReviewsService
+
+        with patch.object(YandexReviewsService, '_fetch_reviews_html', fetch_html):
+            service = YandexReviewsService(self.connection)
+            reviews = service.fetch_reviews(max_pages=20, **kwargs)
+        return service, reviews
+
+    def test_pages_fetched_concurrently_and_assembled_in_order(self):
+        import random
+        import threading
+        from apps.integrations.services import yandex_reviews
+
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max_in_flight': 0}
+
+        def fetch_html(service, page=1):
+            with lock:
+                state['in_flight'] += 1
+                state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+            time.sleep(random.uniform(0.005, 0.03))
+            with lock:
+                state['in_flight'] -= 1
+            return self._page_html(page)
+
+        with patch.object(yandex_reviews, 'FETCH_CONCURRENCY', 3):
+            service, reviews = self._fetch(fetch_html)
+
+        self.assertEqual([r['external_id'] for r in reviews], [f'r{i}' for i in range(130)])
+        self.assertTrue(service._fetch_complete)
+        self.assertGreater(state['max_in_flight'], 1)
+        self.assertLessEqual(state['max_in_flight'], 3)
+
+    def test_failed_page_keeps_pages_before_it(self):
+        def fetch_html(service, page=1):
+            if page == 4:
+                raise ConnectionError('boom')
+            return self._page_html(page)
+
+        service, reviews = self._fetch(fetch_html)
+
+        self.assertEqual(len(reviews), 60)
+        self.assertEqual(reviews[-1]['external_id'], 'r59')
+        self.assertFalse(service._fetch_complete)
+
+    def test_requests_are_paced(self):
+        from apps.integrations.services import YandexReviewsService, yandex_reviews
+
+        service = YandexReviewsService(self.connection)
+        with patch.object(yandex_reviews, 'REQUEST_INTERVAL', 0.05):
+            started = time.monotonic()
+            for _ in range(3):
+                service._wait_turn()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+
+class YandexPageParserTests(TestCase):
+    """Tests for the single-pass Yandex reviews page parser against saved pages."""
+
+    TESTDATA = Path(__file__).parent / 'testdata'
+
+    def _page(self, number):
+        return (self.TESTDATA / f'yandex_reviews_page{number}.html').read_text(encoding='utf-8')
+
+    def test_parses_reviews_pager_tokens_and_rating(self):
+        from datetime import datetime, timezone as dt_timezone
+        from apps.integrations.services.yandex_parser import parse_reviews_page
+
+        page = parse_reviews_page(self._page(1))
+
+        self.assertEqual(page.pager, {'limit': 3, 'offset': 0, 'total': 5})
+        self.assertEqual(page.csrf, '9f8e7d6c5b4a:1760789012')
+        self.assertEqual(page.reviews_csrf, 'rv/csrf+token==')
+        self.assertEqual(page.org_rating, 4.7)
+        self.assertEqual([r['external_id'] for r in page.reviews], ['ZmlsZTE', 'ZmlsZTI', 'ZmlsZTM'])
+
+        first = page.reviews[0]
+        self.assertEqual(first['author_name'], 'Анна К.')
+        self.assertEqual(first['author_profile_url'], 'https://yandex.ru/maps/user/u7x9k2')
+        self.assertEqual(first['text'], 'Очень вкусный кофе, но долго ждали заказ.\nБариста сказал: "минутку".')
+        self.assertEqual(first['rating'], 4)
+        self.assertEqual(first['platform_date'], datetime(2025, 10, 17, 11, 20, tzinfo=dt_timezone.utc))
+        self.assertEqual(first['response'], 'Спасибо, Анна!\nУскоримся.')
+        self.assertEqual(first['answer_csrf_token'], 'tok/a1+b')
+        self.assertEqual(page.answer_token('ZmlsZTM'), 'tok-c3')
+        self.assertIsNone(page.answer_token('missing'))
+
+    def test_falls_back_for_empty_fields(self):
+        from apps.integrations.services.yandex_parser import parse_reviews_page
+
+        hidden = parse_reviews_page(self._page(1)).reviews[1]
+
+        self.assertEqual(hidden['author_name'], 'Пользователь Яндекс')
+        self.assertEqual(hidden['author_profile_url'], '')
+        self.assertEqual(hidden['text'], 'Холодно и грязно')  # empty full_text -> snippet
+        self.assertEqual((hidden['response'], hidden['response_at']), ('', None))
+
+    def test_page_without_reviews(self):
+        from apps.integrations.services.yandex_parser import parse_reviews_page
+
+        page = parse_reviews_page('<html><script>{"items":[],"pager":{"total":0}}</script></html>')
+
+        self.assertEqual(page.reviews, [])
+        self.assertIsNone(page.org_rating)
+
+    def test_skips_undecodable_review_items(self):
+        from apps.integrations.services.yandex_parser import parse_reviews_page
+
+        # Review 2 has "owner_comment":undefined, so the list isn't valid JSON
+        page = parse_reviews_page(self._page('1_malformed'))
+
+        self.assertEqual([r['external_id'] for r in page.reviews], ['ZmlsZTE', 'ZmlsZTM'])
+        self.assertEqual(page.pager, {'limit': 3, 'offset': 0, 'total': 5})
+        self.assertEqual(page.reviews_csrf, 'rv/csrf+token==')
+
+    def test_skips_review_items_without_id(self):
+        from apps.integrations.services.yandex_parser import parse_reviews_page
+
+        page = parse_reviews_page(
+            '{"items":[{"cmnt_entity_id":"a","rating":5},{"rating":1},'
+            '{"cmnt_entity_id":"b","rating":4}],"pager":{"total":3}}'
+        )
+
+        self.assertEqual([r['external_id'] for r in page.reviews], ['a', 'b'])
+
+    def test_undecodable_review_list_raises(self):
+        from apps.integrations.services.yandex_parser import YandexParseError, parse_reviews_page
+
+        with self.assertRaises(YandexParseError):
+            parse_reviews_page('{"items":[{"cmnt_entity_id":"a","rating":5},{"cmnt_entity_id":')
+        with self.assertRaises(YandexParseError):
+            parse_reviews_page('{"items":undefined,"pager":{"total":3}}')
+
+    def test_sync_and_reply_use_parsed_pages(self):
+        from apps.companies.models import Connection, Platform
+        from apps.integrations.services import YandexReviewsService
+        from apps.reviews.models import Review
+
+        company = Company.objects.create(name='Fixture Co')
+        platform, _ = Platform.objects.get_or_create(id='yandex', defaults={'name': 'Яндекс'})
+        connection = Connection.objects.create(
+            company=company,
+            platform=platform,
+            external_id='120057269196',
+            access_token=json.dumps({'Session_id': 'a', 'sessionid2': 'b', 'yandexuid': 'c'}),
+        )
+        pages = {1: self._page(1), 2: self._page(2)}
+
+        with patch.object(YandexReviewsService, '_fetch_reviews_html', lambda s, page=1: pages[page]):
+            service = YandexReviewsService(connection)
+            result = service.sync_reviews_to_db()
+
+            with patch.object(service.session, 'post') as post:
+                post.return_value.status_code = 200
+                self.assertTrue(service.reply_to_review('ZmlsZTU', 'Спасибо!'))
+
+        self.assertEqual(result.created, 5)
+        self.assertEqual(Review.objects.get(external_id='ZmlsZTU').response, 'Ждём!')
+        connection.refresh_from_db()
+        self.assertEqual(str(connection.platform_rating), '4.7')
+        self.assertEqual(connection.platform_review_count, 5)
+
+        body = post.call_args.kwargs['json']
+        self.assertEqual(body['answerCsrfToken'], 'tok-e5')
+        self.assertEqual(body['reviewsCsrfToken'], 'rv/csrf+token==')
+        self.assertEqual(post.call_args.kwargs['headers']['x-csrf-token'], '9f8e7d6c5b4a:1760789012')
+
+
+class AnswerTokenCacheTests(TestCase):
+    """Tests for replying to Yandex reviews with answer tokens saved by sync."""
+
+    TESTDATA = Path(__file__).parent / 'testdata'
+
+    def setUp(self):
+        from apps.companies.models import Connection, Platform
+
+        self.company = Company.objects.create(name='Token Co')
+        platform, _ = Platform.objects.get_or_create(id='yandex', defaults={'name': 'Яндекс'})
+        self.connection = Connection.objects.create(
+            company=self.company,
+            platform=platform,
+            external_id='120057269196',
+            access_token=json.dumps({'Session_id': 'a', 'sessionid2': 'b', 'yandexuid': 'c'}),
+        )
+        self.pages = {
+            number: (self.TESTDATA / f'yandex_reviews_page{number}.html').read_text(encoding='utf-8')
+            for number in (1, 2)
+        }
+        self.fetched_pages = []
+
+    def _fetch_html(self, page=1):
+        self.fetched_pages.append(page)
+        return self.pages.get(page, '{"items":[],"pager":{"total":5}}')
+
+    def _service(self):
+        from apps.integrations.services import YandexReviewsService
+        return YandexReviewsService(self.connection)
+
+    def _sync(self):
+        from apps.integrations.services import YandexReviewsService
+
+        with patch.object(YandexReviewsService, '_fetch_reviews_html', self._fetch_html):
+            self._service().sync_reviews_to_db()
+        self.fetched_pages.clear()
+
+    def _reply(self, replies, statuses=(200,)):
+        from apps.integrations.services import YandexReviewsService
+
+        service = self._service()
+        with patch.object(YandexReviewsService, '_fetch_reviews_html', self._fetch_html), \
+                patch.object(service.session, 'post') as post:
+            post.side_effect = [
+                type('Response', (), {'status_code': status, 'text': ''})()
+                for status in statuses
+            ]
+            results = service.reply_to_reviews(replies)
+        return results, [call.kwargs['json']['answerCsrfToken'] for call in post.call_args_list]
+
+    def test_sync_saves_answer_tokens(self):
+        from apps.reviews.models import Review
+
+        self._sync()
+
+        review = Review.objects.get(external_id='ZmlsZTQ')
+        self.assertEqual(review.answer_token, 'tok-d4')
+        self.assertIsNotNone(review.answer_token_at)
+
+    def test_token_only_change_skips_derived_data(self):
+        from apps.integrations.services.review_sync import write_platform_reviews
+        from apps.reviews.models import Review
+
+        self._sync()
+        before = Review.objects.get(external_id='ZmlsZTQ')
+        row = {'external_id': 'ZmlsZTQ', 'answer_token': 'tok-new'}
+
+        with patch('apps.dashboard.services.cache.bump_data_version') as bump:
+            result = write_platform_reviews(self.company, Review.Source.YANDEX, [row])
+
+        self.assertEqual((result.updated, result.unchanged), (0, 1))
+        bump.assert_not_called()
+        review = Review.objects.get(external_id='ZmlsZTQ')
+        self.assertEqual(review.answer_token, 'tok-new')
+        self.assertGreater(review.answer_token_at, before.answer_token_at)
+        self.assertEqual(review.updated_at, before.updated_at)
+
+    def test_reply_uses_cached_token_without_scanning_pages(self):
+        self._sync()
+
+        results, tokens = self._reply({'ZmlsZTU': 'Спасибо!'})
+
+        self.assertEqual(results, {'ZmlsZTU': True})
+        self.assertEqual(tokens, ['tok-e5'])
+        self.assertEqual(self.fetched_pages, [1])
+
+    def test_rejected_token_is_refetched_from_the_review_page(self):
+        from apps.reviews.models import Review
+
+        self._sync()
+        Review.objects.filter(external_id='ZmlsZTQ').update(answer_token='stale')
+
+        results, tokens = self._reply({'ZmlsZTQ': 'Спасибо!'}, statuses=(403, 200))
+
+        self.assertEqual(results, {'ZmlsZTQ': True})
+        self.assertEqual(tokens, ['stale', 'tok-d4'])
+        # Три отзыва новее: отзыв ищется сразу на второй странице
+        self.assertEqual(self.fetched_pages, [1, 2])
+        self.assertEqual(Review.objects.get(external_id='ZmlsZTQ').answer_token, 'tok-d4')
+
+    def test_batched_replies_fetch_page_once(self):
+        self._sync()
+
+        results, tokens = self._reply(
+            {'ZmlsZTE': 'Спасибо!', 'ZmlsZTD': 'Нет такого', 'ZmlsZTU': 'Ждём!'},
+            statuses=(200, 200),
+        )
+
+        self.assertEqual(results, {'ZmlsZTE': True, 'ZmlsZTD': False, 'ZmlsZTU': True})
+        self.assertEqual(tokens, ['tok/a1+b', 'tok-e5'])
+        # Неизвестный отзыв ищется по остальным страницам до пустой
+        self.assertEqual(self.fetched_pages, [1, 2, 3])
+
+
+class HttpClientTests(TestCase):
+    """Tests for the shared HTTP client (retries, host limits, metrics)."""
+
+    def setUp(self):
+        from apps.integrations.http import reset_http_stats
+        reset_http_stats()
+        self.calls = []
+
+    def _response(self, status, body=b'ok', headers=None):
+        import requests
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        response.headers.update(headers or {})
+        response.request = requests.Request('GET', 'https://example.com/').prepare()
+        return response
+
+    def _request(self, method, url, statuses, **kwargs):
+        from apps.integrations.http import HttpClient
+
+        responses = iter(statuses)
+
+        def fake_request(session, method, url, **kwargs):
+            self.calls.append(kwargs)
+            status = next(responses)
+            if isinstance(status, Exception):
+                raise status
+            return self._response(*status) if isinstance(status, tuple) else self._response(status)
+
+        with patch('requests.Session.request', fake_request), \
+                patch('apps.integrations.http.time.sleep') as sleep:
+            response = HttpClient(max_retries=3).request(method, url, **kwargs)
+        return response, [call.args[0] for call in sleep.call_args_list]
+
+    def test_get_retried_on_5xx_with_backoff(self):
+        response, delays = self._request('GET', 'https://example.com/', [503, 502, 200])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(delays), 2)
+        self.assertLessEqual(delays[1], 1.0)
+        self.assertEqual(self.calls[0]['timeout'], (5, 30))
+
+    def test_post_not_retried_on_5xx(self):
+        response, delays = self._request('POST', 'https://example.com/', [500, 200])
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(delays, [])
+
+    def test_post_retried_on_429_after_retry_after(self):
+        response, delays = self._request(
+            'POST', 'https://example.com/', [(429, b'', {'Retry-After': '2'}), 200],
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(delays, [2.0])
+
+    def test_interactive_client_fails_fast(self):
+        from apps.integrations.http import get_interactive_http_client
+
+        limited = self._response(429, b'', {'Retry-After': '30'})
+        with patch('requests.Session.request', return_value=limited) as request, \
+                patch('apps.integrations.http.time.sleep') as sleep:
+            response = get_interactive_http_client().post('https://api.telegram.org/bot/sendMessage')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(request.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_connect_timeout_retried_read_timeout_raised_for_post(self):
+        import requests
+
+        response, _ = self._request(
+            'POST', 'https://example.com/', [requests.exceptions.ConnectTimeout(), 200],
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self._request('POST', 'https://example.com/', [requests.exceptions.ReadTimeout(), 200])
+
+    def test_last_attempt_response_returned(self):
+        response, delays = self._request('GET', 'https://example.com/', [503] * 4)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(delays), 3)
+
+    def test_metrics_per_host(self):
+        from apps.integrations.http import get_http_stats
+
+        self._request('GET', 'https://example.com/a', [(503, b'busy'), (200, b'hello')])
+
+        stats = get_http_stats()['example.com']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['statuses'], {503: 1, 200: 1})
+        self.assertEqual(stats['bytes_received'], 9)
+        self.assertGreaterEqual(stats['latency_ms_max'], stats['latency_ms_avg'])
+
+    def test_host_concurrency_limited(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from apps.integrations import http
+        from apps.integrations.http import HttpClient
+
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max_in_flight': 0}
+
+        def fake_request(session, method, url, **kwargs):
+            with lock:
+                state['in_flight'] += 1
+                state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+            return self._response(200)
+
+        client = HttpClient()
+        with patch('requests.Session.request', fake_request), \
+                patch.dict(http.HOST_CONCURRENCY, {'limited.example': 2}), \
+                patch.dict(http._host_slots, clear=True):
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                list(pool.map(lambda _: client.get('https://limited.example/'), range(12)))
+
+        self.assertEqual(state['max_in_flight'], 2)
+
+
+class SyncSchedulerTests(TestCase):
+    """Tests for frequency-aware, jittered platform sync scheduling."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.companies.models import Platform
+
+        cache.clear()
+        self.google, _ = Platform.objects.get_or_create(id='google', defaults={'name': 'Google'})
+        self.yandex, _ = Platform.objects.get_or_create(id='yandex', defaults={'name': 'Яндекс'})
+
+    def _connection(self, name, platform=None, last_sync_ago=None, frequency=3600):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.companies.models import Connection
+
+        return Connection.objects.create(
+            company=Company.objects.create(name=name),
+            platform=platform or self.yandex,
+            external_id=name,
+            sync_frequency=frequency,
+            last_sync=timezone.now() - last_sync_ago if last_sync_ago is not None else None,
+        )
+
+    def test_only_due_connections_selected(self):
+        from datetime import timedelta
+        from apps.integrations.services.sync_schedule import due_connections
+
+        never = self._connection('never')
+        overdue = self._connection('overdue', last_sync_ago=timedelta(hours=2))
+        self._connection('fresh', last_sync_ago=timedelta(minutes=10))
+        self._connection('daily', last_sync_ago=timedelta(hours=2), frequency=86400)
+
+        self.assertEqual(due_connections(), [never, overdue])
+
+    def test_jitter_is_deterministic_and_bounded(self):
+        from datetime import timedelta
+        from apps.integrations.services.sync_schedule import (
+            MAX_JITTER, jitter_fraction, next_sync_at, queue_countdown, SCHEDULER_INTERVAL,
+        )
+
+        connections = [
+            self._connection(f'c{i}', last_sync_ago=timedelta(0), frequency=86400)
+            for i in range(20)
+        ]
+        offsets = {
+            (next_sync_at(c) - c.last_sync - timedelta(days=1)).total_seconds() for c in connections
+        }
+
+        self.assertEqual(jitter_fraction(connections[0].id), jitter_fraction(str(connections[0].id)))
+        self.assertGreater(len(offsets), 15)
+        self.assertTrue(all(0 <= offset < MAX_JITTER.total_seconds() for offset in offsets))
+        self.assertTrue(all(0 <= queue_countdown(c) < SCHEDULER_INTERVAL for c in connections))
+
+    def test_priority_negative_activity_then_most_overdue(self):
+        from datetime import timedelta
+        from apps.integrations.services.sync_schedule import due_connections
+        from apps.reviews.models import Review
+
+        slightly = self._connection('slightly', last_sync_ago=timedelta(hours=1, minutes=30))
+        very = self._connection('very', last_sync_ago=timedelta(hours=10))
+        negative = self._connection('negative', last_sync_ago=timedelta(hours=1, minutes=30))
+        Review.objects.create(company=negative.company, rating=2, text='Плохо')
+
+        self.assertEqual(due_connections(), [negative, very, slightly])
+        self.assertEqual(due_connections(limit=1), [negative])
+
+    def test_scheduler_caps_run_and_skips_queued(self):
+        from datetime import timedelta
+        from apps.integrations import tasks
+        from apps.integrations.services import sync_schedule
+
+        for i in range(4):
+            self._connection(f'y{i}', last_sync_ago=timedelta(hours=3))
+        self._connection('g', platform=self.google, last_sync_ago=timedelta(hours=5))
+
+        with patch.object(sync_schedule, 'MAX_PER_RUN', 3), \
+                patch.object(tasks.sync_yandex_reviews, 'apply_async') as yandex, \
+                patch.object(tasks.sync_google_reviews, 'apply_async') as google:
+            first = tasks.schedule_platform_syncs()
+            second = tasks.schedule_platform_syncs()
+
+        self.assertEqual((first, second), (3, 2))
+        self.assertEqual(google.call_count, 1)
+        self.assertEqual(yandex.call_count, 4)
+        queued = [call.kwargs['args'][0] for call in yandex.call_args_list + google.call_args_list]
+        self.assertEqual(len(set(queued)), 5)
+
+    def test_failing_connection_backs_off_and_ranks_last(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.integrations import tasks
+        from apps.integrations.services.sync_schedule import due_connections, next_sync_at, sync_period
+
+        broken = self._connection('broken')
+        broken.access_token = ''
+        broken.save(update_fields=['access_token'])
+        healthy = self._connection('healthy', last_sync_ago=timedelta(hours=2))
+
+        tasks.sync_yandex_reviews(str(broken.id))
+        broken.refresh_from_db()
+        self.assertEqual((broken.last_sync_status, broken.sync_failures), ('error', 1))
+        self.assertEqual(due_connections(), [healthy])
+
+        # Due again after the backoff, but behind healthy connections
+        later = timezone.now() + timedelta(hours=1, minutes=10)
+        self.assertEqual(due_connections(now=later), [healthy, broken])
+
+        for _ in range(3):
+            tasks.sync_yandex_reviews(str(broken.id))
+        broken.refresh_from_db()
+        self.assertEqual(sync_period(broken), timedelta(hours=8))
+        self.assertGreater(next_sync_at(broken), broken.last_sync_attempt + timedelta(hours=8))
+
+        broken.sync_failures = 30
+        self.assertEqual(sync_period(broken), timedelta(days=1))
+
+    def test_task_retries_count_as_one_failure(self):
+        """A run retried by Celery until it gives up should add one failure, not one per attempt."""
+        from apps.integrations import tasks
+        from apps.integrations.services import YandexReviewsService
+
+        connection = self._connection('flaky')
+        connection.access_token = json.dumps({'Session_id': 'a', 'sessionid2': 'b', 'yandexuid': 'c'})
+        connection.save(update_fields=['access_token'])
+        with patch.object(YandexReviewsService, 'sync_reviews_to_db', side_effect=RuntimeError('boom')):
+            result = tasks.sync_yandex_reviews.apply(args=[str(connection.id)])
+
+        self.assertTrue(result.failed())
+        connection.refresh_from_db()
+        self.assertEqual((connection.last_sync_status, connection.sync_failures), ('error', 1))
+        self.assertEqual(connection.last_sync_error, 'boom')
+
+
+class FakePlatformServerTests(TestCase):
+    """Sync, reply and rating paths over HTTP against the local platform stand-in."""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.core.cache import cache
+        from django.utils import timezone
+        from apps.companies.models import Connection, Platform
+        from apps.integrations.fake_platforms import FakePlatformServer
+        from apps.integrations.services import yandex_reviews
+
+        cache.clear()
+        company = Company.objects.create(name='Fake Co')
+        yandex, _ = Platform.objects.get_or_create(id='yandex', defaults={'name': 'Яндекс'})
+        google, _ = Platform.objects.get_or_create(id='google', defaults={'name': 'Google'})
+        self.yandex = Connection.objects.create(
+            company=company,
+            platform=yandex,
+            external_id='120057269196',
+            access_token=json.dumps({'Session_id': 'a', 'sessionid2': 'b', 'yandexuid': 'c'}),
+        )
+        self.google = Connection.objects.create(
+            company=company,
+            platform=google,
+            external_id='g',
+            access_token='token',
+            token_expires_at=timezone.now() + timedelta(hours=1),
+            google_account_id='accounts/1',
+            google_location_id='locations/2',
+        )
+
+        self.server = FakePlatformServer(yandex_reviews=45, google_reviews=120).start()
+        self.addCleanup(self.server.stop)
+        for context in (
+            self.server.patch_services(),
+            patch.object(yandex_reviews, 'REQUEST_INTERVAL', 0),
+        ):
+            context.__enter__()
+            self.addCleanup(context.__exit__, None, None, None)
+
+    def test_yandex_sync_reply_and_rating(self):
+        from apps.integrations.services import YandexReviewsService
+        from apps.reviews.models import Review
+
+        result = YandexReviewsService(self.yandex).sync_reviews_to_db()
+
+        self.assertEqual(result.created, 45)
+        self.assertEqual(self.server.requests['yandex_page'], 3)
+        self.yandex.refresh_from_db()
+        self.assertEqual(str(self.yandex.platform_rating), '4.7')
+        self.assertEqual(self.yandex.platform_review_count, 45)
+
+        self.assertTrue(YandexReviewsService(self.yandex).reply_to_review('ya000001', 'Спасибо!'))
+        self.assertEqual(self.server.replies, [
+            {'platform': 'yandex', 'review_id': 'ya000001', 'text': 'Спасибо!'},
+        ])
+        # Cached answer token: the reply fetched page 1 only
+        self.assertEqual(self.server.requests['yandex_page'], 4)
+        self.assertEqual(Review.objects.get(external_id='ya000001').answer_token, 'tok-ya000001')
+
+    def test_yandex_transient_errors_retried_failed_page_stops(self):
+        from apps.integrations.services import YandexReviewsService, yandex_reviews
+
+        service = YandexReviewsService(self.yandex)
+        self.server.fail_next('yandex_page', 503)
+        with patch('apps.integrations.http.time.sleep'):
+            self.assertEqual(len(service.fetch_reviews(max_pages=10)), 45)
+        self.assertTrue(service._fetch_complete)
+
+        # Page 1 served, then a non-retryable error: page 1 is kept
+        self.server.fail_next('yandex_page', None, 403)
+        with patch.object(yandex_reviews, 'FETCH_CONCURRENCY', 1):
+            reviews = service.fetch_reviews(max_pages=10)
+
+        self.assertEqual(len(reviews), 20)
+        self.assertFalse(service._fetch_complete)
+
+    def test_google_sync_and_reply(self):
+        from apps.integrations.services import GoogleReviewsService
+        from apps.reviews.models import Review
+
+        result = GoogleReviewsService(self.google).sync_reviews_to_db()
+
+        self.assertEqual(result.created, 120)
+        self.assertEqual(self.server.requests['google_list'], 3)
+        review = Review.objects.get(external_id='g000000')
+        self.assertEqual(review.rating, 5)
+        self.assertEqual(review.response, 'Спасибо, Ольга! Ждём снова.')
+
+        self.assertTrue(GoogleReviewsService(self.google).reply_to_review('g000004', 'Thanks'))
+        self.assertEqual(self.server.google_items[-5]['reviewReply']['comment'], 'Thanks')
+
+    def test_benchmark_command_runs_offline(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command(
+            'benchmark_sync', reviews=60, new_reviews=5, latency=0,
+            request_interval=0, stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(any(line.startswith('yandex') and ' 60 ' in line for line in lines))
+        self.assertTrue(any(line.startswith('google') for line in lines))
+        self.assertFalse(Company.objects.filter(name='Benchmark sync').exists())
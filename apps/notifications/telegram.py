@@ -4,6 +4,8 @@ import requests
 from typing import Optional
 from django.utils import timezone
 
+from apps.integrations.http import get_interactive_http_client
+
 logger = logging.getLogger(__name__)
 
 TELEGRAM_API_URL = "https://api.telegram.org/bot{token}/{method}"
@@ -40,7 +42,7 @@ def send_telegram_message(
     }
 
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = get_interactive_http_client().post(url, json=payload, timeout=10)
         response.raise_for_status()
 
         result = response.json()
@@ -97,7 +99,7 @@ def send_telegram_photo(
                 'caption': caption,
                 'parse_mode': parse_mode,
             }
-            response = requests.post(url, data=data, files=files, timeout=30)
+            response = get_interactive_http_client().post(url, data=data, files=files, timeout=30)
             response.raise_for_status()
 
             result = response.json()
@@ -55,7 +55,7 @@ def respond_to_review(request: HttpRequest, review_id: uuid.UUID) -> JsonRespons
     review.response_at = timezone.now()
     review.response_by = request.user
     review.status = Review.Status.RESOLVED
-    review.save()
+    review.save(update_fields=['response', 'response_at', 'response_by', 'status', 'updated_at'])
 
     # Если это отзыв из Google — отправляем ответ в Google
     pushed_to_google = False
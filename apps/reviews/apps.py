@@ -5,3 +5,7 @@ class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reviews'
     verbose_name = 'Отзывы'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.reviews.signals  # noqa: F401
@@ -53,3 +53,37 @@ def get_analysis_cached(
     return result
 
 
+def get_analyses_cached(items: List[Tuple[str, int]]) -> List[Tuple[List[Dict[str, str]], float]]:
+    """
+    Анализ пачки отзывов: одно чтение и одна запись кэша на всю пачку.
+
+    Args:
+        items: [(text, rating), ...]
+
+    Returns:
+        [(tags, ml_score), ...] в порядке items
+    """
+    keys = {
+        _make_cache_key(text, rating)
+        for text, rating in items
+        if text and text.strip()
+    }
+    cached = cache.get_many(list(keys)) if keys else {}
+
+    results = []
+    missing = {}
+    for text, rating in items:
+        if not text or not text.strip():
+            results.append(([], 0.5))
+            continue
+        key = _make_cache_key(text, rating)
+        result = cached.get(key) or missing.get(key)
+        if result is None:
+            result = missing[key] = analyze_review_impressions(text, rating)
+        results.append(result)
+
+    if missing:
+        cache.set_many(missing, CACHE_TIMEOUT)
+    return results
+
+
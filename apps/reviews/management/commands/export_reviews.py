@@ -0,0 +1,67 @@
+"""
+Management command для выгрузки отзывов компании в CSV/XLSX.
+
+Фильтры — те же параметры, что у списка отзывов в кабинете:
+
+    python manage.py export_reviews --company my-cafe --output reviews.csv
+    python manage.py export_reviews --company my-cafe --format xlsx \\
+        --output reviews.xlsx -p source=yandex -p rating=negative
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.companies.models import Company
+from apps.dashboard.services.export import EXPORT_FORMATS, write_export_file
+
+
+class Command(BaseCommand):
+    help = 'Выгрузить отзывы компании в CSV или XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            required=True,
+            help='Компания (UUID или slug)',
+        )
+        parser.add_argument(
+            '--output',
+            required=True,
+            help='Путь к файлу выгрузки',
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='csv',
+            help='Формат файла (по умолчанию csv)',
+        )
+        parser.add_argument(
+            '-p', '--param',
+            action='append',
+            default=[],
+            metavar='KEY=VALUE',
+            help='Фильтр списка отзывов (source, rating, filter, search, category, ...)',
+        )
+
+    def handle(self, *args, **options):
+        company = options['company']
+        if len(company) == 36:
+            company = Company.objects.filter(id=company).first()
+        else:
+            company = Company.objects.filter(slug=company).first()
+        if company is None:
+            raise CommandError('Компания не найдена')
+
+        params = {}
+        for param in options['param']:
+            key, sep, value = param.partition('=')
+            if not sep:
+                raise CommandError(f'Фильтр должен быть в виде KEY=VALUE: {param}')
+            params[key] = value
+
+        path = Path(options['output'])
+        self.stdout.write(f'Выгрузка отзывов {company.name} в {path}...')
+
+        count = write_export_file(company, params, options['format'], path)
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: выгружено {count} отзывов'))
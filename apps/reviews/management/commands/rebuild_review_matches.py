@@ -0,0 +1,51 @@
+"""
+Management command для перестроения совпадений с паттернами (ReviewMatch).
+
+Запускать после изменения PROBLEM_PATTERNS, COMPLAINT_PATTERNS или
+PRAISE_PATTERNS, а также после первого деплоя — для заполнения таблицы.
+Заодно перестраивает счётчики и снимки алертов затронутых компаний.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.companies.models import Company
+from apps.dashboard.services.alert_engine import rebuild_alert_counters
+from apps.dashboard.services.matching import rebuild_review_matches
+from apps.reviews.models import Review
+
+
+class Command(BaseCommand):
+    help = 'Перестроить совпадения отзывов с паттернами проблем, жалоб и похвал'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            help='Перестроить только для компании (UUID или slug)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки отзывов (по умолчанию 1000)',
+        )
+
+    def handle(self, *args, **options):
+        qs = Review.objects.all()
+
+        company = options.get('company')
+        if company:
+            if len(company) == 36:
+                qs = qs.filter(company_id=company)
+            else:
+                qs = qs.filter(company__slug=company)
+
+        total = qs.count()
+        self.stdout.write(f'Перестроение совпадений для {total} отзывов...')
+
+        processed = rebuild_review_matches(qs, batch_size=options['batch_size'])
+
+        # Счётчики алертов строятся из совпадений — перестраиваем их тоже
+        companies = Company.objects.filter(id__in=qs.values('company_id'))
+        for company in companies:
+            rebuild_alert_counters(company)
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: обработано {processed} отзывов'))
@@ -0,0 +1,43 @@
+"""
+Management command для перестроения поискового индекса отзывов.
+
+Запускать после первого деплоя (для заполнения индекса) и после изменения
+лемматизатора или правил разбиения текста на слова (apps/reviews/search.py).
+"""
+from django.core.management.base import BaseCommand
+
+from apps.reviews.models import Review
+from apps.reviews.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестроить полнотекстовый индекс отзывов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            help='Перестроить только для компании (UUID или slug)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки отзывов (по умолчанию 1000)',
+        )
+
+    def handle(self, *args, **options):
+        qs = Review.objects.all()
+
+        company = options.get('company')
+        if company:
+            if len(company) == 36:
+                qs = qs.filter(company_id=company)
+            else:
+                qs = qs.filter(company__slug=company)
+
+        total = qs.count()
+        self.stdout.write(f'Индексация {total} отзывов...')
+
+        processed = rebuild_search_index(qs, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: проиндексировано {processed} отзывов'))
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_connection_platform_rating_and_more'),
+        ('reviews', '0007_review_tags_complex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('problem', 'Проблема'), ('complaint', 'Жалоба'), ('praise', 'Похвала')], max_length=20, verbose_name='Тип')),
+                ('key', models.CharField(max_length=100, verbose_name='Ключ')),
+                ('review_created_at', models.DateTimeField(verbose_name='Дата отзыва')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_matches', to='companies.company', verbose_name='Компания')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='reviews.review', verbose_name='Отзыв')),
+                ('spot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='companies.spot', verbose_name='Точка')),
+            ],
+            options={
+                'verbose_name': 'Совпадение паттерна',
+                'verbose_name_plural': 'Совпадения паттернов',
+                'indexes': [models.Index(fields=['company', 'kind', 'key', 'review_created_at'], name='reviews_rev_company_1caf7e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('review', 'kind', 'key'), name='unique_review_match')],
+            },
+        ),
+    ]
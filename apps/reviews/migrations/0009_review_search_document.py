@@ -0,0 +1,83 @@
+# Generated by Django 6.0 on 2026-10-18 21:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# FTS5-индекс поверх reviews_reviewsearchdocument (external content):
+# триггеры держат индекс в синхронизации с таблицей документов.
+FTS_CREATE = [
+    """
+    CREATE VIRTUAL TABLE reviews_search_fts USING fts5(
+        tokens, company_id,
+        content='reviews_reviewsearchdocument', content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER reviews_search_ai AFTER INSERT ON reviews_reviewsearchdocument BEGIN
+        INSERT INTO reviews_search_fts(rowid, tokens, company_id)
+        VALUES (new.id, new.tokens, new.company_id);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_search_ad AFTER DELETE ON reviews_reviewsearchdocument BEGIN
+        INSERT INTO reviews_search_fts(reviews_search_fts, rowid, tokens, company_id)
+        VALUES ('delete', old.id, old.tokens, old.company_id);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_search_au AFTER UPDATE ON reviews_reviewsearchdocument BEGIN
+        INSERT INTO reviews_search_fts(reviews_search_fts, rowid, tokens, company_id)
+        VALUES ('delete', old.id, old.tokens, old.company_id);
+        INSERT INTO reviews_search_fts(rowid, tokens, company_id)
+        VALUES (new.id, new.tokens, new.company_id);
+    END
+    """,
+]
+
+FTS_DROP = [
+    'DROP TRIGGER IF EXISTS reviews_search_au',
+    'DROP TRIGGER IF EXISTS reviews_search_ad',
+    'DROP TRIGGER IF EXISTS reviews_search_ai',
+    'DROP TABLE IF EXISTS reviews_search_fts',
+]
+
+
+def create_fts(apps, schema_editor):
+    """FTS5 есть только в SQLite; на других БД работает fallback-бэкенд."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in FTS_CREATE:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in FTS_DROP:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_connection_platform_rating_and_more'),
+        ('reviews', '0008_review_match'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tokens', models.TextField(blank=True, verbose_name='Леммы')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.company', verbose_name='Компания')),
+                ('review', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='reviews.review', verbose_name='Отзыв')),
+            ],
+            options={
+                'verbose_name': 'Поисковый документ',
+                'verbose_name_plural': 'Поисковые документы',
+            },
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
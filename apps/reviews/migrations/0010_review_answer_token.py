@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_review_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='answer_token',
+            field=models.CharField(blank=True, max_length=500, verbose_name='Токен ответа'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='answer_token_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Токен ответа получен'),
+        ),
+    ]
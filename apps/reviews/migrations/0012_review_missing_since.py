@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_review_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='missing_since',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Пропал с платформы'),
+        ),
+    ]
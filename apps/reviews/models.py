@@ -1,4 +1,6 @@
 import uuid
+from typing import Optional
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -129,6 +131,13 @@ class Review(models.Model):
         blank=True,
         null=True
     )
+    # Токен ответа на платформе (Яндекс: business_answer_csrf_token) и время его получения
+    answer_token = models.CharField('Токен ответа', max_length=500, blank=True)
+    answer_token_at = models.DateTimeField('Токен ответа получен', blank=True, null=True)
+    # Хэш содержимого с платформы: синхронизация не пишет отзыв, если он не изменился
+    content_hash = models.CharField('Хэш содержимого', max_length=32, blank=True)
+    # Не найден в полном списке платформы: удаляется, если не найдётся и в следующем
+    missing_since = models.DateTimeField('Пропал с платформы', blank=True, null=True)
 
     # Даты
     created_at = models.DateTimeField('Создан', auto_now_add=True, db_index=True)
@@ -148,10 +157,54 @@ class Review(models.Model):
             models.Index(fields=['status', '-created_at']),  # Новые для обработки
         ]
 
+    # Поля, от которых зависят счётчики вкладок (dashboard/services/counters.py)
+    COUNTER_FIELDS = ('status', 'response', 'rating', 'tags_complex')
+
+    # Служебные поля синхронизации: их смена не влияет на производные данные
+    ANSWER_TOKEN_FIELDS = frozenset({'answer_token', 'answer_token_at'})
+
     def __str__(self):
         return f'{self.get_source_display()} ★{self.rating} — {self.author_name}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженные значения — для инкрементального обновления счётчиков
+        if all(f in field_names for f in cls.COUNTER_FIELDS):
+            instance._loaded_counter_values = instance.counter_values()
+        # И все загруженные поля — чтобы save() без update_fields знал, что изменилось
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def counter_values(self) -> dict:
+        """Текущие значения полей счётчиков."""
+        return {f: getattr(self, f) for f in self.COUNTER_FIELDS}
+
+    def changed_fields(self) -> Optional[set]:
+        """Поля, изменённые с загрузки из БД (None — значения из БД неизвестны)."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in loaded and getattr(self, field.attname) != loaded[field.attname]
+        }
+
     def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self._loaded_values = {
+                field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+            }
+        elif hasattr(self, '_loaded_values'):
+            for field in self._meta.concrete_fields:
+                if field.name in update_fields:
+                    self._loaded_values[field.attname] = getattr(self, field.attname)
+
+    def set_derived_fields(self):
+        """Поля, выводимые из оценки (save вызывает сам; для bulk_create — вручную)."""
         # Автоматически скрываем негативные внутренние отзывы
         if self.source == self.Source.INTERNAL and self.rating <= 3:
             self.is_public = False
@@ -165,12 +218,13 @@ class Review(models.Model):
             else:
                 self.sentiment = self.Sentiment.NEUTRAL
 
-        super().save(*args, **kwargs)
-
     @property
     def photos_count(self):
-        """Количество прикреплённых фото"""
-        count = self.photos.count()
+        """Количество прикреплённых фото (без запроса, если photos подгружены)"""
+        if 'photos' in getattr(self, '_prefetched_objects_cache', {}):
+            count = len(self.photos.all())
+        else:
+            count = self.photos.count()
         # Учитываем старое поле photo для обратной совместимости
         if self.photo:
             count += 1
@@ -241,3 +295,87 @@ class ReviewHistory(models.Model):
 
     def __str__(self):
         return f'{self.get_action_display()} — {self.created_at}'
+
+
+class ReviewMatch(models.Model):
+    """
+    Совпадение отзыва с паттерном проблемы, жалобы или похвалы.
+
+    Считается один раз при записи отзыва (см. apps.dashboard.services.matching),
+    чтобы дашборд строил алерты и топы агрегацией, а не сканированием текстов.
+    """
+
+    class Kind(models.TextChoices):
+        PROBLEM = 'problem', 'Проблема'
+        COMPLAINT = 'complaint', 'Жалоба'
+        PRAISE = 'praise', 'Похвала'
+
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.CASCADE,
+        related_name='matches',
+        verbose_name='Отзыв'
+    )
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='review_matches',
+        verbose_name='Компания'
+    )
+    spot = models.ForeignKey(
+        'companies.Spot',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Точка',
+        blank=True,
+        null=True
+    )
+    kind = models.CharField('Тип', max_length=20, choices=Kind.choices)
+    # problem — ключ из PROBLEM_PATTERNS, complaint/praise — человекочитаемый лейбл
+    key = models.CharField('Ключ', max_length=100)
+    review_created_at = models.DateTimeField('Дата отзыва')
+
+    class Meta:
+        verbose_name = 'Совпадение паттерна'
+        verbose_name_plural = 'Совпадения паттернов'
+        indexes = [
+            models.Index(fields=['company', 'kind', 'key', 'review_created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['review', 'kind', 'key'], name='unique_review_match'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()}: {self.key}'
+
+
+class ReviewSearchDocument(models.Model):
+    """
+    Поисковый документ отзыва: леммы текста и имени автора.
+
+    Заполняется при записи отзыва (см. apps.reviews.search). На SQLite по
+    таблице построен FTS5-индекс reviews_search_fts (миграция 0009).
+    """
+
+    review = models.OneToOneField(
+        Review,
+        on_delete=models.CASCADE,
+        related_name='search_document',
+        verbose_name='Отзыв'
+    )
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Компания'
+    )
+    tokens = models.TextField('Леммы', blank=True)
+
+    class Meta:
+        verbose_name = 'Поисковый документ'
+        verbose_name_plural = 'Поисковые документы'
+
+    def __str__(self):
+        return f'Поиск: {self.review_id}'
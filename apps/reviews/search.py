@@ -0,0 +1,210 @@
+"""
+Полнотекстовый поиск по отзывам.
+
+Текст и имя автора отзыва приводятся к леммам (get_lemma) и сохраняются
+в ReviewSearchDocument при записи отзыва, поэтому запрос «официанты»
+находит «официанта». Поиск идёт через бэкенд:
+
+- SQLiteFTSBackend — FTS5-индекс reviews_search_fts с ранжированием bm25;
+- DatabaseBackend — fallback для остальных БД (поиск по леммам в таблице
+  документов, свежие сверху).
+
+Перестроение индекса: manage.py rebuild_search_index.
+"""
+import re
+import uuid
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.db.models.expressions import RawSQL
+
+from .lemmatizer import get_lemma
+from .models import Review, ReviewSearchDocument
+
+# Сколько совпадений отдаёт поиск за один запрос (список листает их окнами)
+SEARCH_LIMIT = 500
+
+# Поля отзыва, от которых зависит поисковый документ
+SEARCH_FIELDS = {'text', 'author_name'}
+
+TOKEN_RE = re.compile(r'[а-яёa-z0-9]+')
+CYRILLIC_RE = re.compile(r'[а-яё]')
+
+
+def tokenize(text: str) -> list[str]:
+    """Разбить текст на леммы (кириллица — через get_lemma, ё → е)."""
+    if not text:
+        return []
+    tokens = []
+    for word in TOKEN_RE.findall(text.lower()):
+        if CYRILLIC_RE.search(word):
+            word = get_lemma(word)
+        tokens.append(word.replace('ё', 'е'))
+    return tokens
+
+
+def _document_tokens(review: Review) -> str:
+    """Леммы документа; пробелы по краям — для поиска целых слов в fallback."""
+    tokens = tokenize(review.text) + tokenize(review.author_name)
+    return f' {" ".join(tokens)} '
+
+
+# === Бэкенды ===
+
+class SearchBackend:
+    """Интерфейс поискового бэкенда."""
+
+    def search(self, company_id, tokens: list[str], limit: int, offset: int = 0) -> list[uuid.UUID]:
+        """ID отзывов компании, содержащих все леммы, лучшие первыми."""
+        raise NotImplementedError
+
+    def matching(self, company_id, tokens: list[str]):
+        """Подзапрос ID всех совпавших отзывов (для фильтра id__in)."""
+        raise NotImplementedError
+
+    def optimize(self) -> None:
+        """Обслуживание индекса после массового перестроения."""
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """FTS5 (external content над reviews_reviewsearchdocument)."""
+
+    MATCH_SQL = (
+        'SELECT d.review_id FROM reviews_search_fts f '
+        'JOIN reviews_reviewsearchdocument d ON d.id = f.rowid '
+        'WHERE reviews_search_fts MATCH %s'
+    )
+
+    @staticmethod
+    def _match(company_id, tokens: list[str]) -> str:
+        # Компания — тоже колонка индекса: FTS пересекает списки вхождений,
+        # не перебирая совпадения других компаний
+        return ' AND '.join(
+            [f'company_id : "{uuid.UUID(str(company_id)).hex}"']
+            + [f'tokens : "{token}"' for token in tokens]
+        )
+
+    def search(self, company_id, tokens: list[str], limit: int, offset: int = 0) -> list[uuid.UUID]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{self.MATCH_SQL} ORDER BY f.rank LIMIT %s OFFSET %s',
+                [self._match(company_id, tokens), limit, offset],
+            )
+            return [uuid.UUID(row[0]) for row in cursor.fetchall()]
+
+    def matching(self, company_id, tokens: list[str]):
+        return RawSQL(self.MATCH_SQL, [self._match(company_id, tokens)])
+
+    def optimize(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO reviews_search_fts(reviews_search_fts) VALUES ('optimize')")
+
+
+class DatabaseBackend(SearchBackend):
+    """Fallback без полнотекстового индекса: совпадение лемм целиком."""
+
+    def _documents(self, company_id, tokens: list[str]) -> QuerySet:
+        docs = ReviewSearchDocument.objects.filter(company_id=company_id)
+        for token in tokens:
+            docs = docs.filter(tokens__contains=f' {token} ')
+        return docs
+
+    def search(self, company_id, tokens: list[str], limit: int, offset: int = 0) -> list[uuid.UUID]:
+        return list(
+            self._documents(company_id, tokens)
+            .order_by('-review__created_at', '-review_id')
+            .values_list('review_id', flat=True)[offset:offset + limit]
+        )
+
+    def matching(self, company_id, tokens: list[str]):
+        return self._documents(company_id, tokens).values('review_id')
+
+
+def get_search_backend() -> SearchBackend:
+    """Бэкенд для текущей БД."""
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return DatabaseBackend()
+
+
+# === Индексация и поиск ===
+
+def index_review(review: Review) -> None:
+    """Обновить поисковый документ отзыва (вызывается при сохранении)."""
+    ReviewSearchDocument.objects.update_or_create(
+        review_id=review.pk,
+        defaults={'company_id': review.company_id, 'tokens': _document_tokens(review)},
+    )
+
+
+def rebuild_search_index(reviews_qs: QuerySet, batch_size: int = 1000) -> int:
+    """
+    Перестроить поисковые документы для набора отзывов пачками.
+
+    Returns:
+        Количество проиндексированных отзывов.
+    """
+    reviews = reviews_qs.only('id', 'company_id', 'text', 'author_name')
+    batch = []
+    processed = 0
+
+    for review in reviews.iterator(chunk_size=batch_size):
+        batch.append(review)
+        if len(batch) >= batch_size:
+            index_reviews(batch)
+            processed += len(batch)
+            batch = []
+
+    if batch:
+        index_reviews(batch)
+        processed += len(batch)
+
+    get_search_backend().optimize()
+    return processed
+
+
+def index_reviews(reviews: list[Review]) -> None:
+    """Заменить поисковые документы пачки отзывов (для массовой записи)."""
+    ReviewSearchDocument.objects.filter(review_id__in=[r.pk for r in reviews]).delete()
+    ReviewSearchDocument.objects.bulk_create([
+        ReviewSearchDocument(
+            review_id=review.pk,
+            company_id=review.company_id,
+            tokens=_document_tokens(review),
+        )
+        for review in reviews
+    ])
+
+
+def _query_tokens(query: str) -> list[str]:
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def search_reviews(
+    company_id, query: str, limit: int = SEARCH_LIMIT, offset: int = 0,
+) -> list[uuid.UUID]:
+    """
+    Найти отзывы компании по запросу.
+
+    Args:
+        limit, offset: окно выдачи (offset — место первого отзыва окна)
+
+    Returns:
+        ID отзывов по убыванию релевантности (пустой список — ничего не найдено
+        или в запросе нет слов).
+    """
+    tokens = _query_tokens(query)
+    if not tokens:
+        return []
+    return get_search_backend().search(company_id, tokens, limit, offset)
+
+
+def matching_reviews(company_id, query: str):
+    """
+    Подзапрос ID всех отзывов компании, найденных по запросу, — для
+    filter(id__in=...). None — в запросе нет слов.
+    """
+    tokens = _query_tokens(query)
+    if not tokens:
+        return None
+    return get_search_backend().matching(company_id, tokens)
@@ -175,6 +175,21 @@ def is_tags_complex(rating: int, tags: List[Dict[str, str]]) -> bool:
     return False
 
 
+def analyze_reviews(reviews: List[Review]) -> None:
+    """
+    Проставить tags, tags_complex и sentiment_score пачке отзывов (без сохранения).
+
+    Для отзывов с платформ: синхронизация пишет их bulk-запросами
+    (apps/integrations/services/review_sync.py), анализ идёт в той же записи.
+    """
+    from .cache import get_analyses_cached
+    results = get_analyses_cached([(review.text, review.rating) for review in reviews])
+    for review, (tags, sentiment_score) in zip(reviews, results):
+        review.tags = tags
+        review.tags_complex = is_tags_complex(review.rating, tags)
+        review.sentiment_score = round(float(sentiment_score), 2)
+
+
 def create_review(company: Company, rating: int, text: str, data: Dict[str, Any],
                   spot: Optional[Spot], qr: Optional[QR], photos: List) -> Review:
     """Create review and save photos"""
@@ -0,0 +1,120 @@
+"""Signals for keeping derived review data in sync with writes."""
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .models import Review, ReviewMatch
+
+# Поля, от которых зависят совпадения с паттернами (ReviewMatch)
+MATCH_FIELDS = {'text', 'spot', 'created_at'}
+
+# Массовая запись отзывов (bulk_create/bulk_update) — post_save не срабатывает.
+# Аргументы: company, created (list[Review]), updated (list[Review]),
+# update_fields (set[str] — поля, изменённые хотя бы у одного из updated).
+reviews_bulk_changed = Signal()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Reindex search, re-match patterns and push problem changes into alert counters."""
+    from apps.dashboard.services.cache import bump_data_version
+    from apps.dashboard.services.snapshots import SNAPSHOT_FIELDS, mark_all_time_snapshot_stale
+
+    if update_fields is None and not created:
+        # save() без update_fields: учитываем только реально изменённые поля
+        update_fields = instance.changed_fields()
+
+    # Снимок помечается до смены версии: кэш новой версии его уже не возьмёт
+    if not created and (update_fields is None or SNAPSHOT_FIELDS & set(update_fields)):
+        mark_all_time_snapshot_stale(instance)
+    bump_data_version(instance.company_id)
+    _update_tab_counters(instance, created, update_fields)
+
+    from .search import SEARCH_FIELDS, index_review
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        index_review(instance)
+
+    if update_fields is not None and not MATCH_FIELDS & set(update_fields):
+        return
+
+    from apps.dashboard.services.alert_engine import (
+        apply_problem_matches, refresh_alert_snapshot,
+    )
+    from apps.dashboard.services.matching import sync_review_matches
+
+    old_matches, new_matches = sync_review_matches(instance)
+    if apply_problem_matches(instance.company_id, old_matches, new_matches):
+        refresh_alert_snapshot(instance.company)
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Remove a deleted review's problems from alert counters."""
+    from apps.dashboard.services.alert_engine import (
+        apply_problem_matches, refresh_alert_snapshot_on_commit,
+    )
+
+    old_matches = list(instance.matches.filter(kind=ReviewMatch.Kind.PROBLEM))
+    if apply_problem_matches(instance.company_id, old_matches, []):
+        refresh_alert_snapshot_on_commit(instance.company_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_removed(sender, instance, **kwargs):
+    """Invalidate cached dashboard data and the all-time snapshot of the review's company."""
+    from apps.dashboard.services.cache import bump_data_version
+    from apps.dashboard.services.counters import apply_review_change
+    from apps.dashboard.services.snapshots import mark_all_time_snapshot_stale
+
+    mark_all_time_snapshot_stale(instance)
+    bump_data_version(instance.company_id)
+    old = getattr(instance, '_loaded_counter_values', None) or instance.counter_values()
+    apply_review_change(instance.company_id, old, None)
+
+
+def _update_tab_counters(instance, created, update_fields):
+    """Apply a saved review's status/response/rating/complex change to tab counters."""
+    from apps.dashboard.services.counters import apply_review_change, invalidate_review_counts
+
+    new = instance.counter_values()
+    if created:
+        apply_review_change(instance.company_id, None, new)
+    elif hasattr(instance, '_loaded_counter_values'):
+        old = instance._loaded_counter_values
+        if update_fields is not None:
+            # В БД записаны только update_fields — остальные значения прежние
+            new = {f: new[f] if f in update_fields else old[f] for f in new}
+        apply_review_change(instance.company_id, old, new)
+    else:
+        # Старые значения неизвестны (объект не из БД или с отложенными полями)
+        invalidate_review_counts(instance.company_id)
+    instance._loaded_counter_values = new
+
+
+@receiver(reviews_bulk_changed)
+def reviews_bulk_written(sender, company, created, updated, update_fields, **kwargs):
+    """Bring derived data in line after a bulk write, once per batch instead of per review."""
+    from apps.dashboard.services.alert_engine import rebuild_alert_counters
+    from apps.dashboard.services.cache import bump_data_version
+    from apps.dashboard.services.counters import invalidate_review_counts
+    from apps.dashboard.services.matching import replace_review_matches
+    from apps.dashboard.services.snapshots import SNAPSHOT_FIELDS, mark_all_time_snapshot_stale
+
+    from .search import SEARCH_FIELDS, index_reviews
+
+    if not created and not updated:
+        return
+
+    if updated and SNAPSHOT_FIELDS & update_fields:
+        mark_all_time_snapshot_stale(min(updated, key=lambda review: review.created_at))
+    bump_data_version(company.id)
+    invalidate_review_counts(company.id)
+
+    reindexed = created + updated if SEARCH_FIELDS & update_fields else created
+    if reindexed:
+        index_reviews(reindexed)
+
+    rematched = created + updated if MATCH_FIELDS & update_fields else created
+    if rematched:
+        replace_review_matches(rematched)
+        rebuild_alert_counters(company)
@@ -18,13 +18,30 @@ app.autodiscover_tasks()
 
 # Periodic tasks (Celery Beat)
 app.conf.beat_schedule = {
-    'sync-google-reviews-hourly': {
-        'task': 'apps.integrations.tasks.sync_all_google_reviews',
-        'schedule': crontab(minute=0),  # Every hour
+    # Per-connection sync_frequency with jitter instead of one burst per hour
+    'schedule-platform-syncs': {
+        'task': 'apps.integrations.tasks.schedule_platform_syncs',
+        'schedule': crontab(minute='*/5'),
     },
-    'sync-yandex-reviews-every-3h': {
-        'task': 'apps.integrations.tasks.sync_all_yandex_reviews',
-        'schedule': crontab(minute=0, hour='0,9,12,15,18,21'),
+    'refresh-alert-snapshots-hourly': {
+        'task': 'apps.dashboard.tasks.refresh_alert_snapshots',
+        'schedule': crontab(minute=5),
+    },
+    'detect-review-anomalies-hourly': {
+        'task': 'apps.dashboard.tasks.detect_review_anomalies',
+        'schedule': crontab(minute=15),
+    },
+    'rebuild-alert-counters-nightly': {
+        'task': 'apps.dashboard.tasks.rebuild_alert_counters',
+        'schedule': crontab(minute=30, hour=3),
+    },
+    'build-all-time-snapshots-nightly': {
+        'task': 'apps.dashboard.tasks.build_all_time_snapshots',
+        'schedule': crontab(minute=45, hour=3),
+    },
+    'rebuild-stale-all-time-snapshots': {
+        'task': 'apps.dashboard.tasks.rebuild_stale_all_time_snapshots',
+        'schedule': crontab(minute='*/15'),
     },
 }
 
@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.dashboard.middleware.QueryBudgetMiddleware',  # SQL stats (opt-in)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,6 +64,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',  # OAuth support
     'django.contrib.messages.middleware.MessageMiddleware',
+    'apps.dashboard.middleware.CompanyContextMiddleware',  # request.company_context
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'apps.accounts.middleware.RateLimitMiddleware',  # Bot protection
 ]
@@ -241,6 +243,11 @@ RATE_LIMIT_PATHS = [     # Protected endpoints
     '/accounts/login/',
 ]
 
+# Query budget (SQL stats in Server-Timing headers and logs)
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED') == '1'
+QUERY_BUDGET = 30         # Max queries per request before a warning
+QUERY_BUDGET_SLOWEST = 3  # Slowest statements to log
+
 
 # Logging Configuration (для отладки OAuth)
 LOGGING = {
@@ -260,5 +267,9 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'DEBUG',
         },
+        'apps.dashboard.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
     },
 }